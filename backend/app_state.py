@@ -1,16 +1,184 @@
 import os
 import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from backend.atomic_write import write_text_atomic
+from backend.instrumentation import instrumented
 
 STATE_FILE = os.path.join(os.path.dirname(__file__), "../app_state.json")
 
+# After a failed write, retry after this many seconds, doubling up to the cap
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
+log = logging.getLogger(__name__)
+
 
+@instrumented("app_state.save_app_state", phase="io")
 def save_app_state(state: dict):
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f)
+    write_text_atomic(STATE_FILE, json.dumps(state))
 
 
+@instrumented("app_state.load_app_state", phase="io")
 def load_app_state() -> dict:
     if not os.path.exists(STATE_FILE):
         return {}
     with open(STATE_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+class AppStateStore:
+    """In-memory app state that persists changed keys at most once per interval.
+
+    ``update()`` only marks keys dirty when their value actually changed;
+    the file is rewritten (atomically) by a timer at most once every
+    ``interval`` seconds, and ``flush()``/``close()`` write immediately.
+    A failed write is retried by the timer with exponential backoff (from
+    RETRY_DELAY up to MAX_RETRY_DELAY) for as long as the store is dirty.
+
+    Attributes:
+        path: JSON file backing the store.
+        interval: Minimum number of seconds between two writes.
+    """
+
+    def __init__(self, path: str = STATE_FILE, interval: float = 1.0):
+        """Load the state file and prepare the store.
+
+        Args:
+            path: JSON file backing the store.
+            interval: Minimum number of seconds between two writes.
+        """
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        # Held from snapshot to rename, so an older snapshot never lands last
+        self._write_lock = threading.Lock()
+        self._state: Dict[str, Any] = self._load()
+        # Serialized value of each key as last persisted, for change detection
+        self._persisted = {key: _encode(value) for key, value in self._state.items()}
+        self._dirty = set()
+        self._timer: Optional[threading.Timer] = None
+        self._last_write = 0.0
+        # Delay before the next retry; 0 while writes succeed
+        self._retry_delay = 0.0
+        self._closed = False
+        self._counters = {"updates": 0, "writes": 0}
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def get(self, key: str, default=None):
+        """Return the current value of key."""
+        with self._lock:
+            return self._state.get(key, default)
+
+    def update(self, **updates):
+        """Merge updates and schedule a write if any value changed."""
+        with self._lock:
+            self._counters["updates"] += 1
+            for key, value in updates.items():
+                self._state[key] = value
+                if _encode(value) != self._persisted.get(key):
+                    self._dirty.add(key)
+                else:
+                    self._dirty.discard(key)
+            if self._dirty and not self._closed:
+                self._schedule()
+
+    def is_dirty(self) -> bool:
+        """Return True if some changes are not written yet."""
+        with self._lock:
+            return bool(self._dirty)
+
+    @instrumented("app_state.flush", phase="io")
+    def flush(self):
+        """Write the state now if any key changed since the last write."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                encoded = {
+                    key: _encode(value) for key, value in self._state.items()
+                }
+                payload = json.dumps(self._state)
+                written = set(self._dirty)
+                self._dirty.clear()
+            try:
+                write_text_atomic(self.path, payload)
+            except OSError:
+                with self._lock:
+                    self._dirty.update(written)
+                    self._retry_delay = min(
+                        max(self._retry_delay * 2, RETRY_DELAY), MAX_RETRY_DELAY
+                    )
+                    if not self._closed:
+                        self._schedule(self._retry_delay)
+                raise
+            with self._lock:
+                for key, value in encoded.items():
+                    self._persisted[key] = value
+                # Keys changed while writing stay dirty
+                self._dirty = {
+                    key
+                    for key in self._dirty
+                    if _encode(self._state.get(key)) != self._persisted.get(key)
+                }
+                self._last_write = time.monotonic()
+                self._retry_delay = 0.0
+                self._counters["writes"] += 1
+                if self._dirty and not self._closed:
+                    self._schedule()
+
+    def close(self):
+        """Write pending changes and stop scheduling writes."""
+        with self._lock:
+            self._closed = True
+        self.flush()
+
+    def stats(self) -> dict:
+        """Return update and write counters."""
+        with self._lock:
+            counters = dict(self._counters)
+            counters["dirty_keys"] = len(self._dirty)
+        return counters
+
+    def _schedule(self, delay: Optional[float] = None):
+        # Caller holds the lock
+        if self._timer is not None:
+            return
+        if delay is None:
+            delay = max(0.0, self._last_write + self.interval - time.monotonic())
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except OSError as exc:
+            # flush() already re-armed the timer with a longer delay
+            log.warning(
+                "Could not write %s, retrying in %.0fs: %s",
+                self.path,
+                self._retry_delay,
+                exc,
+            )
+
+
+def _encode(value) -> str:
+    return json.dumps(value, sort_keys=True)
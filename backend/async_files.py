@@ -0,0 +1,119 @@
+"""Asyncio API for the vault.
+
+Coroutine versions of the ``files_manager`` operations for async Flet event
+handlers. Each call runs the blocking operation on the shared ``IOExecutor``
+and awaits it, so a slow disk only delays the handler that is waiting for
+it; the session's event loop (and, in web mode, every other session) keeps
+running.
+
+The executor's path rules apply: writes to overlapping paths run in the
+order they were awaited, and reads run in parallel, also with each other on
+the same note. ``read_markdown_files`` reads several notes at once, e.g. to
+prefetch the open tabs.
+
+Cancelling the awaiting task cancels the operation if it has not started
+yet. An operation that is already running finishes in the background (a
+half-done rename is worse than a late one), but the caller stops waiting
+right away.
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from backend import files_manager
+from backend.io_executor import _join, _parent, get_io_executor
+
+
+async def run(paths: Sequence[str], fn, *args, shared: bool = False, **kwargs):
+    """Run a blocking call on the I/O executor and await its result.
+
+    Args:
+        paths: Vault-relative paths the call reads or changes.
+        fn: The blocking function to run.
+        shared: The call only reads paths and may overlap other reads.
+    """
+    future = get_io_executor().submit(paths, fn, *args, shared=shared, **kwargs)
+    return await asyncio.wrap_future(future)
+
+
+async def list_folders() -> list:
+    return await run([""], files_manager.list_folders, shared=True)
+
+
+async def list_markdown_files(folder: str) -> List[str]:
+    return await run(
+        [folder], files_manager.list_markdown_files, folder, shared=True
+    )
+
+
+async def read_markdown_file(folder: str, filename: str) -> str:
+    return await run(
+        [_join(folder, filename)],
+        files_manager.read_markdown_file,
+        folder,
+        filename,
+        shared=True,
+    )
+
+
+async def read_markdown_files(
+    notes: Iterable[Tuple[str, str]],
+) -> Dict[Tuple[str, str], str]:
+    """Read several notes concurrently.
+
+    Notes that cannot be read are left out of the result instead of failing
+    the whole batch.
+    """
+    notes = list(notes)
+    texts = await asyncio.gather(
+        *(read_markdown_file(folder, filename) for folder, filename in notes),
+        return_exceptions=True,
+    )
+    return {
+        note: text
+        for note, text in zip(notes, texts)
+        if not isinstance(text, BaseException)
+    }
+
+
+async def save_markdown_file(folder: str, filename: str, content: str) -> bool:
+    return await run(
+        [_join(folder, filename)],
+        files_manager.save_markdown_file,
+        folder,
+        filename,
+        content,
+    )
+
+
+async def rename_markdown_file(
+    folder: str, old_filename: str, new_filename: str
+) -> None:
+    # Also rewrites the folder's .order.json
+    await run(
+        [folder],
+        files_manager.rename_markdown_file,
+        folder,
+        old_filename,
+        new_filename,
+    )
+
+
+async def rename_folder(old_folder_path: str, new_folder_name: str) -> None:
+    # The parent's .order.json changes too, so lock the whole parent
+    await run(
+        [_parent(old_folder_path)],
+        files_manager.rename_folder,
+        old_folder_path,
+        new_folder_name,
+    )
+
+
+async def reorder_files(folder: str, new_order: list) -> None:
+    await run([folder], files_manager.reorder_files, folder, new_order)
+
+
+async def reorder_items(parent_folder: str, new_order: list) -> None:
+    await run(
+        [parent_folder], files_manager.reorder_items, parent_folder, new_order
+    )
@@ -0,0 +1,290 @@
+"""Atomic, skip-if-unchanged file writes.
+
+Every note, ``.order.json`` and ``app_state.json`` write goes through
+``write_text_atomic``: the content is written to a temporary file next to
+the target and moved into place with ``os.replace``, so a crash never leaves
+a truncated file behind. A content hash of the last known state of each
+file is kept in memory, which lets no-op saves return without writing.
+
+Inside ``fsync_batch()`` the temporary files of several writes are fsynced
+together and renamed at the end of the block, so one autosave flush pays for
+one group of fsyncs instead of one round per note.
+
+A crash between writing a temporary file and moving it into place leaves the
+temporary file behind; ``remove_stale_tmp`` deletes those at startup.
+"""
+
+import hashlib
+import itertools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# path -> (digest, mtime_ns, size) of the content we last wrote or read
+_known: Dict[str, Tuple[bytes, int, int]] = {}
+_lock = threading.Lock()
+_local = threading.local()
+_tmp_ids = itertools.count()
+# ".<name>.<pid>.<n>.tmp", as created by write_text_atomic
+_TMP_NAME = re.compile(r"^\..+\.(\d+)\.\d+\.tmp$")
+# Temporary files younger than this may belong to a write still in progress
+STALE_TMP_SECONDS = 60.0
+_counters = {
+    "writes": 0,
+    "bytes_written": 0,
+    "skipped_writes": 0,
+    "fsyncs": 0,
+    "bytes_read": 0,
+}
+
+
+class _PendingWrite:
+    __slots__ = ("tmp_path", "path", "digest", "fd")
+
+    def __init__(self, tmp_path: str, path: str, digest: bytes, fd: int):
+        self.tmp_path = tmp_path
+        self.path = path
+        self.digest = digest
+        self.fd = fd
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _count(name: str, amount: int = 1):
+    with _lock:
+        _counters[name] += amount
+
+
+def _encode(text: str) -> bytes:
+    # Match what text mode would have written on this platform
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8")
+
+
+def _remember(path: str, digest: bytes, st: os.stat_result):
+    with _lock:
+        _known[path] = (digest, st.st_mtime_ns, st.st_size)
+
+
+def _fsync(fd: int):
+    getattr(os, "fdatasync", os.fsync)(fd)
+    _count("fsyncs")
+
+
+def _fsync_dir(directory: str):
+    # Persist the rename itself; not supported on every platform
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+        _count("fsyncs")
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def is_unchanged(path: str, data: Optional[bytes] = None) -> bool:
+    """Return True if the file on disk is still in the state we last saw.
+
+    Args:
+        path: File path.
+        data: If given, the bytes we are about to write; they must also match.
+    """
+    path = os.path.abspath(path)
+    with _lock:
+        known = _known.get(path)
+    if known is None:
+        return False
+    if data is not None and (len(data) != known[2] or _digest(data) != known[0]):
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_mtime_ns == known[1] and st.st_size == known[2]
+
+
+def read_text(path: str) -> str:
+    """Read a UTF-8 text file and remember its state for skip detection."""
+    path = os.path.abspath(path)
+    with open(path, "rb") as f:
+        data = f.read()
+        st = os.fstat(f.fileno())
+    _remember(path, _digest(data), st)
+    _count("bytes_read", len(data))
+    return data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def write_text_atomic(path: str, text: str, durable: bool = True) -> bool:
+    """Atomically replace path with text unless it already holds that text.
+
+    Args:
+        path: Target file path.
+        text: New content.
+        durable: fsync the data and the directory entry before returning
+            (deferred to the end of the block inside ``fsync_batch()``).
+
+    Returns:
+        True if bytes were written, False for a skipped no-op save.
+    """
+    path = os.path.abspath(path)
+    data = _encode(text)
+    digest = _digest(data)
+    if is_unchanged(path, data):
+        _count("skipped_writes")
+        return False
+
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(
+        directory, f".{name}.{os.getpid()}.{next(_tmp_ids)}.tmp"
+    )
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    except BaseException:
+        os.close(fd)
+        _discard(tmp_path)
+        raise
+    _count("writes")
+    _count("bytes_written", len(data))
+
+    batch: Optional[List[_PendingWrite]] = getattr(_local, "batch", None)
+    if batch is not None and durable:
+        batch.append(_PendingWrite(tmp_path, path, digest, fd))
+        return True
+
+    try:
+        if durable:
+            _fsync(fd)
+    finally:
+        os.close(fd)
+    _commit(tmp_path, path, digest)
+    if durable:
+        _fsync_dir(directory)
+    return True
+
+
+@contextmanager
+def fsync_batch():
+    """Group the fsyncs of every durable write made inside the block.
+
+    Data is written immediately; at the end of the block all temporary files
+    are fsynced back to back, moved into place, and each touched directory
+    is fsynced once. Nested blocks join the outermost one.
+    """
+    if getattr(_local, "batch", None) is not None:
+        yield
+        return
+    batch: List[_PendingWrite] = []
+    _local.batch = batch
+    try:
+        yield
+    finally:
+        _local.batch = None
+        _finish_batch(batch)
+
+
+def _finish_batch(batch: List[_PendingWrite]):
+    error = None
+    for pending in batch:
+        try:
+            _fsync(pending.fd)
+        except OSError as exc:
+            error = error or exc
+        finally:
+            os.close(pending.fd)
+    if error is not None:
+        # Never move a file into place that may not have reached the disk
+        for pending in batch:
+            _discard(pending.tmp_path)
+        raise error
+    directories = set()
+    committed = 0
+    try:
+        for pending in batch:
+            _commit(pending.tmp_path, pending.path, pending.digest)
+            committed += 1
+            directories.add(os.path.dirname(pending.path))
+    except BaseException:
+        # _commit removed its own file; do not leave the others behind
+        for pending in batch[committed + 1 :]:
+            _discard(pending.tmp_path)
+        raise
+    finally:
+        for directory in directories:
+            _fsync_dir(directory)
+
+
+def _commit(tmp_path: str, path: str, digest: bytes):
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+    _remember(path, digest, os.stat(path))
+
+
+def _discard(tmp_path: str):
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def remove_stale_tmp(directory: str, recursive: bool = True) -> int:
+    """Delete temporary files left behind by interrupted writes.
+
+    Only files named like ``write_text_atomic`` names them, not created by
+    this process and older than STALE_TMP_SECONDS are removed.
+
+    Args:
+        directory: Directory to clean.
+        recursive: Also clean every directory below it.
+
+    Returns:
+        The number of files removed.
+    """
+    removed = 0
+    cutoff = time.time() - STALE_TMP_SECONDS
+    pid = str(os.getpid())
+    for root, dirs, files in os.walk(directory):
+        if not recursive:
+            dirs.clear()
+        for name in files:
+            match = _TMP_NAME.match(name)
+            if match is None or match.group(1) == pid:
+                continue
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+    return removed
+
+
+def forget(path: str):
+    """Drop the remembered state of a file (or of every file below a folder)."""
+    path = os.path.abspath(path)
+    prefix = path + os.sep
+    with _lock:
+        for known in [p for p in _known if p == path or p.startswith(prefix)]:
+            del _known[known]
+
+
+def stats() -> dict:
+    """Return write counters (writes, bytes, skipped no-op saves, fsyncs)."""
+    with _lock:
+        return dict(_counters)
@@ -0,0 +1,214 @@
+"""Debounced write-behind autosave for open notes.
+
+The editor used to write the whole note to disk on every keystroke.
+``AutosaveEngine`` keeps the latest content of each dirty note in memory and
+writes it from a background thread once typing pauses (``idle_delay``) or a
+note has been dirty for too long (``max_delay``). ``flush()`` writes
+everything immediately and is used on tab switch, close, rename and exit.
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+
+from backend.atomic_write import fsync_batch
+from backend.files_manager import get_event_bus
+
+Key = Tuple[str, str]
+
+
+class _Pending:
+    __slots__ = ("content", "first_dirty", "last_dirty")
+
+    def __init__(self, content: str, now: float):
+        self.content = content
+        self.first_dirty = now
+        self.last_dirty = now
+
+
+class AutosaveEngine:
+    """Coalesces note saves per (folder, filename) and writes them later.
+
+    Attributes:
+        writer: Callable ``writer(folder, filename, content)`` doing the write.
+        idle_delay: Seconds without changes after which a note is written.
+        max_delay: Upper bound in seconds between first change and write.
+        lock: Callable ``lock(keys)`` returning a context manager held around
+            the writes of those notes.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[str, str, str], object],
+        idle_delay: float = 0.75,
+        max_delay: float = 5.0,
+        lock: Optional[Callable[[List[Key]], ContextManager]] = None,
+    ):
+        """Initialize the engine and start its background thread.
+
+        Args:
+            writer: Function used to persist a note.
+            idle_delay: Idle window before a dirty note is flushed.
+            max_delay: Maximum latency for a note that keeps changing.
+            lock: Per-note lock shared with other writers (the UI passes
+                ``io_executor.hold_notes``); no locking when omitted.
+        """
+        self.writer = writer
+        self.idle_delay = idle_delay
+        self.max_delay = max_delay
+        self.lock = lock or (lambda keys: nullcontext())
+        self._pending: Dict[Key, _Pending] = {}
+        self._cond = threading.Condition()
+        # Held while popping and writing so flushes never race each other
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._counters = {
+            "changes": 0,
+            "writes": 0,
+            "skipped_writes": 0,
+            "write_errors": 0,
+            "flushes": 0,
+        }
+        self._thread = threading.Thread(
+            target=self._run, name="autosave", daemon=True
+        )
+        self._thread.start()
+
+    def mark_dirty(self, folder: str, filename: str, content: str):
+        """Record the latest content of a note; the write happens later."""
+        now = time.monotonic()
+        with self._cond:
+            pending = self._pending.get((folder, filename))
+            if pending is None:
+                self._pending[(folder, filename)] = _Pending(content, now)
+            else:
+                pending.content = content
+                pending.last_dirty = now
+            self._counters["changes"] += 1
+            self._cond.notify()
+
+    def is_dirty(self, folder: str, filename: str) -> bool:
+        """Return True if the note has changes that are not written yet."""
+        with self._cond:
+            return (folder, filename) in self._pending
+
+    def flush(self, folder: Optional[str] = None, filename: Optional[str] = None):
+        """Write pending changes now.
+
+        Args:
+            folder: Only flush notes in this folder (and below), if given.
+            filename: Only flush this note, if given together with folder.
+        """
+        with self._write_lock:
+            with self._cond:
+                keys = [
+                    key
+                    for key in self._pending
+                    if _matches(key, folder, filename)
+                ]
+                batch = [(key, self._pending.pop(key)) for key in keys]
+                self._counters["flushes"] += 1
+            self._write(batch)
+
+    def discard(self, folder: str, filename: Optional[str] = None) -> int:
+        """Drop pending changes without writing them.
+
+        Used before a note or folder is deleted or renamed, so that a later
+        write can not bring the old path back.
+
+        Returns:
+            The number of notes whose changes were dropped.
+        """
+        with self._cond:
+            keys = [key for key in self._pending if _matches(key, folder, filename)]
+            for key in keys:
+                del self._pending[key]
+        return len(keys)
+
+    def close(self):
+        """Flush everything and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def stats(self) -> dict:
+        """Return counters, including how many writes coalescing avoided."""
+        with self._cond:
+            counters = dict(self._counters)
+            counters["pending"] = len(self._pending)
+        counters["writes_avoided"] = max(
+            0, counters["changes"] - counters["writes"] - counters["pending"]
+        )
+        return counters
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                timeout = self._next_due(time.monotonic())
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+                    continue
+            with self._write_lock:
+                with self._cond:
+                    now = time.monotonic()
+                    due = [
+                        key
+                        for key, pending in self._pending.items()
+                        if self._due_at(pending) <= now
+                    ]
+                    batch = [(key, self._pending.pop(key)) for key in due]
+                self._write(batch)
+
+    def _next_due(self, now: float) -> Optional[float]:
+        if not self._pending:
+            return None
+        return min(self._due_at(p) for p in self._pending.values()) - now
+
+    def _due_at(self, pending: _Pending) -> float:
+        return min(
+            pending.last_dirty + self.idle_delay, pending.first_dirty + self.max_delay
+        )
+
+    def _write(self, batch):
+        if not batch:
+            return
+        failed = []
+        skipped = 0
+        try:
+            # One group of fsyncs and one event batch for the whole flush,
+            # under the lock of every note in it until the files are in place
+            keys = [key for key, _ in batch]
+            with self.lock(keys), get_event_bus().batch(), fsync_batch():
+                for key, pending in batch:
+                    try:
+                        if self.writer(*key, pending.content) is False:
+                            skipped += 1
+                    except Exception:
+                        failed.append((key, pending))
+        except OSError:
+            # The grouped fsync failed, so nothing from this flush was committed
+            failed = batch
+            skipped = 0
+        with self._cond:
+            self._counters["writes"] += len(batch) - len(failed) - skipped
+            self._counters["skipped_writes"] += skipped
+            self._counters["write_errors"] += len(failed)
+            for key, pending in failed:
+                # Keep the content for a retry unless newer text arrived
+                if key not in self._pending:
+                    self._pending[key] = _Pending(pending.content, time.monotonic())
+            if failed:
+                self._cond.notify()
+
+
+def _matches(key: Key, folder: Optional[str], filename: Optional[str]) -> bool:
+    if folder is None:
+        return True
+    key_folder, key_filename = key
+    if filename is not None:
+        return key == (folder, filename)
+    return key_folder == folder or key_folder.startswith(folder + "/")
@@ -0,0 +1,533 @@
+"""Optional SQLite catalog of the vault.
+
+``Catalog`` mirrors the folder tree, the sidebar ordering, note timestamps
+and note text into one SQLite database (WAL mode, FTS5 for note bodies)
+stored next to ``app_state.json``, outside the vault, so that sync tools
+never pick up the database or its ``-wal``/``-shm`` files. Questions that otherwise need a directory walk plus
+a read of every note become one indexed query, e.g.::
+
+    catalog.find_notes(
+        under="Notebooks/Physics",
+        modified_since=time.time() - 7 * 86400,
+        text="entropy",
+    )
+
+The filesystem stays the source of truth. ``reconcile()`` brings the
+catalog in line with the disk, re-reading only notes whose mtime or size
+changed, and the catalog then follows the vault event bus. Event batches
+and full reconciles are queued for a thread of the catalog's own, so the
+bus never waits for the catalog. A reconcile works through the vault one
+folder (and at most RECONCILE_CHUNK notes) at a time, so queries are not
+locked out while it walks a large vault. Deleting the database file is
+always safe.
+
+The catalog is opt-in (the ``catalog_enabled`` app setting) and
+``get_catalog()`` returns None when the sqlite3 build lacks FTS5.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from backend import files_manager
+
+CATALOG_FILENAME = "catalog.sqlite3"
+# Where earlier versions kept the database, inside the vault
+_OLD_CATALOG_FILENAME = ".catalog.sqlite3"
+
+# Notes read and stored per transaction during a reconcile
+RECONCILE_CHUNK = 200
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    created INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS folders_by_parent ON folders (parent, position);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    position INTEGER NOT NULL DEFAULT 0,
+    created INTEGER NOT NULL DEFAULT 0,
+    mtime_ns INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (folder, filename)
+);
+CREATE INDEX IF NOT EXISTS notes_by_mtime ON notes (mtime_ns);
+CREATE VIRTUAL TABLE IF NOT EXISTS note_text USING fts5 (
+    body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+class CatalogNote(NamedTuple):
+    """A note row returned by catalog queries."""
+
+    folder: str
+    filename: str
+    created: int
+    mtime_ns: int
+    size: int
+
+
+def fts5_available() -> bool:
+    """Return True if the sqlite3 module was built with FTS5."""
+    try:
+        connection = sqlite3.connect(":memory:")
+        try:
+            connection.execute("CREATE VIRTUAL TABLE t USING fts5 (x)")
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+class Catalog:
+    """SQLite mirror of the vault's tree, ordering, timestamps and text.
+
+    Attributes:
+        path: Database file.
+        base_dir: Vault root the catalog mirrors.
+    """
+
+    def __init__(self, path: str, base_dir: Optional[str] = None):
+        """Open (or create) the database.
+
+        Args:
+            path: Database file.
+            base_dir: Vault root; defaults to ``files_manager.BASE_DIR``.
+
+        Raises:
+            sqlite3.Error: The database cannot be opened or lacks FTS5.
+        """
+        self.path = path
+        self.base_dir = base_dir or files_manager.BASE_DIR
+        # One connection shared by the UI and catalog threads, behind a lock
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        # Work for the catalog thread: event batches, or None for a reconcile
+        self._queue: "queue.Queue[Optional[list]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # Reconciliation
+
+    def reconcile(self, folder: str = "") -> int:
+        """Bring a folder subtree in line with the disk.
+
+        Only notes whose (mtime, size) changed are read. The lock is taken
+        per folder and per chunk of notes, never for the whole walk.
+
+        Args:
+            folder: Subtree to reconcile; "" is the whole vault.
+
+        Returns:
+            Number of notes that were (re)read.
+        """
+        folder = folder.strip("/")
+        read = 0
+        seen = set()
+        for path, entries in self._walk(folder):
+            seen.add(path)
+            read += self._reconcile_folder(path, entries)
+        with self._lock, self._db:
+            self._drop_missing_folders(folder, seen)
+        return read
+
+    def resync(self):
+        """Queue a reconcile of the whole vault (used when events were lost)."""
+        self._submit(None)
+
+    def apply_events(self, events):
+        """Queue a batch of ``VaultEvent``s for the catalog thread."""
+        self._submit(list(events))
+
+    def wait_applied(self):
+        """Block until every queued event batch and reconcile has run."""
+        self._queue.join()
+
+    def _submit(self, item: Optional[list]):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="catalog", daemon=True
+                )
+                self._worker.start()
+        self._queue.put(item)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    self.reconcile()
+                else:
+                    self._apply(item)
+            except Exception:
+                log.exception("Updating the catalog failed")
+                if item is not None:
+                    # The catalog may have missed changes; check the disk
+                    self._queue.put(None)
+            finally:
+                self._queue.task_done()
+
+    def _apply(self, events):
+        for event in events:
+            if event.kind in ("created", "saved"):
+                if event.is_dir:
+                    with self._lock, self._db:
+                        self._store_positions(event.folder)
+                    self.reconcile(event.path)
+                    continue
+                text = event.text
+                if text is None:
+                    text = self._read(event.folder, event.name)
+                with self._lock, self._db:
+                    self._store_note(event.folder, event.name, text)
+                    if event.kind == "created":
+                        self._store_positions(event.folder)
+                continue
+            with self._lock, self._db:
+                if event.kind == "deleted":
+                    if event.is_dir:
+                        self._delete_subtree(event.path)
+                    else:
+                        self._delete_note(event.folder, event.name)
+                    self._store_positions(event.folder)
+                elif event.kind == "renamed":
+                    if event.is_dir:
+                        self._move_subtree(event.path, event.new_path)
+                    else:
+                        self._move_note(event)
+                    self._store_positions(event.folder)
+                    if event.new_folder != event.folder:
+                        self._store_positions(event.new_folder or "")
+                elif event.kind == "reordered":
+                    self._store_positions(event.folder)
+
+    # Queries
+
+    def find_notes(
+        self,
+        under: Optional[str] = None,
+        modified_since: Optional[float] = None,
+        text: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[CatalogNote]:
+        """Return notes matching every given filter, in one query.
+
+        Args:
+            under: Only notes in this folder or below it.
+            modified_since: Only notes modified at or after this Unix time.
+            text: Only notes containing all of these words (best match first).
+            limit: Maximum number of notes.
+        """
+        sql = (
+            "SELECT n.folder, n.filename, n.created, n.mtime_ns, n.size"
+            " FROM notes n"
+        )
+        where = []
+        args: list = []
+        if text and text.split():
+            sql += " JOIN note_text t ON t.rowid = n.id"
+            where.append("note_text MATCH ?")
+            args.append(_match_expression(text))
+        if under is not None and under.strip("/"):
+            where.append(_SUBTREE_SQL.format(column="n.folder"))
+            args.extend(_subtree_args(under.strip("/")))
+        if modified_since is not None:
+            where.append("n.mtime_ns >= ?")
+            args.append(int(modified_since * 1_000_000_000))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if text and text.split():
+            sql += " ORDER BY bm25(note_text)"
+        else:
+            sql += " ORDER BY n.mtime_ns DESC"
+        sql += " LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return [CatalogNote(*row) for row in self._db.execute(sql, args)]
+
+    def children(self, folder: str = "") -> List[dict]:
+        """Return the ordered ``{"name", "type"}`` children of a folder."""
+        folder = folder.strip("/")
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, 'folder', position FROM folders WHERE parent = ?"
+                " UNION ALL"
+                " SELECT filename, 'file', position FROM notes WHERE folder = ?"
+                " ORDER BY 3",
+                (folder, folder),
+            ).fetchall()
+        return [{"name": name, "type": item_type} for name, item_type, _ in rows]
+
+    def stats(self) -> dict:
+        """Return row counts."""
+        with self._lock:
+            notes = self._db.execute("SELECT count(*) FROM notes").fetchone()[0]
+            folders = self._db.execute("SELECT count(*) FROM folders").fetchone()[0]
+        return {"notes": notes, "folders": folders}
+
+    # Internals (callers hold the lock and a transaction unless noted)
+
+    def _reconcile_folder(self, folder: str, entries) -> int:
+        # Takes the lock itself; notes are read outside of it
+        with self._lock:
+            known = {
+                row[0]: (row[1], row[2])
+                for row in self._db.execute(
+                    "SELECT filename, mtime_ns, size FROM notes WHERE folder = ?",
+                    (folder,),
+                )
+            }
+        names = set()
+        changed = []
+        for entry in entries:
+            if entry.type == "folder":
+                continue
+            names.add(entry.name)
+            if known.get(entry.name) != (entry.mtime_ns, entry.size):
+                changed.append(entry.name)
+        for start in range(0, len(changed), RECONCILE_CHUNK):
+            chunk = [
+                (name, self._read(folder, name))
+                for name in changed[start : start + RECONCILE_CHUNK]
+            ]
+            with self._lock, self._db:
+                for name, text in chunk:
+                    self._store_note(folder, name, text)
+        with self._lock, self._db:
+            for name in known.keys() - names:
+                self._delete_note(folder, name)
+            self._store_positions(folder, entries)
+        return len(changed)
+
+    def _drop_missing_folders(self, folder: str, seen: set):
+        # Rows of folders below folder that the walk no longer found
+        for (path,) in self._db.execute(
+            "SELECT DISTINCT folder FROM notes WHERE "
+            + _SUBTREE_SQL.format(column="folder"),
+            _subtree_args(folder),
+        ).fetchall():
+            if path not in seen:
+                self._db.execute(
+                    "DELETE FROM note_text"
+                    " WHERE rowid IN (SELECT id FROM notes WHERE folder = ?)",
+                    (path,),
+                )
+                self._db.execute("DELETE FROM notes WHERE folder = ?", (path,))
+        for (path,) in self._db.execute(
+            "SELECT path FROM folders WHERE "
+            + _SUBTREE_SQL.format(column="path"),
+            _subtree_args(folder),
+        ).fetchall():
+            if path not in seen:
+                self._db.execute("DELETE FROM folders WHERE path = ?", (path,))
+
+    def _walk(self, folder: str) -> Iterator[Tuple[str, list]]:
+        pending = [folder]
+        while pending:
+            path = pending.pop()
+            try:
+                entries = files_manager.snapshot_dir(self._abs(path))
+            except OSError:
+                continue
+            yield path, entries
+            pending.extend(
+                _join(path, entry.name) for entry in entries if entry.type == "folder"
+            )
+
+    def _store_positions(self, folder: str, entries=None):
+        # Mirror the folder's sidebar order (and, with entries, its folders)
+        try:
+            if entries is None:
+                entries = files_manager.snapshot_dir(self._abs(folder))
+            order = files_manager.resolve_order(self._abs(folder), entries)
+        except OSError:
+            return
+        created = {entry.name: entry.created for entry in entries}
+        for position, item in enumerate(order["items"]):
+            name = item["name"]
+            if item["type"] == "folder":
+                self._db.execute(
+                    "INSERT INTO folders (path, parent, name, position, created)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (path) DO UPDATE SET position = excluded.position",
+                    (_join(folder, name), folder, name, position, created.get(name, 0)),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE notes SET position = ? WHERE folder = ? AND filename = ?",
+                    (position, folder, name),
+                )
+
+    def _store_note(self, folder: str, filename: str, text: str):
+        try:
+            st = os.stat(self._abs(_join(folder, filename)))
+        except OSError:
+            return
+        created = int(getattr(st, "st_birthtime", st.st_ctime))
+        row = self._db.execute(
+            "SELECT id FROM notes WHERE folder = ? AND filename = ?",
+            (folder, filename),
+        ).fetchone()
+        if row is None:
+            note_id = self._db.execute(
+                "INSERT INTO notes (folder, filename, created, mtime_ns, size)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (folder, filename, created, st.st_mtime_ns, st.st_size),
+            ).lastrowid
+        else:
+            note_id = row[0]
+            self._db.execute(
+                "UPDATE notes SET mtime_ns = ?, size = ? WHERE id = ?",
+                (st.st_mtime_ns, st.st_size, note_id),
+            )
+            self._db.execute("DELETE FROM note_text WHERE rowid = ?", (note_id,))
+        self._db.execute(
+            "INSERT INTO note_text (rowid, body) VALUES (?, ?)", (note_id, text)
+        )
+
+    def _delete_note(self, folder: str, filename: str):
+        row = self._db.execute(
+            "SELECT id FROM notes WHERE folder = ? AND filename = ?",
+            (folder, filename),
+        ).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM note_text WHERE rowid = ?", row)
+            self._db.execute("DELETE FROM notes WHERE id = ?", row)
+
+    def _delete_subtree(self, path: str):
+        subtree = _SUBTREE_SQL.format(column="folder")
+        self._db.execute(
+            "DELETE FROM note_text"
+            f" WHERE rowid IN (SELECT id FROM notes WHERE {subtree})",
+            _subtree_args(path),
+        )
+        self._db.execute(f"DELETE FROM notes WHERE {subtree}", _subtree_args(path))
+        self._db.execute(
+            "DELETE FROM folders WHERE " + _SUBTREE_SQL.format(column="path"),
+            _subtree_args(path),
+        )
+
+    def _move_subtree(self, old: str, new: str):
+        args = (new, len(old) + 1) + _subtree_args(old)
+        self._db.execute(
+            "UPDATE notes SET folder = ? || substr(folder, ?) WHERE "
+            + _SUBTREE_SQL.format(column="folder"),
+            args,
+        )
+        self._db.execute(
+            "UPDATE folders SET path = ? || substr(path, ?) WHERE "
+            + _SUBTREE_SQL.format(column="path"),
+            args,
+        )
+        self._db.execute(
+            "UPDATE folders SET parent = ? || substr(parent, ?) WHERE "
+            + _SUBTREE_SQL.format(column="parent"),
+            args,
+        )
+        new_parent, _, new_name = new.rpartition("/")
+        self._db.execute(
+            "UPDATE folders SET parent = ?, name = ? WHERE path = ?",
+            (new_parent, new_name, new),
+        )
+
+    def _move_note(self, event):
+        self._db.execute(
+            "UPDATE notes SET folder = ?, filename = ?"
+            " WHERE folder = ? AND filename = ?",
+            (event.new_folder or "", event.new_name, event.folder, event.name),
+        )
+
+    def _read(self, folder: str, filename: str) -> str:
+        try:
+            return files_manager.read_markdown_file(folder, filename)
+        except (OSError, UnicodeDecodeError):
+            return ""
+
+    def _abs(self, path: str) -> str:
+        return os.path.join(self.base_dir, path) if path else self.base_dir
+
+
+# A folder and everything below it: an index range instead of a LIKE scan
+# ("0" sorts right after "/")
+_SUBTREE_SQL = "({column} = ? OR ({column} >= ? AND {column} < ?))"
+
+
+def _subtree_args(folder: str) -> Tuple[str, str, str]:
+    if not folder:
+        # The root contains every path
+        return "", "", "\U0010ffff"
+    return folder, folder + "/", folder + "0"
+
+
+def _match_expression(text: str) -> str:
+    # Every word must occur; quoting keeps FTS5 syntax characters literal
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+
+def _join(folder: str, name: str) -> str:
+    return f"{folder}/{name}" if folder else name
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(state_dir: Optional[str] = None) -> Optional[Catalog]:
+    """Return the process-wide catalog, or None if FTS5 is unavailable.
+
+    The first call opens the database in state_dir and subscribes it to the
+    vault event bus; call ``resync()`` once to queue a reconcile that picks
+    up changes made while the app was closed.
+
+    Args:
+        state_dir: Directory of the database; defaults to the directory of
+            ``app_state.json``. Only used by the first call.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            if not fts5_available():
+                return None
+            if state_dir is None:
+                from backend.app_state import STATE_FILE
+
+                state_dir = os.path.dirname(os.path.abspath(STATE_FILE))
+            _remove_old_catalog()
+            try:
+                _catalog = Catalog(os.path.join(state_dir, CATALOG_FILENAME))
+            except sqlite3.Error:
+                return None
+            files_manager.get_event_bus().subscribe(
+                _catalog.apply_events, _catalog.resync
+            )
+        return _catalog
+
+
+def _remove_old_catalog():
+    # The database used to live in the (possibly synced) vault
+    old = os.path.join(files_manager.BASE_DIR, _OLD_CATALOG_FILENAME)
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(old + suffix)
+        except OSError:
+            pass
@@ -0,0 +1,175 @@
+"""Parallel cold build of the search index.
+
+Without a usable saved index (first start, or a segment written in an older
+format) ``SearchIndex.ensure_built`` has to read and tokenize every note,
+which on a large vault is CPU bound. ``build_segment`` spreads that work
+over a ``ProcessPoolExecutor``: the vault is walked once with ``os.scandir``
+(the stat comes with each directory entry), the notes are handed to the
+workers in chunks, every worker returns a partial index for its chunk and
+the partials are merged into one ``search_store`` segment. The search index
+then maps that segment exactly like one saved by an earlier session.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from backend.search_store import Postings, SegmentNote, write_segment
+
+# Smaller vaults are indexed in-process; starting workers would cost more
+PARALLEL_MIN_NOTES = 2000
+# Notes per task sent to a worker
+CHUNK_SIZE = 256
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class NoteStat(NamedTuple):
+    """A note found by ``scan_notes``, with its stat at scan time."""
+
+    folder: str
+    filename: str
+    mtime_ns: int
+    size: int
+
+
+def scan_notes(base_dir: str) -> List[NoteStat]:
+    """Return every markdown note under base_dir, sorted by path.
+
+    Hidden files and folders are skipped and symlinked folders are not
+    followed, like ``search_index.walk_notes``.
+    """
+    notes = []
+    pending = [""]
+    while pending:
+        folder = pending.pop()
+        try:
+            with os.scandir(os.path.join(base_dir, folder)) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        pending.append(f"{folder}/{name}" if folder else name)
+                    continue
+                if not name.endswith(".md"):
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            notes.append(NoteStat(folder, name, st.st_mtime_ns, st.st_size))
+    notes.sort()
+    return notes
+
+
+def should_parallelize(note_count: int) -> bool:
+    """Return True if a cold build of note_count notes is worth a pool."""
+    return note_count >= PARALLEL_MIN_NOTES and (os.cpu_count() or 1) > 1
+
+
+def build_segment(
+    base_dir: str,
+    path: str,
+    notes: List[NoteStat],
+    progress: Optional[ProgressCallback] = None,
+    workers: Optional[int] = None,
+) -> bool:
+    """Index notes in worker processes and write the result to path.
+
+    Notes that cannot be read are left out; the caller's stat check picks
+    them up later.
+
+    Args:
+        base_dir: Vault root the note paths are relative to.
+        path: Segment file to write.
+        notes: Notes to index, usually from ``scan_notes``.
+        progress: Called with (notes done, total) after each chunk.
+        workers: Number of processes (defaults to the CPU count).
+
+    Returns:
+        True if the segment was written; False if the pool could not run
+        or the file could not be written, in which case nothing changed.
+    """
+    chunks = [notes[i : i + CHUNK_SIZE] for i in range(0, len(notes), CHUNK_SIZE)]
+    partials: List[Optional[Tuple[List[SegmentNote], Dict[str, Postings]]]]
+    partials = [None] * len(chunks)
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_index_chunk, base_dir, chunk): i
+                for i, chunk in enumerate(chunks)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                partials[i] = future.result()
+                done += len(chunks[i])
+                if progress is not None:
+                    progress(done, len(notes))
+    except (OSError, BrokenProcessPool):
+        return False
+    merged_notes, postings = merge_partials(partials)
+    try:
+        write_segment(
+            path, merged_notes, ((term, postings[term]) for term in sorted(postings))
+        )
+    except OSError:
+        return False
+    return True
+
+
+def merge_partials(partials) -> Tuple[List[SegmentNote], Dict[str, Postings]]:
+    """Merge per-chunk indexes into one, in chunk order.
+
+    Each chunk's doc ids are shifted past the notes of the chunks before it.
+    """
+    notes: List[SegmentNote] = []
+    postings: Dict[str, Postings] = {}
+    for chunk_notes, chunk_postings in partials:
+        base = len(notes)
+        notes.extend(chunk_notes)
+        for term, docs in chunk_postings.items():
+            merged = postings.get(term)
+            if merged is None:
+                merged = postings[term] = {}
+            for doc_id, positions in docs.items():
+                merged[base + doc_id] = positions
+    return notes, postings
+
+
+def _index_chunk(
+    base_dir: str, chunk: List[NoteStat]
+) -> Tuple[List[SegmentNote], Dict[str, Postings]]:
+    # Runs in a worker process: a partial index with chunk-local doc ids
+    from backend.atomic_write import read_text
+    from backend.search_index import _index_terms
+
+    notes: List[SegmentNote] = []
+    postings: Dict[str, Postings] = {}
+    for note in chunk:
+        try:
+            text = read_text(os.path.join(base_dir, note.folder, note.filename))
+        except (OSError, UnicodeDecodeError):
+            continue
+        doc_id = len(notes)
+        terms = _index_terms(text)
+        for position, term in enumerate(terms):
+            docs = postings.get(term)
+            if docs is None:
+                docs = postings[term] = {}
+            positions = docs.get(doc_id)
+            if positions is None:
+                positions = docs[doc_id] = []
+            positions.append(position)
+        notes.append(
+            SegmentNote(
+                note.folder, note.filename, note.mtime_ns, note.size, len(terms)
+            )
+        )
+    return notes, postings
@@ -1,9 +1,14 @@
 import os
-from typing import List
+from typing import List, NamedTuple
 
 import time
 import json
 
+from backend.atomic_write import forget, read_text, write_text_atomic
+from backend.instrumentation import instrumented
+from backend.vault_events import VaultEventBus
+from backend.vault_index import VaultIndex, merge_children
+
 BASE_DIR = os.path.join(os.path.dirname(__file__), "../notebooks")
 
 ORDER_FILENAME = ".order.json"
@@ -13,6 +18,23 @@ def _order_file_path(folder_path):
     return os.path.join(folder_path, ORDER_FILENAME)
 
 
+def _folder_path(folder):
+    # "" is the vault root; anything else is relative to BASE_DIR
+    return os.path.join(BASE_DIR, folder) if folder else BASE_DIR
+
+
+def _rel_folder(folder_path):
+    rel = os.path.relpath(folder_path, BASE_DIR)
+    return "" if rel == "." else rel.replace(os.sep, "/")
+
+
+def _split_folder(folder):
+    folder = folder.strip("/")
+    if "/" in folder:
+        return tuple(folder.rsplit("/", 1))
+    return "", folder
+
+
 def _load_order(folder_path):
     order_path = _order_file_path(folder_path)
     if os.path.exists(order_path):
@@ -26,99 +48,206 @@ def _load_order(folder_path):
 
 def _save_order(folder_path, order):
     order_path = _order_file_path(folder_path)
-    with open(order_path, "w", encoding="utf-8") as f:
-        json.dump(order, f, indent=2)
+    write_text_atomic(order_path, json.dumps(order, indent=2))
+    _vault_index.set_order(_rel_folder(folder_path), order)
 
 
-def _sync_order_with_fs(folder_path):
-    # Ensure .order.json matches actual files/folders
-    items = []
-    for name in os.listdir(folder_path):
-        if name.startswith(".") or name == ORDER_FILENAME:
-            continue
-        abs_path = os.path.join(folder_path, name)
-        if os.path.isdir(abs_path):
-            item_type = "folder"
-        elif name.endswith(".md"):
-            item_type = "file"
-        else:
-            continue
+class DirEntry(NamedTuple):
+    """A note or subfolder listed by ``snapshot_dir``."""
+
+    name: str
+    type: str  # "file" or "folder"
+    created: int
+    mtime_ns: int
+    size: int
+    nlink: int
+
+
+def snapshot_dir(path: str) -> List[DirEntry]:
+    """List the notes and subfolders of a directory in a single pass.
+
+    Uses ``os.scandir`` so the entry type comes from the directory listing
+    and each entry is stat'ed at most once. Hidden entries (including
+    ``.order.json``) and non-markdown files are skipped.
+
+    Args:
+        path: Absolute directory path.
+
+    Returns:
+        DirEntry tuples in directory order.
+
+    Raises:
+        OSError: If the directory cannot be listed.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            try:
+                if entry.is_dir():
+                    item_type = "folder"
+                elif name.endswith(".md") and entry.is_file():
+                    item_type = "file"
+                else:
+                    continue
+                st = entry.stat()
+            except OSError:
+                # Vanished or unreadable between the listing and the stat
+                continue
+            entries.append(
+                DirEntry(
+                    name,
+                    item_type,
+                    int(st.st_ctime),
+                    st.st_mtime_ns,
+                    st.st_size,
+                    st.st_nlink,
+                )
+            )
+    return entries
+
+
+def resolve_order(folder_path, entries=None):
+    """Compute the effective order of a folder in memory, without writing.
+
+    The persisted ``.order.json`` (if any) is merged with what is on disk the
+    same way the sidebar merges it: persisted entries keep their position,
+    entries missing from the order go on top, most recently created first.
+
+    Args:
+        folder_path: Absolute folder path.
+        entries: ``snapshot_dir`` result already taken by the caller, if any.
+
+    Returns:
+        An order dict (``{"items": [...]}``) covering exactly the entries on disk.
+    """
+    if entries is None:
         try:
-            created = int(os.path.getctime(abs_path))
-        except Exception:
-            created = int(time.time())
-        items.append({"name": name, "type": item_type, "created": created})
-    # Remove duplicates, keep only one per name
-    seen = set()
-    unique_items = []
-    for item in items:
-        if item["name"] not in seen:
-            unique_items.append(item)
-            seen.add(item["name"])
+            entries = snapshot_dir(folder_path)
+        except OSError:
+            entries = []
+    persisted = _load_order(folder_path)
+    known = {}
+    for item in persisted.get("items", []) or []:
+        if isinstance(item, dict) and item.get("name"):
+            known.setdefault(item["name"], item)
+    missing = [
+        {"name": entry.name, "type": entry.type, "created": entry.created}
+        for entry in entries
+        if entry.name not in known
+    ]
+    missing.sort(key=lambda x: -x["created"])
+    files = [entry.name for entry in entries if entry.type == "file"]
+    folders = [entry.name for entry in entries if entry.type == "folder"]
+    merged = merge_children({"items": missing + list(known.values())}, files, folders)
+    by_name = {item["name"]: item for item in missing}
+    items = []
+    for child in merged:
+        item = dict(known.get(child["name"]) or by_name.get(child["name"]) or child)
+        item["type"] = child["type"]
+        items.append(item)
+    return {"items": items}
+
+
+def _sync_order_with_fs(folder_path):
+    """Rewrite .order.json from the filesystem, most recently created first.
+
+    This is an explicit writer; reads go through ``resolve_order``.
+    """
+    items = [
+        {"name": entry.name, "type": entry.type, "created": entry.created}
+        for entry in snapshot_dir(folder_path)
+    ]
     # Sort by created desc
-    unique_items.sort(key=lambda x: -x["created"])
-    order = {"items": unique_items}
+    items.sort(key=lambda x: -x["created"])
+    order = {"items": items}
     _save_order(folder_path, order)
     return order
 
 
-def _ensure_order_file(folder_path):
-    order_path = _order_file_path(folder_path)
-    if not os.path.exists(order_path):
-        return _sync_order_with_fs(folder_path)
-    return _load_order(folder_path)
+def _scan_folder(folder):
+    # Loader for the vault index: one listing plus the folder's order
+    folder_path = _folder_path(folder)
+    try:
+        entries = snapshot_dir(folder_path)
+    except OSError:
+        return [], [], {"items": []}, {}
+    files = [entry.name for entry in entries if entry.type == "file"]
+    folders = [entry.name for entry in entries if entry.type == "folder"]
+    try:
+        order = resolve_order(folder_path, entries)
+    except Exception:
+        order = {"items": []}
+    # A directory's link count is 2 plus its subdirectories on most POSIX
+    # filesystems, so > 2 means "has children" without listing it. Other
+    # cases stay unknown until the folder is expanded.
+    hints = {
+        entry.name: True
+        for entry in entries
+        if entry.type == "folder" and entry.nlink > 2
+    }
+    return files, folders, order, hints
+
+
+_vault_index = VaultIndex(_scan_folder)
+_events = VaultEventBus()
+_events.subscribe(_vault_index.apply_events, _vault_index.invalidate)
+
+
+def get_vault_index() -> VaultIndex:
+    """Return the process-wide in-memory index of the vault tree."""
+    return _vault_index
+
+
+def get_event_bus() -> VaultEventBus:
+    """Return the bus every vault mutation is published on."""
+    return _events
 
 
 # Default folders (used for initial state/UI)
 DEFAULT_FOLDERS = ["Notebooks", "Resources", "Archive"]
 
 
+@instrumented("files_manager.list_folders", phase="io")
 def list_folders() -> list:
     """List all folders in BASE_DIR, ordered by .order.json (most recent first)."""
     if not os.path.exists(BASE_DIR):
         os.makedirs(BASE_DIR, exist_ok=True)
-    order = _ensure_order_file(BASE_DIR)
-    # Only folders
-    folders = [item["name"] for item in order["items"] if item["type"] == "folder"]
-    # Fallback: add any missing folders
-    fs_folders = [
-        f
-        for f in os.listdir(BASE_DIR)
-        if os.path.isdir(os.path.join(BASE_DIR, f)) and not f.startswith(".")
-    ]
-    for f in fs_folders:
-        if f not in folders:
-            folders.insert(0, f)
-    return folders
+    # Served from the in-memory index; missing folders are merged in at the top
+    return _vault_index.list_folders("")
 
 
+@instrumented("files_manager.create_folder", phase="io")
 def create_folder(folder: str) -> None:
     """Create a new top-level folder in BASE_DIR and update .order.json."""
     folder_path = os.path.join(BASE_DIR, folder)
     os.makedirs(folder_path, exist_ok=True)
-    order = _ensure_order_file(BASE_DIR)
+    order = resolve_order(BASE_DIR)
     now = int(time.time())
     # Remove if already exists (avoid duplicates)
     order["items"] = [i for i in order["items"] if i["name"] != folder]
     order["items"].insert(0, {"name": folder, "type": "folder", "created": now})
     _save_order(BASE_DIR, order)
-    # Create .order.json in new folder
-    _ensure_order_file(folder_path)
+    _events.publish("created", *_split_folder(folder), is_dir=True)
 
 
+@instrumented("files_manager.create_subfolder", phase="io")
 def create_subfolder(parent_folder: str, subfolder_name: str) -> None:
     """Create a subfolder inside parent_folder and update .order.json."""
     parent_path = os.path.join(BASE_DIR, parent_folder)
     folder_path = os.path.join(parent_path, subfolder_name)
     os.makedirs(folder_path, exist_ok=True)
-    order = _ensure_order_file(parent_path)
+    order = resolve_order(parent_path)
     now = int(time.time())
     order["items"] = [i for i in order["items"] if i["name"] != subfolder_name]
     order["items"].insert(0, {"name": subfolder_name, "type": "folder", "created": now})
     _save_order(parent_path, order)
-    _ensure_order_file(folder_path)
+    _events.publish("created", _rel_folder(parent_path), subfolder_name, is_dir=True)
 
 
+@instrumented("files_manager.create_file", phase="io")
 def create_file(folder: str, filename: str) -> None:
     """Create a new markdown file in the specified folder and update .order.json."""
     folder_path = os.path.join(BASE_DIR, folder)
@@ -127,9 +256,8 @@ def create_file(folder: str, filename: str) -> None:
     if not filename.endswith(".md"):
         file_path += ".md"
     if not os.path.exists(file_path):
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write("")
-        order = _ensure_order_file(folder_path)
+        write_text_atomic(file_path, "")
+        order = resolve_order(folder_path)
         now = int(time.time())
         order["items"] = [
             i for i in order["items"] if i["name"] != os.path.basename(file_path)
@@ -138,8 +266,12 @@ def create_file(folder: str, filename: str) -> None:
             0, {"name": os.path.basename(file_path), "type": "file", "created": now}
         )
         _save_order(folder_path, order)
+        _events.publish(
+            "created", _rel_folder(folder_path), os.path.basename(file_path), text=""
+        )
 
 
+@instrumented("files_manager.delete_folder", phase="io")
 def delete_folder(folder: str) -> None:
     """Delete a folder and all its contents from BASE_DIR and update .order.json."""
     import shutil
@@ -147,68 +279,88 @@ def delete_folder(folder: str) -> None:
     folder_path = os.path.join(BASE_DIR, folder)
     if os.path.exists(folder_path) and os.path.isdir(folder_path):
         shutil.rmtree(folder_path)
-        order = _ensure_order_file(BASE_DIR)
+        forget(folder_path)
+        order = resolve_order(BASE_DIR)
         order["items"] = [i for i in order["items"] if i["name"] != folder]
         _save_order(BASE_DIR, order)
+        _events.publish(
+            "deleted", *_split_folder(_rel_folder(folder_path)), is_dir=True
+        )
 
 
 FOLDERS = DEFAULT_FOLDERS  # For legacy compatibility; prefer list_folders() in UI
 
 
+@instrumented("files_manager.list_markdown_files", phase="io")
 def list_markdown_files(folder: str) -> List[str]:
-    folder_path = os.path.join(BASE_DIR, folder)
-    if not os.path.exists(folder_path):
-        return []
-    order = _ensure_order_file(folder_path)
-    files = [item["name"] for item in order["items"] if item["type"] == "file"]
-    # Fallback: add any missing files
-    fs_files = [f for f in os.listdir(folder_path) if f.endswith(".md")]
-    for f in fs_files:
-        if f not in files:
-            files.insert(0, f)
-    return files
+    # Served from the in-memory index; missing files are merged in at the top
+    return _vault_index.list_files(_rel_folder(os.path.join(BASE_DIR, folder)))
 
 
+@instrumented("files_manager.read_markdown_file", phase="io")
 def read_markdown_file(folder: str, filename: str) -> str:
     file_path = os.path.join(BASE_DIR, folder, filename)
     if not os.path.exists(file_path):
         return ""
-    with open(file_path, "r", encoding="utf-8") as f:
-        return f.read()
+    return read_text(file_path)
+
 
+@instrumented("files_manager.save_markdown_file", phase="io")
+def save_markdown_file(folder: str, filename: str, content: str) -> bool:
+    """Atomically save a note.
 
-def save_markdown_file(folder: str, filename: str, content: str) -> None:
+    Returns:
+        True if the note was written, False if it already held exactly this
+        content and the write was skipped.
+    """
     folder_path = os.path.join(BASE_DIR, folder)
     os.makedirs(folder_path, exist_ok=True)
     file_path = os.path.join(folder_path, filename)
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(content)
+    if not write_text_atomic(file_path, content):
+        return False
+    _events.publish("saved", folder, filename, text=content)
+    return True
 
 
+@instrumented("files_manager.delete_markdown_file", phase="io")
 def delete_markdown_file(folder: str, filename: str) -> None:
     file_path = os.path.join(BASE_DIR, folder, filename)
     if os.path.exists(file_path):
         os.remove(file_path)
-        order = _ensure_order_file(os.path.join(BASE_DIR, folder))
+        forget(file_path)
+        order = resolve_order(os.path.join(BASE_DIR, folder))
         order["items"] = [i for i in order["items"] if i["name"] != filename]
         _save_order(os.path.join(BASE_DIR, folder), order)
+        _events.publish("deleted", _rel_folder(os.path.dirname(file_path)), filename)
 
 
+@instrumented("files_manager.rename_markdown_file", phase="io")
 def rename_markdown_file(folder: str, old_filename: str, new_filename: str) -> None:
     folder_path = os.path.join(BASE_DIR, folder)
     old_path = os.path.join(folder_path, old_filename)
     new_path = os.path.join(folder_path, new_filename)
     if os.path.exists(old_path):
+        # Resolved before the rename so the note keeps its position
+        order = resolve_order(folder_path)
         os.rename(old_path, new_path)
+        forget(old_path)
         # Update .order.json
-        order = _ensure_order_file(folder_path)
         for item in order["items"]:
             if item["name"] == old_filename:
                 item["name"] = new_filename
                 break
         _save_order(folder_path, order)
+        rel_folder = _rel_folder(folder_path)
+        _events.publish(
+            "renamed",
+            rel_folder,
+            old_filename,
+            new_folder=rel_folder,
+            new_name=new_filename,
+        )
 
 
+@instrumented("files_manager.rename_folder", phase="io")
 def rename_folder(old_folder_path: str, new_folder_name: str) -> None:
     """Rename a folder (top-level or nested) and update .order.json in parent directory.
 
@@ -232,22 +384,34 @@ def rename_folder(old_folder_path: str, new_folder_name: str) -> None:
 
     # Rename the folder on filesystem
     if os.path.exists(old_full_path):
+        # Resolved before the rename so the folder keeps its position
+        parent_order = resolve_order(parent_full_path)
         os.rename(old_full_path, new_full_path)
+        forget(old_full_path)
 
         # Update .order.json in parent directory
-        parent_order = _ensure_order_file(parent_full_path)
         for item in parent_order["items"]:
             if item["name"] == old_folder_name:
                 item["name"] = new_folder_name
                 break
         _save_order(parent_full_path, parent_order)
+        rel_parent = _rel_folder(parent_full_path)
+        _events.publish(
+            "renamed",
+            rel_parent,
+            old_folder_name,
+            is_dir=True,
+            new_folder=rel_parent,
+            new_name=new_folder_name,
+        )
 
 
 # Manual reorder for files in a folder
+@instrumented("files_manager.reorder_files", phase="io")
 def reorder_files(folder: str, new_order: list) -> None:
     """Reorder files in the specified folder according to new_order (list of filenames)."""
     folder_path = os.path.join(BASE_DIR, folder)
-    order = _ensure_order_file(folder_path)
+    order = resolve_order(folder_path)
     # Only reorder files, keep folders in place
     files = [item for item in order["items"] if item["type"] == "file"]
     # Build new file order
@@ -264,8 +428,10 @@ def reorder_files(folder: str, new_order: list) -> None:
     new_items.extend(new_file_items)
     order["items"] = new_items
     _save_order(folder_path, order)
+    _events.publish("reordered", _rel_folder(folder_path))
 
 
+@instrumented("files_manager.reorder_items", phase="io")
 def reorder_items(parent_folder: str, new_order: list) -> None:
     """Reorder both files and folders in the specified parent folder.
 
@@ -278,7 +444,7 @@ def reorder_items(parent_folder: str, new_order: list) -> None:
     else:
         folder_path = os.path.join(BASE_DIR, parent_folder)
 
-    order = _ensure_order_file(folder_path)
+    order = resolve_order(folder_path)
 
     # Build a map of name to item
     name_to_item = {item["name"]: item for item in order["items"]}
@@ -296,3 +462,4 @@ def reorder_items(parent_folder: str, new_order: list) -> None:
 
     order["items"] = new_items
     _save_order(folder_path, order)
+    _events.publish("reordered", _rel_folder(folder_path))
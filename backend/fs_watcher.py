@@ -0,0 +1,507 @@
+"""Filesystem watcher for notes edited outside the app.
+
+``VaultWatcher`` follows changes below ``BASE_DIR`` with inotify on Linux
+and falls back to polling stored mtimes elsewhere (or when inotify is not
+available). Raw events are coalesced into batches so a mass checkout or sync
+produces one callback instead of one per file. ``apply_events`` publishes a
+batch on the vault event bus, which updates the indexes incrementally.
+
+``watch_vault`` runs one watcher per process, however many pages (web
+sessions) listen, so every external change reaches the indexes once.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from backend import files_manager
+from backend.atomic_write import is_unchanged
+
+log = logging.getLogger(__name__)
+
+
+class FsEvent(NamedTuple):
+    """A change below the vault root.
+
+    ``kind`` is one of "created", "modified", "deleted", "moved" or
+    "resync" (events were lost; caches should be rebuilt). Paths are relative
+    to the vault root and use ``/`` as separator.
+    """
+
+    kind: str
+    path: str
+    is_dir: bool
+    dest_path: Optional[str] = None
+
+
+def _is_relevant(name: str, is_dir: bool) -> bool:
+    if name == files_manager.ORDER_FILENAME:
+        return True
+    if name.startswith("."):
+        return False
+    return is_dir or name.endswith(".md")
+
+
+def _join(folder: str, name: str) -> str:
+    return f"{folder}/{name}" if folder else name
+
+
+# inotify constants from <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _InotifyBackend:
+    """Reads events from one inotify descriptor watching every folder."""
+
+    def __init__(self, base_dir: str):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.base_dir = base_dir
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths: Dict[int, str] = {}
+        self._wds: Dict[str, int] = {}
+        try:
+            self._watch_tree("")
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def _watch(self, folder: str):
+        path = os.path.join(self.base_dir, folder) if folder else self.base_dir
+        wd = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(path), ctypes.c_uint32(_WATCH_MASK)
+        )
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, f"inotify_add_watch failed for {path}")
+        self._paths[wd] = folder
+        self._wds[folder] = wd
+
+    def _watch_tree(self, folder: str):
+        self._watch(folder)
+        path = os.path.join(self.base_dir, folder) if folder else self.base_dir
+        try:
+            with os.scandir(path) as entries:
+                subfolders = [
+                    e.name
+                    for e in entries
+                    if not e.name.startswith(".") and e.is_dir(follow_symlinks=False)
+                ]
+        except OSError:
+            return
+        for name in subfolders:
+            self._watch_tree(_join(folder, name))
+
+    def _forget_tree(self, folder: str):
+        for path in [p for p in self._wds if p == folder or p.startswith(folder + "/")]:
+            self._paths.pop(self._wds.pop(path), None)
+
+    def _move_tree(self, old: str, new: str):
+        for path in [p for p in self._wds if p == old or p.startswith(old + "/")]:
+            wd = self._wds.pop(path)
+            moved = new + path[len(old) :]
+            self._wds[moved] = wd
+            self._paths[wd] = moved
+
+    def read(self, timeout: float) -> List[FsEvent]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+        return self._parse(data)
+
+    def _parse(self, data: bytes) -> List[FsEvent]:
+        events: List[FsEvent] = []
+        moved_from: Dict[int, Tuple[int, FsEvent]] = {}
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                events.append(FsEvent("resync", "", True))
+                continue
+            if mask & _IN_IGNORED:
+                folder = self._paths.pop(wd, None)
+                if folder is not None:
+                    self._wds.pop(folder, None)
+                continue
+            folder = self._paths.get(wd)
+            if folder is None or not name:
+                continue
+            is_dir = bool(mask & _IN_ISDIR)
+            if not _is_relevant(name, is_dir):
+                continue
+            path = _join(folder, name)
+
+            if mask & _IN_CREATE:
+                if is_dir:
+                    self._watch_tree(path)
+                events.append(FsEvent("created", path, is_dir))
+            elif mask & _IN_CLOSE_WRITE:
+                events.append(FsEvent("modified", path, False))
+            elif mask & _IN_DELETE:
+                if is_dir:
+                    self._forget_tree(path)
+                events.append(FsEvent("deleted", path, is_dir))
+            elif mask & _IN_MOVED_FROM:
+                moved_from[cookie] = (len(events), FsEvent("deleted", path, is_dir))
+                events.append(moved_from[cookie][1])
+            elif mask & _IN_MOVED_TO:
+                source = moved_from.pop(cookie, None)
+                if source is not None:
+                    # Pair both halves of a rename inside the vault
+                    idx, old_event = source
+                    events[idx] = FsEvent("moved", old_event.path, is_dir, path)
+                    if is_dir:
+                        self._move_tree(old_event.path, path)
+                else:
+                    if is_dir:
+                        self._watch_tree(path)
+                    events.append(FsEvent("created", path, is_dir))
+
+        # Folders moved out of the vault are gone for us
+        for _, event in moved_from.values():
+            if event.is_dir:
+                self._forget_tree(event.path)
+        return events
+
+
+class _PollingBackend:
+    """Detects changes by comparing stored mtimes and sizes between scans."""
+
+    def __init__(self, base_dir: str, interval: float):
+        self.base_dir = base_dir
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def close(self):
+        pass
+
+    def _scan(self) -> Dict[str, Tuple[bool, int, int]]:
+        snapshot: Dict[str, Tuple[bool, int, int]] = {}
+        pending = [""]
+        while pending:
+            folder = pending.pop()
+            path = os.path.join(self.base_dir, folder) if folder else self.base_dir
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if not _is_relevant(entry.name, is_dir):
+                            continue
+                        rel = _join(folder, entry.name)
+                        if is_dir:
+                            snapshot[rel] = (True, 0, 0)
+                            pending.append(rel)
+                            continue
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        snapshot[rel] = (False, st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue
+        return snapshot
+
+    def read(self, timeout: float) -> List[FsEvent]:
+        wait = self._next_scan - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            if time.monotonic() < self._next_scan:
+                return []
+        self._next_scan = time.monotonic() + self.interval
+        old, new = self._snapshot, self._scan()
+        self._snapshot = new
+        events = []
+        for path, state in new.items():
+            previous = old.get(path)
+            if previous is None:
+                events.append(FsEvent("created", path, state[0]))
+            elif previous != state and not state[0]:
+                events.append(FsEvent("modified", path, False))
+        for path, state in old.items():
+            if path not in new:
+                events.append(FsEvent("deleted", path, state[0]))
+        return events
+
+
+class VaultWatcher:
+    """Watches the vault and delivers coalesced batches of FsEvent.
+
+    Attributes:
+        base_dir: Vault root being watched.
+        on_events: Callback receiving a list of FsEvent per batch. It runs on
+            the watcher thread.
+        debounce: Quiet period (seconds) that ends a batch.
+        max_delay: Longest time (seconds) a batch may keep growing.
+        backend_name: "inotify" or "polling" once the watcher thread has
+            set up its backend.
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        on_events: Callable[[List[FsEvent]], None],
+        debounce: float = 0.3,
+        max_delay: float = 2.0,
+        poll_interval: float = 2.0,
+        use_inotify: bool = True,
+    ):
+        """Initialize the watcher without starting it.
+
+        Args:
+            base_dir: Vault root to watch.
+            on_events: Callback for each batch of events.
+            debounce: Quiet period that ends a batch.
+            max_delay: Upper bound on batch latency.
+            poll_interval: Scan interval of the polling fallback.
+            use_inotify: Set False to force the polling fallback.
+        """
+        self.base_dir = base_dir
+        self.on_events = on_events
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend_name: Optional[str] = None
+        self._backend = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start watching on a daemon thread.
+
+        Both backends walk the whole vault when they are set up, so that
+        happens on the watcher thread and not on the caller's.
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="vault-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching; the watcher thread releases the backend."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _create_backend(self):
+        if self.use_inotify:
+            try:
+                backend = _InotifyBackend(self.base_dir)
+            except (OSError, AttributeError):
+                pass
+            else:
+                self.backend_name = "inotify"
+                return backend
+        self.backend_name = "polling"
+        return _PollingBackend(self.base_dir, self.poll_interval)
+
+    def _run(self):
+        self._backend = self._create_backend()
+        try:
+            self._watch()
+        finally:
+            self._backend.close()
+
+    def _watch(self):
+        batch: List[FsEvent] = []
+        batch_started = 0.0
+        while not self._stop.is_set():
+            timeout = self.debounce if batch else 0.5
+            try:
+                events = self._backend.read(timeout)
+            except OSError:
+                events = [FsEvent("resync", "", True)]
+            now = time.monotonic()
+            if events:
+                if not batch:
+                    batch_started = now
+                batch.extend(events)
+                if now - batch_started < self.max_delay:
+                    continue
+            if batch:
+                delivered, batch = coalesce(batch), []
+                try:
+                    self.on_events(delivered)
+                except Exception:
+                    log.exception("Handling external vault changes failed")
+
+
+_watcher: Optional[VaultWatcher] = None
+_listeners: List[Callable[[List[FsEvent], bool], None]] = []
+_watcher_lock = threading.Lock()
+
+
+def watch_vault(
+    listener: Callable[[List[FsEvent], bool], None]
+) -> Callable[[], None]:
+    """Call listener after each batch of external changes to the vault.
+
+    The first listener starts the process-wide watcher. Each batch is
+    published on the event bus once (see ``apply_events``) and then passed
+    to every listener as ``listener(events, tree_changed)``, on the watcher
+    thread.
+
+    Returns:
+        A function that removes the listener; removing the last one stops
+        the watcher.
+    """
+    global _watcher
+    with _watcher_lock:
+        _listeners.append(listener)
+        if _watcher is None:
+            _watcher = VaultWatcher(files_manager.BASE_DIR, _on_watcher_events)
+            _watcher.start()
+
+    def unwatch():
+        global _watcher
+        with _watcher_lock:
+            if listener not in _listeners:
+                return
+            _listeners.remove(listener)
+            if _listeners or _watcher is None:
+                return
+            watcher, _watcher = _watcher, None
+        watcher.stop()
+
+    return unwatch
+
+
+def _on_watcher_events(events: List[FsEvent]):
+    tree_changed = apply_events(events)
+    with _watcher_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(events, tree_changed)
+        except Exception:
+            log.exception("Vault watcher listener failed")
+
+
+def coalesce(events: List[FsEvent]) -> List[FsEvent]:
+    """Drop repeated events for the same path, keeping the last one."""
+    if any(e.kind == "resync" for e in events):
+        return [FsEvent("resync", "", True)]
+    latest: Dict[Tuple[str, str], FsEvent] = {}
+    for event in events:
+        key = (event.kind, event.path)
+        latest.pop(key, None)
+        latest[key] = event
+    return list(latest.values())
+
+
+def _parent(path: str) -> Tuple[str, str]:
+    if "/" in path:
+        folder, name = path.rsplit("/", 1)
+        return folder, name
+    return "", path
+
+
+def apply_events(events: List[FsEvent]) -> bool:
+    """Publish a batch of external changes on the vault event bus.
+
+    The vault and search indexes pick the changes up as subscribers, in a
+    single batch.
+
+    Args:
+        events: Coalesced events from a VaultWatcher.
+
+    Returns:
+        True if the folder tree changed and the sidebar should be refreshed.
+    """
+    vault_index = files_manager.get_vault_index()
+    bus = files_manager.get_event_bus()
+    tree_changed = False
+    with bus.batch():
+        for event in events:
+            if event.kind == "resync":
+                bus.publish("resync")
+                return True
+
+            folder, name = _parent(event.path)
+            if (
+                event.kind in ("created", "modified")
+                and not event.is_dir
+                and is_unchanged(os.path.join(files_manager.BASE_DIR, event.path))
+            ):
+                # Our own atomic write, already published by files_manager
+                continue
+            if name == files_manager.ORDER_FILENAME:
+                vault_index.invalidate(folder)
+                tree_changed = True
+                continue
+
+            if event.kind == "modified":
+                bus.publish("saved", folder, name)
+                continue
+
+            tree_changed = True
+            if event.kind == "created":
+                bus.publish("created", folder, name, is_dir=event.is_dir)
+            elif event.kind == "deleted":
+                bus.publish("deleted", folder, name, is_dir=event.is_dir)
+            elif event.kind == "moved":
+                dest_folder, dest_name = _parent(event.dest_path)
+                bus.publish(
+                    "renamed",
+                    folder,
+                    name,
+                    is_dir=event.is_dir,
+                    new_folder=dest_folder,
+                    new_name=dest_name,
+                )
+    return tree_changed
@@ -0,0 +1,200 @@
+"""Call counters and latency histograms for hot paths.
+
+Functions decorated with ``instrumented(name)`` (the ``files_manager``
+operations, app state persistence and the main UI handlers) record, per
+name, the number of calls, a wall-time histogram and the bytes read and
+written through ``atomic_write`` while they ran. The numbers are shown by
+the debug panel (Ctrl+Shift+D) and can be dumped to JSON to diagnose slow
+user actions in the field.
+
+Recording is off by default; set ``STUDY_NOTEBOOK_INSTRUMENT=1`` or turn it
+on from the debug panel. While it is off a decorated call costs one global
+flag check (and, for calls given a ``phase``, a check for a running
+``slow_ops`` action). Times are inclusive (a handler's time contains the backend
+calls it made), and byte counts are taken from process-wide counters, so
+I/O done concurrently by other threads can be attributed to a call that
+overlaps it.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from backend import atomic_write, slow_ops
+
+ENV_VAR = "STUDY_NOTEBOOK_INSTRUMENT"
+
+# Upper bounds (ms) of the histogram buckets; a last bucket catches the rest
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_enabled = os.environ.get(ENV_VAR, "") not in ("", "0")
+_lock = threading.Lock()
+
+
+class _Metric:
+    __slots__ = (
+        "calls",
+        "errors",
+        "total_ms",
+        "max_ms",
+        "buckets",
+        "read",
+        "written",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.read = 0
+        self.written = 0
+
+    def record(self, elapsed_ms: float, read: int, written: int, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        self.buckets[_bucket(elapsed_ms)] += 1
+        self.read += read
+        self.written += written
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": _quantile(self.buckets, 0.5),
+            "p99_ms": _quantile(self.buckets, 0.99),
+            "max_ms": round(self.max_ms, 3),
+            "bytes_read": self.read,
+            "bytes_written": self.written,
+            "histogram": dict(zip(_bucket_labels(), self.buckets)),
+        }
+
+
+_metrics: Dict[str, _Metric] = {}
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True):
+    """Start (or stop) recording; recorded numbers are kept."""
+    global _enabled
+    _enabled = on
+
+
+def instrumented(name: str, phase: Optional[str] = None) -> Callable:
+    """Decorator recording every call of the function under name.
+
+    Args:
+        name: Name the calls are recorded under.
+        phase: ``slow_ops`` phase the call is charged to when it runs inside
+            a user action ("io" for file and app state calls).
+    """
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if phase is not None and slow_ops.current() is not None:
+                with slow_ops.phase(phase), timed(name):
+                    return fn(*args, **kwargs)
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with timed(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+@contextmanager
+def timed(name: str):
+    """Record the block under name (when recording is enabled)."""
+    if not _enabled:
+        yield
+        return
+    before = atomic_write.stats()
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        after = atomic_write.stats()
+        read = after["bytes_read"] - before["bytes_read"]
+        written = after["bytes_written"] - before["bytes_written"]
+        with _lock:
+            metric = _metrics.get(name)
+            if metric is None:
+                metric = _metrics[name] = _Metric()
+            metric.record(elapsed_ms, read, written, failed)
+
+
+def snapshot() -> Dict[str, dict]:
+    """Return the numbers recorded so far, keyed by name."""
+    with _lock:
+        return {
+            name: metric.as_dict() for name, metric in sorted(_metrics.items())
+        }
+
+
+def top(limit: int = 20, key: str = "total_ms") -> List[tuple]:
+    """Return ``(name, numbers)`` pairs with the largest key first."""
+    return sorted(snapshot().items(), key=lambda item: -item[1][key])[:limit]
+
+
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        _metrics.clear()
+
+
+def dump(path: str) -> str:
+    """Write the recorded numbers to path as JSON and return the path."""
+    payload = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "enabled": _enabled,
+        "bucket_bounds_ms": list(BUCKET_BOUNDS_MS),
+        "metrics": snapshot(),
+        "io": atomic_write.stats(),
+    }
+    atomic_write.write_text_atomic(path, json.dumps(payload, indent=2))
+    return path
+
+
+def _bucket(elapsed_ms: float) -> int:
+    for index, bound in enumerate(BUCKET_BOUNDS_MS):
+        if elapsed_ms <= bound:
+            return index
+    return len(BUCKET_BOUNDS_MS)
+
+
+def _bucket_labels() -> List[str]:
+    return [f"<={bound}ms" for bound in BUCKET_BOUNDS_MS] + [
+        f">{BUCKET_BOUNDS_MS[-1]}ms"
+    ]
+
+
+def _quantile(buckets: List[int], fraction: float) -> Optional[float]:
+    # Upper bound of the bucket holding the quantile (None: above the last)
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    seen = 0
+    for index, count in enumerate(buckets):
+        seen += count
+        if seen >= fraction * total:
+            break
+    return BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else None
@@ -0,0 +1,367 @@
+"""Background I/O worker pool.
+
+``files_manager`` is blocking, and Flet event handlers used to call it
+directly, so deleting or renaming a big folder froze the UI. ``IOExecutor``
+runs these calls on a small thread pool instead and returns
+``concurrent.futures.Future`` objects.
+
+Operations that touch overlapping paths (the same note, or a folder and
+anything inside it) run one after another in submission order; unrelated
+operations, and shared (read-only) operations on the same paths, run in
+parallel. Completion callbacks are handed to a dispatcher,
+which for the UI is ``page_dispatcher(page)``: it runs them on the page's
+event loop, where updating controls is safe.
+
+The module-level functions mirror the ``files_manager`` operations and
+submit them to the shared executor, e.g.
+``io_executor.delete_folder("Archive", on_done=..., on_error=...)``.
+Writes made on another thread (the autosave engine) take the same per-path
+lock with ``hold``/``hold_notes``, so they never interleave with a rename or
+delete of the folder they write into.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from backend import files_manager
+
+Dispatcher = Callable[..., Any]
+
+
+def _call_now(fn, *args):
+    fn(*args)
+
+
+def page_dispatcher(page) -> Dispatcher:
+    """Return a dispatcher that runs callbacks on the page's event loop.
+
+    Args:
+        page: The Flet page whose controls the callbacks update.
+    """
+
+    async def run(fn, args):
+        fn(*args)
+
+    def dispatch(fn, *args):
+        page.run_task(run, fn, args)
+
+    return dispatch
+
+
+def _overlaps(a: str, b: str) -> bool:
+    if a == b or not a or not b:
+        return True
+    return a.startswith(b + "/") or b.startswith(a + "/")
+
+
+class _Task:
+    __slots__ = (
+        "fn",
+        "args",
+        "kwargs",
+        "paths",
+        "future",
+        "on_done",
+        "on_error",
+        "dispatcher",
+        "shared",
+    )
+
+    def __init__(
+        self, fn, args, kwargs, paths, on_done, on_error, dispatcher, shared
+    ):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.paths = paths
+        self.shared = shared
+        self.future: Future = Future()
+        self.on_done = on_done
+        self.on_error = on_error
+        self.dispatcher = dispatcher
+
+    def conflicts(self, other: "_Task") -> bool:
+        if self.shared and other.shared:
+            return False
+        return any(_overlaps(a, b) for a in self.paths for b in other.paths)
+
+
+class IOExecutor:
+    """Thread pool that serializes operations on overlapping paths.
+
+    Attributes:
+        dispatcher: Callable ``dispatcher(fn, *args)`` used to deliver
+            completion callbacks when a call does not bring its own.
+    """
+
+    def __init__(
+        self, max_workers: int = 4, dispatcher: Optional[Dispatcher] = None
+    ):
+        """Initialize the pool.
+
+        Args:
+            max_workers: Number of worker threads.
+            dispatcher: Delivers completion callbacks; defaults to calling
+                them on the worker thread.
+        """
+        self.dispatcher = dispatcher or _call_now
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="io"
+        )
+        self._lock = threading.Lock()
+        self._queued: List[_Task] = []
+        self._running: List[_Task] = []
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    def submit(
+        self,
+        paths: Sequence[str],
+        fn: Callable,
+        *args,
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        dispatcher: Optional[Dispatcher] = None,
+        shared: bool = False,
+        **kwargs,
+    ) -> Future:
+        """Run fn(*args, **kwargs) in the background.
+
+        Args:
+            paths: Vault-relative paths the call reads or changes; calls with
+                overlapping paths never run concurrently. ``""`` is the whole
+                vault.
+            fn: The blocking function to run.
+            on_done: Called through the dispatcher with the result.
+            on_error: Called through the dispatcher with the exception.
+            dispatcher: Delivers this call's callbacks (e.g. the session's
+                ``page_dispatcher``); defaults to the executor's.
+            shared: The call only reads paths, so it may overlap other shared
+                calls on them (but never a writer).
+
+        Returns:
+            A Future resolved with the result of fn.
+        """
+        task = _Task(
+            fn,
+            args,
+            kwargs,
+            tuple(paths),
+            on_done,
+            on_error,
+            dispatcher or self.dispatcher,
+            shared,
+        )
+        with self._lock:
+            self._queued.append(task)
+            self._counters["submitted"] += 1
+            self._pump()
+        return task.future
+
+    @contextmanager
+    def hold(self, paths: Sequence[str], shared: bool = False):
+        """Run the block on the calling thread as if it were a task on paths.
+
+        The block waits for conflicting operations submitted before it, and
+        conflicting operations submitted while it runs wait for the block.
+        """
+        task = _Task(None, (), {}, tuple(paths), None, None, None, shared)
+        with self._lock:
+            self._queued.append(task)
+            self._pump()
+        # Resolved by _pump once no conflicting task is ahead of this one
+        task.future.result()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running.remove(task)
+                self._pump()
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work; optionally wait for queued operations."""
+        if wait:
+            while True:
+                with self._lock:
+                    pending = [t.future for t in self._queued + self._running]
+                if not pending:
+                    break
+                for future in pending:
+                    try:
+                        future.result()
+                    except BaseException:
+                        pass
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        """Return submitted/completed/failed/cancelled counters and queue sizes."""
+        with self._lock:
+            counters = dict(self._counters)
+            counters["queued"] = len(self._queued)
+            counters["running"] = len(self._running)
+        return counters
+
+    def _pump(self):
+        # Caller holds the lock. Start every queued task that conflicts with
+        # neither a running task nor an earlier queued one (FIFO per path).
+        waiting: List[_Task] = []
+        for task in self._queued:
+            if any(task.conflicts(other) for other in self._running + waiting):
+                waiting.append(task)
+                continue
+            self._running.append(task)
+            if task.fn is None:
+                # A hold(): its thread runs the block once it may start
+                task.future.set_result(None)
+            else:
+                self._pool.submit(self._run, task)
+        self._queued = waiting
+
+    def _run(self, task: _Task):
+        if not task.future.set_running_or_notify_cancel():
+            self._finish(task, "cancelled")
+            return
+        try:
+            result = task.fn(*task.args, **task.kwargs)
+        except BaseException as exc:
+            task.future.set_exception(exc)
+            self._finish(task, "failed")
+            if task.on_error is not None:
+                task.dispatcher(task.on_error, exc)
+            return
+        task.future.set_result(result)
+        self._finish(task, "completed")
+        if task.on_done is not None:
+            task.dispatcher(task.on_done, result)
+
+    def _finish(self, task: _Task, outcome: str):
+        with self._lock:
+            self._running.remove(task)
+            self._counters[outcome] += 1
+            self._pump()
+
+
+_executor: Optional[IOExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> IOExecutor:
+    """Return the process-wide I/O executor."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = IOExecutor()
+        return _executor
+
+
+def _join(folder: str, name: str) -> str:
+    folder = folder.strip("/")
+    return f"{folder}/{name}" if folder else name
+
+
+def _parent(folder: str) -> str:
+    return folder.strip("/").rpartition("/")[0]
+
+
+def hold_notes(notes: Iterable[Tuple[str, str]]):
+    """Hold the per-path lock of the (folder, filename) notes."""
+    return get_io_executor().hold(
+        [_join(folder, filename) for folder, filename in notes]
+    )
+
+
+# Non-blocking variants of the files_manager operations. Each takes the same
+# arguments plus optional on_done/on_error/dispatcher and returns a Future.
+
+
+def read_markdown_file(folder: str, filename: str, **callbacks) -> Future:
+    return get_io_executor().submit(
+        [_join(folder, filename)],
+        files_manager.read_markdown_file,
+        folder,
+        filename,
+        shared=True,
+        **callbacks,
+    )
+
+
+def save_markdown_file(
+    folder: str, filename: str, content: str, **callbacks
+) -> Future:
+    return get_io_executor().submit(
+        [_join(folder, filename)],
+        files_manager.save_markdown_file,
+        folder,
+        filename,
+        content,
+        **callbacks,
+    )
+
+
+def create_folder(folder: str, **callbacks) -> Future:
+    # Also rewrites the root .order.json
+    return get_io_executor().submit(
+        ["", folder], files_manager.create_folder, folder, **callbacks
+    )
+
+
+def create_subfolder(
+    parent_folder: str, subfolder_name: str, **callbacks
+) -> Future:
+    return get_io_executor().submit(
+        [parent_folder],
+        files_manager.create_subfolder,
+        parent_folder,
+        subfolder_name,
+        **callbacks,
+    )
+
+
+def create_file(folder: str, filename: str, **callbacks) -> Future:
+    return get_io_executor().submit(
+        [folder], files_manager.create_file, folder, filename, **callbacks
+    )
+
+
+def delete_markdown_file(folder: str, filename: str, **callbacks) -> Future:
+    return get_io_executor().submit(
+        [folder],
+        files_manager.delete_markdown_file,
+        folder,
+        filename,
+        **callbacks,
+    )
+
+
+def delete_folder(folder: str, **callbacks) -> Future:
+    # Also rewrites the root .order.json
+    return get_io_executor().submit(
+        ["", folder], files_manager.delete_folder, folder, **callbacks
+    )
+
+
+def rename_markdown_file(
+    folder: str, old_filename: str, new_filename: str, **callbacks
+) -> Future:
+    return get_io_executor().submit(
+        [folder],
+        files_manager.rename_markdown_file,
+        folder,
+        old_filename,
+        new_filename,
+        **callbacks,
+    )
+
+
+def rename_folder(
+    old_folder_path: str, new_folder_name: str, **callbacks
+) -> Future:
+    # The parent's .order.json changes too, so lock the whole parent
+    return get_io_executor().submit(
+        [_parent(old_folder_path)],
+        files_manager.rename_folder,
+        old_folder_path,
+        new_folder_name,
+        **callbacks,
+    )
@@ -0,0 +1,206 @@
+"""In-memory buffers for open notes.
+
+Switching tabs used to re-read the note from disk every time. The
+``NoteBufferCache`` keeps the text of recently used notes in memory, together
+with the mtime and size the text corresponds to, so re-selecting a tab only
+costs an ``os.stat``: the note is re-read only when it changed on disk.
+
+Buffers are kept under a memory budget and evicted least recently used
+first. A buffer with edits that are not on disk yet is never evicted: it is
+handed to ``schedule_write`` (the autosave engine) and evicted once
+``mark_saved`` reports it clean, so eviction neither loses text nor writes
+on the thread that called ``put``.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from backend import files_manager
+
+Key = Tuple[str, str]
+
+DEFAULT_BUDGET_BYTES = 32 * 1024 * 1024
+
+
+class _Buffer:
+    __slots__ = ("text", "dirty", "stat", "size", "scheduled")
+
+    def __init__(self, text: str, dirty: bool, stat: Optional[Tuple[int, int]]):
+        self.text = text
+        self.dirty = dirty
+        # (mtime_ns, size) of the file the text was loaded from or saved to
+        self.stat = stat
+        self.size = sys.getsizeof(text)
+        # Handed to schedule_write since it was last changed
+        self.scheduled = False
+
+
+class NoteBufferCache:
+    """LRU cache of note text keyed by (folder, filename).
+
+    Attributes:
+        budget_bytes: Memory budget for all buffers together.
+        schedule_write: Callable ``schedule_write(folder, filename, text)``
+            asking for a dirty buffer over the budget to be written soon.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int = DEFAULT_BUDGET_BYTES,
+        schedule_write: Optional[Callable[[str, str, str], object]] = None,
+    ):
+        """Initialize an empty cache.
+
+        Args:
+            budget_bytes: Memory budget for all buffers together.
+            schedule_write: Queues the write of a dirty buffer that is due
+                for eviction (the UI passes ``autosave.mark_dirty``). It is
+                called without the cache lock held and must not block.
+                Without it, dirty buffers stay until ``mark_saved``.
+        """
+        self.budget_bytes = budget_bytes
+        self.schedule_write = schedule_write
+        self._buffers: "OrderedDict[Key, _Buffer]" = OrderedDict()
+        self._used = 0
+        self._lock = threading.RLock()
+        self._counters = {"hits": 0, "misses": 0, "reloads": 0, "evictions": 0}
+
+    def get(self, folder: str, filename: str) -> str:
+        """Return the text of a note, from memory when it is still current.
+
+        Clean buffers are revalidated against the file's mtime and size and
+        re-read if the file changed. Dirty buffers always win over the disk.
+        """
+        key = (folder, filename)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is not None:
+                if buffer.dirty or buffer.stat == _stat(folder, filename):
+                    self._buffers.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return buffer.text
+                self._counters["reloads"] += 1
+            else:
+                self._counters["misses"] += 1
+        # Stat before reading: a change during the read shows up next time
+        stat = _stat(folder, filename)
+        text = files_manager.read_markdown_file(folder, filename)
+        with self._lock:
+            current = self._buffers.get(key)
+            if current is not None and current.dirty:
+                # Edited while we were reading
+                return current.text
+            due = self._store(key, _Buffer(text, False, stat))
+        self._schedule(due)
+        return text
+
+    def prefetch(self, notes: Iterable[Key]):
+        """Load notes that are not cached yet (e.g. the open tabs at startup)."""
+        for folder, filename in notes:
+            with self._lock:
+                if (folder, filename) in self._buffers:
+                    continue
+            try:
+                self.get(folder, filename)
+            except (OSError, UnicodeDecodeError):
+                continue
+
+    def put(self, folder: str, filename: str, text: str):
+        """Record edited text for a note; it stays dirty until saved."""
+        key = (folder, filename)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            stat = buffer.stat if buffer is not None else None
+            due = self._store(key, _Buffer(text, True, stat))
+        self._schedule(due)
+
+    def mark_saved(self, folder: str, filename: str, text: str):
+        """Record that text was written to disk for a note."""
+        key = (folder, filename)
+        stat = _stat(folder, filename)
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                return
+            buffer.stat = stat
+            if buffer.text == text:
+                buffer.dirty = False
+                # It may have been kept over the budget only while dirty
+                self._evict(keep=None)
+
+    def is_dirty(self, folder: str, filename: str) -> bool:
+        """Return True if the buffer holds edits that are not saved yet."""
+        with self._lock:
+            buffer = self._buffers.get((folder, filename))
+            return buffer is not None and buffer.dirty
+
+    def discard(self, folder: str, filename: Optional[str] = None):
+        """Drop the buffer of a note, or of every note in a folder subtree."""
+        with self._lock:
+            if filename is not None:
+                keys = [(folder, filename)]
+            else:
+                keys = [
+                    key
+                    for key in self._buffers
+                    if key[0] == folder or key[0].startswith(folder + "/")
+                ]
+            for key in keys:
+                buffer = self._buffers.pop(key, None)
+                if buffer is not None:
+                    self._used -= buffer.size
+
+    def stats(self) -> dict:
+        """Return hit/miss/reload/eviction counters and memory use."""
+        with self._lock:
+            counters = dict(self._counters)
+            counters["buffers"] = len(self._buffers)
+            counters["bytes"] = self._used
+        return counters
+
+    def _store(self, key: Key, buffer: _Buffer) -> List[Tuple[Key, str]]:
+        # Caller holds the lock; returns what _evict wants written
+        old = self._buffers.pop(key, None)
+        if old is not None:
+            self._used -= old.size
+        self._buffers[key] = buffer
+        self._used += buffer.size
+        return self._evict(keep=key)
+
+    def _evict(self, keep: Optional[Key]) -> List[Tuple[Key, str]]:
+        # Caller holds the lock. Drops clean buffers, least recently used
+        # first, until the cache fits the budget; dirty ones are skipped and
+        # returned (once per change) to be passed to schedule_write.
+        due = []
+        for key in list(self._buffers):
+            if self._used <= self.budget_bytes:
+                break
+            if key == keep:
+                continue
+            buffer = self._buffers[key]
+            if buffer.dirty:
+                if not buffer.scheduled:
+                    buffer.scheduled = True
+                    due.append((key, buffer.text))
+                continue
+            del self._buffers[key]
+            self._used -= buffer.size
+            self._counters["evictions"] += 1
+        return due
+
+    def _schedule(self, due: List[Tuple[Key, str]]):
+        if self.schedule_write is None:
+            return
+        for (folder, filename), text in due:
+            self.schedule_write(folder, filename, text)
+
+
+def _stat(folder: str, filename: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(os.path.join(files_manager.BASE_DIR, folder, filename))
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
@@ -0,0 +1,367 @@
+"""Fuzzy quick-open over every note in the vault.
+
+``QuickOpenIndex`` keeps the ``folder/filename`` path of every note in
+memory, case and accent folded, together with a bitmask of the characters
+each path contains. A query matches a note when its characters appear in the
+path in order (so "nbarch" finds "Notebooks/Archive.md").
+
+Results are ranked in tiers: file names starting with the query, then file
+names containing it, then any other fuzzy match; within a tier, word
+boundaries, consecutive runs and short paths score higher. The first tier
+comes straight from a sorted list of file names, so short queries that match
+thousands of notes never scan the vault. Otherwise every path whose
+character mask lacks a query character is dropped and the rest are checked
+with a compiled subsequence pattern; when the query only grew since the last
+keystroke, only the previous matches are checked. Lower tiers are scored
+only while the result list is not full, and a very broad query stops after
+``MAX_SCORED`` matches, taken shortest path first.
+
+The index is built once with a directory walk and then follows the vault
+event bus, so it never needs a rebuild.
+"""
+
+import bisect
+import heapq
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from backend import files_manager
+
+Key = Tuple[str, str]
+
+_BOUNDARY_CHARS = frozenset("/ _-.")
+_CONSECUTIVE_BONUS = 3.0
+_BOUNDARY_BONUS = 4.0
+_NAME_BONUS = 6.0
+_NAME_PREFIX_BONUS = 8.0
+_LENGTH_PENALTY = 0.02
+
+# Candidates scored per tier; broad queries only rank the shortest paths
+MAX_SCORED = 2000
+
+
+# Ranking tiers, best first
+TIER_NAME_PREFIX = 2
+TIER_NAME_SUBSTRING = 1
+TIER_FUZZY = 0
+
+
+class QuickOpenMatch(NamedTuple):
+    """A note matching a quick-open query."""
+
+    folder: str
+    filename: str
+    score: float
+    tier: int = TIER_FUZZY
+
+
+def fold(text: str) -> str:
+    """Lowercase text and strip accents, keeping its length unchanged."""
+    if text.isascii():
+        return text.lower()
+    folded = []
+    for char in text:
+        # Some characters lowercase to two ("İ"); keep the first
+        char = char.lower()[:1]
+        base = unicodedata.normalize("NFKD", char)[:1]
+        folded.append(base if base.isascii() and base else char)
+    return "".join(folded)
+
+
+def _mask(text: str) -> int:
+    mask = 0
+    for char in set(text):
+        mask |= 1 << (ord(char) & 63)
+    return mask
+
+
+class QuickOpenIndex:
+    """In-memory fuzzy matcher over note paths."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._lock = threading.RLock()
+        # Slots indexed by note id; removed notes leave a None key behind
+        self._keys: List[Optional[Key]] = []
+        self._paths: List[str] = []
+        self._masks: List[int] = []
+        self._name_starts: List[int] = []
+        self._ids: Dict[Key, int] = {}
+        self._free: List[int] = []
+        # Sorted (folded file name, id) pairs, for file name prefix lookups
+        self._names: List[Tuple[str, int]] = []
+        self._built = False
+        # (query, matching ids) of the last full scan, for narrowing
+        self._last: Optional[Tuple[str, List[int]]] = None
+        # Live ids ordered by path length, rebuilt after changes
+        self._by_length: Optional[List[int]] = None
+
+    def ensure_built(self, base_dir: Optional[str] = None):
+        """Index every note in the vault unless that already happened."""
+        from backend.search_index import walk_notes
+
+        with self._lock:
+            if self._built:
+                return
+            for folder, filename in walk_notes(base_dir or files_manager.BASE_DIR):
+                self._add((folder, filename), sort=False)
+            self._names.sort()
+            self._built = True
+
+    def invalidate(self):
+        """Forget everything; the next query walks the vault again."""
+        with self._lock:
+            self._keys.clear()
+            self._paths.clear()
+            self._masks.clear()
+            self._name_starts.clear()
+            self._ids.clear()
+            self._free.clear()
+            self._names.clear()
+            self._built = False
+            self._last = None
+            self._by_length = None
+
+    def apply_events(self, events):
+        """Update the index from a batch of ``VaultEvent``s."""
+        from backend.search_index import walk_notes
+
+        with self._lock:
+            if not self._built:
+                return
+            for event in events:
+                if event.kind == "created":
+                    if not event.is_dir:
+                        self._add((event.folder, event.name))
+                        continue
+                    base = os.path.join(files_manager.BASE_DIR, event.path)
+                    for sub, filename in walk_notes(base):
+                        self._add((_join(event.path, sub), filename))
+                elif event.kind == "deleted":
+                    if event.is_dir:
+                        self._remove_folder(event.path)
+                    else:
+                        self._remove((event.folder, event.name))
+                elif event.kind == "renamed":
+                    if event.is_dir:
+                        self._move_folder(event.path, event.new_path)
+                    else:
+                        self._remove((event.folder, event.name))
+                        self._add((event.new_folder or "", event.new_name))
+
+    def search(self, query: str, limit: int = 50) -> List[QuickOpenMatch]:
+        """Return the notes whose path fuzzy-matches query, best first.
+
+        Whitespace in the query is ignored, so "arch tod" matches
+        "Archive/todo.md".
+        """
+        needle = "".join(fold(query).split())
+        self.ensure_built()
+        with self._lock:
+            if not needle:
+                keys = heapq.nsmallest(
+                    limit, (k for k in self._keys if k is not None)
+                )
+                return [QuickOpenMatch(folder, name, 0.0) for folder, name in keys]
+            ranked = self._rank_tier(needle, self._name_prefixed(needle), limit)
+            if len(ranked) < limit:
+                prefixed = {i for _, _, i in ranked}
+                paths = self._paths
+                starts = self._name_starts
+                matched = []
+                in_name = []
+                fuzzy = []
+                for i in self._candidates(needle):
+                    matched.append(i)
+                    if i in prefixed:
+                        continue
+                    if paths[i].find(needle, starts[i]) >= 0:
+                        in_name.append(i)
+                    else:
+                        fuzzy.append(i)
+                    if len(in_name) + len(fuzzy) >= MAX_SCORED:
+                        # Broad query: the shortest paths are enough
+                        break
+                else:
+                    self._last = (needle, matched)
+                ranked += self._rank_tier(needle, in_name, limit - len(ranked))
+                ranked += self._rank_tier(needle, fuzzy, limit - len(ranked))
+            return [
+                QuickOpenMatch(*self._keys[i], score, tier)
+                for tier, score, i in ranked
+            ]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _name_prefixed(self, needle: str) -> List[int]:
+        names = self._names
+        index = bisect.bisect_left(names, (needle,))
+        ids = []
+        end = min(len(names), index + MAX_SCORED)
+        while index < end and names[index][0].startswith(needle):
+            ids.append(names[index][1])
+            index += 1
+        return ids
+
+    def _rank_tier(self, needle: str, ids: List[int], limit: int):
+        if limit <= 0 or not ids:
+            return []
+        paths = self._paths
+        starts = self._name_starts
+        best = heapq.nlargest(
+            limit, ((_score(needle, paths[i], starts[i]), i) for i in ids)
+        )
+        tier = _tier(needle, paths[best[0][1]], starts[best[0][1]])
+        return [(tier, score, i) for score, i in best]
+
+    def _candidates(self, needle: str) -> Iterator[int]:
+        # Matching ids, shortest path first
+        if self._last is not None and needle.startswith(self._last[0]):
+            # The query grew: only earlier matches can still match
+            ids = self._last[1]
+        else:
+            if self._by_length is None:
+                self._by_length = sorted(
+                    self._ids.values(), key=lambda i: len(self._paths[i])
+                )
+            ids = self._by_length
+        wanted = _mask(needle)
+        search = _subsequence_pattern(needle).search
+        masks = self._masks
+        paths = self._paths
+        return (
+            i
+            for i in ids
+            if masks[i] & wanted == wanted and search(paths[i]) is not None
+        )
+
+    def _add(self, key: Key, sort: bool = True):
+        if key in self._ids:
+            return
+        folder, filename = key
+        path = fold(_join(folder, filename))
+        name_start = len(path) - len(filename)
+        if self._free:
+            note_id = self._free.pop()
+            self._keys[note_id] = key
+            self._paths[note_id] = path
+            self._masks[note_id] = _mask(path)
+            self._name_starts[note_id] = name_start
+        else:
+            note_id = len(self._keys)
+            self._keys.append(key)
+            self._paths.append(path)
+            self._masks.append(_mask(path))
+            self._name_starts.append(name_start)
+        self._ids[key] = note_id
+        if sort:
+            bisect.insort(self._names, (path[name_start:], note_id))
+        else:
+            self._names.append((path[name_start:], note_id))
+        self._last = None
+        self._by_length = None
+
+    def _remove(self, key: Key):
+        note_id = self._ids.pop(key, None)
+        if note_id is None:
+            return
+        entry = (self._paths[note_id][self._name_starts[note_id] :], note_id)
+        index = bisect.bisect_left(self._names, entry)
+        if index < len(self._names) and self._names[index] == entry:
+            del self._names[index]
+        self._keys[note_id] = None
+        self._paths[note_id] = ""
+        self._masks[note_id] = 0
+        self._free.append(note_id)
+        self._last = None
+        self._by_length = None
+
+    def _remove_folder(self, folder: str):
+        for key in [k for k in self._ids if _is_within(k[0], folder)]:
+            self._remove(key)
+
+    def _move_folder(self, old: str, new: str):
+        for key in [k for k in self._ids if _is_within(k[0], old)]:
+            self._remove(key)
+            self._add((new + key[0][len(old) :], key[1]))
+
+
+def _subsequence_pattern(needle: str):
+    # "abc" -> a[^b]*b[^c]*c: each step jumps straight to the next needed
+    # character, so a failing path is rejected without backtracking
+    parts = [re.escape(needle[0])]
+    for char in needle[1:]:
+        escaped = re.escape(char)
+        parts.append(f"[^{escaped}]*{escaped}")
+    return re.compile("".join(parts))
+
+
+def _tier(needle: str, path: str, name_start: int) -> int:
+    if path.startswith(needle, name_start):
+        return TIER_NAME_PREFIX
+    if path.find(needle, name_start) >= 0:
+        return TIER_NAME_SUBSTRING
+    return TIER_FUZZY
+
+
+def _score(needle: str, path: str, name_start: int) -> float:
+    # Prefer a match inside the file name, then anywhere in the path
+    positions = _match(needle, path, name_start)
+    score = 0.0
+    if positions is not None:
+        score += _NAME_BONUS
+        if path.startswith(needle, name_start):
+            score += _NAME_PREFIX_BONUS
+    else:
+        positions = _match(needle, path, 0)
+    previous = -2
+    for position in positions:
+        if position == previous + 1:
+            score += _CONSECUTIVE_BONUS
+        if position == 0 or path[position - 1] in _BOUNDARY_CHARS:
+            score += _BOUNDARY_BONUS
+        previous = position
+    return score - _LENGTH_PENALTY * len(path)
+
+
+def _match(needle: str, path: str, start: int) -> Optional[List[int]]:
+    # A contiguous hit beats the greedy leftmost subsequence
+    found = path.find(needle, start)
+    if found >= 0:
+        return list(range(found, found + len(needle)))
+    positions = []
+    position = start - 1
+    for char in needle:
+        position = path.find(char, position + 1)
+        if position < 0:
+            return None
+        positions.append(position)
+    return positions
+
+
+def _join(folder: str, name: str) -> str:
+    return f"{folder}/{name}" if folder and name else folder or name
+
+
+def _is_within(folder: str, parent: str) -> bool:
+    return folder == parent or folder.startswith(parent + "/")
+
+
+_quick_open: Optional[QuickOpenIndex] = None
+_quick_open_lock = threading.Lock()
+
+
+def get_quick_open_index() -> QuickOpenIndex:
+    """Return the process-wide quick-open index (built on first query)."""
+    global _quick_open
+    with _quick_open_lock:
+        if _quick_open is None:
+            _quick_open = QuickOpenIndex()
+            files_manager.get_event_bus().subscribe(
+                _quick_open.apply_events, _quick_open.invalidate
+            )
+        return _quick_open
@@ -0,0 +1,856 @@
+"""Full-text search over the notes in the vault.
+
+``SearchIndex`` is an in-memory inverted index: every normalized term maps
+to the notes containing it together with the term positions inside each
+note. Queries are answered from the postings alone; note text is only read
+back for the handful of results that need a snippet.
+
+The index is saved under the vault as a ``search_store`` segment and mapped
+back in on the next start. Notes are checked against the (mtime, size) they
+were indexed at, and only the ones that changed while the app was closed
+are read again. Changes made since the segment was opened are held in memory
+on top of it until the next ``save()``. Vault events are applied on a thread
+of the index's own, so the event bus never waits for a note to be read.
+
+``SearchIndex.stream`` answers search-as-you-type: ranking runs off the event
+loop and results are yielded best first as soon as their snippet is read,
+until the query's ``CancellationToken`` is cancelled by the next keystroke.
+
+A cold build of a large vault (no saved segment yet) runs in worker
+processes through ``cold_index``. Until it finishes, queries fall back to
+scanning the notes on disk, which is slower and returns the first matches
+found rather than the best ones.
+"""
+
+import asyncio
+import bisect
+import heapq
+import math
+import os
+import queue
+import re
+import threading
+import unicodedata
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from backend import files_manager
+from backend.search_store import SegmentNote, open_segment, write_segment
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Limits that keep per-keystroke queries cheap on large vaults
+MAX_PREFIX_EXPANSIONS = 64
+SNIPPET_RADIUS = 60
+
+# Rewrite the saved index right after startup only when at least this share
+# of the notes had to be re-read; smaller overlays are saved at exit
+RESAVE_FRACTION = 0.1
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+Key = Tuple[str, str]
+
+INDEX_FILENAME = ".search_index"
+
+
+class SearchResult(NamedTuple):
+    """A single ranked search hit."""
+
+    folder: str
+    filename: str
+    score: float
+    snippet: str
+
+
+class CancellationToken:
+    """Flag shared by a query and whoever may abandon it.
+
+    Thread-safe; once cancelled a token stays cancelled.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+
+def normalize_term(word: str) -> str:
+    """Lowercase a word and strip accents so "Ação" matches "acao"."""
+    if word.isascii():
+        return word.lower()
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def iter_tokens(text: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield ``(term, start, end)`` for every word in text."""
+    for match in _TOKEN_RE.finditer(text):
+        yield normalize_term(match.group()), match.start(), match.end()
+
+
+def tokenize(text: str) -> List[str]:
+    """Return the normalized terms of text in order."""
+    return [term for term, _, _ in iter_tokens(text)]
+
+
+def _index_terms(text: str) -> List[str]:
+    # Fast path: lowercasing ASCII text never changes word boundaries
+    if text.isascii():
+        return _TOKEN_RE.findall(text.lower())
+    return tokenize(text)
+
+
+def _norm_folder(folder: str) -> str:
+    return (folder or "").strip("/")
+
+
+class SearchIndex:
+    """Inverted index with per-note term positions.
+
+    Attributes:
+        reader: Callable ``reader(folder, filename)`` returning note text,
+            used while building and for snippets.
+    """
+
+    def __init__(self, reader: Callable[[str, str], str]):
+        """Initialize an empty index.
+
+        Args:
+            reader: Function used to read a note's text.
+        """
+        self.reader = reader
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, List[int]]] = {}
+        self._terms_sorted: List[str] = []
+        self._doc_ids: Dict[Key, int] = {}
+        self._docs: Dict[int, Key] = {}
+        self._doc_terms: Dict[int, Set[str]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+        self._next_id = 0
+        # (mtime_ns, size) of each note when it was indexed
+        self._doc_stat: Dict[int, Optional[Tuple[int, int]]] = {}
+        # Saved segment; its notes have doc ids below _base_count
+        self._segment = None
+        self._base_count = 0
+        self._base_deleted: Set[int] = set()
+        self._path: Optional[str] = None
+        self._dirty = False
+        self._built = False
+        self._building = False
+        # Bumped by invalidate(); a build only counts if it did not change
+        self._generation = 0
+        # Notes updated through the hooks while a build is reading the disk
+        self._touched: Set[Key] = set()
+        # Set while worker processes build the segment; queries scan instead
+        self._cold_building = False
+        self._base_dir: Optional[str] = None
+        # Called with (notes indexed, total) during a cold build
+        self.on_progress: Optional[Callable[[int, int], None]] = None
+        # Event batches waiting for the thread that reads and applies them
+        self._events: "queue.Queue[list]" = queue.Queue()
+        self._applier: Optional[threading.Thread] = None
+
+    # Building
+
+    def is_built(self) -> bool:
+        """Return True once the initial build has completed."""
+        return self._built
+
+    def ensure_built(self, base_dir: Optional[str] = None):
+        """Build the index unless that already happened.
+
+        The segment saved by the last session is reused; only notes whose
+        mtime or size changed since then are read from disk.
+        """
+        base_dir = base_dir or files_manager.BASE_DIR
+        with self._lock:
+            if self._built or self._building:
+                return
+            self._building = True
+            generation = self._generation
+            self._touched.clear()
+            self._load(os.path.join(base_dir, INDEX_FILENAME))
+            reused = self._segment is not None
+        reindexed = 0
+        try:
+            if not reused:
+                reused = self._build_cold(base_dir)
+            seen = set()
+            for folder, filename in walk_notes(base_dir):
+                key = (folder, filename)
+                seen.add(key)
+                # Stat before reading: a change during the read shows up next time
+                stat = _stat(base_dir, folder, filename)
+                with self._lock:
+                    doc_id = self._doc_ids.get(key)
+                    if doc_id is not None and self._doc_stat.get(doc_id) == stat:
+                        continue
+                try:
+                    text = self.reader(folder, filename)
+                except OSError:
+                    continue
+                with self._lock:
+                    if key not in self._touched:
+                        self._index(folder, filename, text, stat)
+                        reindexed += 1
+            with self._lock:
+                # Notes deleted while the app was closed
+                for key in list(self._doc_ids):
+                    if key not in seen and key not in self._touched:
+                        self._remove(key)
+        finally:
+            with self._lock:
+                self._building = False
+                # Invalidated while building: leave it to the next query
+                self._built = self._generation == generation
+                self._touched.clear()
+        if not reused or reindexed > RESAVE_FRACTION * len(self):
+            self.save()
+
+    def _build_cold(self, base_dir: str) -> bool:
+        # Index every note in worker processes into a fresh segment and map
+        # it; the stat pass in ensure_built then catches up with any change
+        # made meanwhile. Returns False when the vault is too small for a
+        # pool or the pool failed, leaving the build to the serial path.
+        from backend import cold_index
+
+        notes = cold_index.scan_notes(base_dir)
+        if not cold_index.should_parallelize(len(notes)):
+            return False
+        with self._lock:
+            self._base_dir = base_dir
+            self._cold_building = True
+        try:
+            built = cold_index.build_segment(
+                base_dir, self._path, notes, progress=self._report_progress
+            )
+            with self._lock:
+                if built:
+                    # Events applied during the build were dropped with the
+                    # old state; the stat pass re-reads those notes
+                    self._load(self._path)
+                    self._touched.clear()
+        finally:
+            with self._lock:
+                self._cold_building = False
+            self._report_progress(len(notes), len(notes))
+        return built
+
+    def _report_progress(self, done: int, total: int):
+        if self.on_progress is not None:
+            try:
+                self.on_progress(done, total)
+            except Exception:
+                pass
+
+    def save(self) -> bool:
+        """Write the index under the vault so the next start can reuse it.
+
+        Returns:
+            True if a new segment was written.
+        """
+        with self._lock:
+            if not self._built or self._building or not self._dirty:
+                return False
+            if self._path is None:
+                return False
+            live = sorted(self._docs)
+            new_ids = {old: new for new, old in enumerate(live)}
+            notes = []
+            for doc_id in live:
+                folder, filename = self._docs[doc_id]
+                mtime_ns, size = self._doc_stat.get(doc_id) or (0, 0)
+                notes.append(
+                    SegmentNote(
+                        folder, filename, mtime_ns, size, self._doc_len.get(doc_id, 0)
+                    )
+                )
+            terms = self._terms_sorted
+            if self._segment is not None:
+                terms = _merge_sorted(self._segment.iter_terms(), terms)
+            postings = (
+                (
+                    term,
+                    {
+                        new_ids[doc_id]: positions
+                        for doc_id, positions in self._term_postings(term).items()
+                    },
+                )
+                for term in terms
+            )
+            try:
+                write_segment(
+                    self._path, notes, postings, release=self._release_segment
+                )
+            except OSError:
+                if self._segment is None:
+                    # Released but not replaced: map the old file again
+                    self._segment = open_segment(self._path)
+                return False
+            # Serve from the new segment and drop the in-memory overlay
+            self._load(self._path)
+            return True
+
+    def resync(self):
+        """Drop everything and rebuild from disk (used when events were lost)."""
+        self.invalidate()
+        self.ensure_built()
+
+    def invalidate(self):
+        """Drop everything; the next query rebuilds the index from disk."""
+        with self._lock:
+            self._reset()
+            self._built = False
+            self._generation += 1
+
+    def apply_events(self, events):
+        """Queue a batch of ``VaultEvent``s for the index.
+
+        Applying an event may read the note, so batches are applied in order
+        on a thread of their own rather than on the thread publishing them.
+        """
+        with self._lock:
+            if self._applier is None:
+                self._applier = threading.Thread(
+                    target=self._run_events, name="search-index", daemon=True
+                )
+                self._applier.start()
+        self._events.put(list(events))
+
+    def wait_applied(self):
+        """Block until every queued event batch has been applied."""
+        self._events.join()
+
+    def _run_events(self):
+        while True:
+            events = self._events.get()
+            try:
+                for event in events:
+                    self._apply_event(event)
+            except Exception:
+                # The index no longer matches the disk; rebuild on next query
+                self.invalidate()
+            finally:
+                self._events.task_done()
+
+    def _apply_event(self, event):
+        if event.kind in ("created", "saved"):
+            if event.is_dir:
+                self.index_folder(event.path)
+            elif event.text is not None:
+                self.index_note(event.folder, event.name, event.text)
+            else:
+                self._reindex(event.folder, event.name)
+        elif event.kind == "deleted":
+            if event.is_dir:
+                self.remove_folder(event.path)
+            else:
+                self.remove_note(event.folder, event.name)
+        elif event.kind == "renamed":
+            if event.is_dir:
+                self.rename_folder(event.path, event.new_path)
+            elif event.new_folder == event.folder:
+                self.rename_note(event.folder, event.name, event.new_name)
+            else:
+                self.remove_note(event.folder, event.name)
+                self._reindex(event.new_folder, event.new_name)
+
+    def _reindex(self, folder: str, filename: str):
+        # The note may be gone again by the time it is read
+        try:
+            text = self.reader(folder, filename)
+        except (OSError, UnicodeDecodeError):
+            self.remove_note(folder, filename)
+            return
+        self.index_note(folder, filename, text)
+
+    # Maintenance hooks (applied from vault events after the disk changed)
+
+    def index_note(self, folder: str, filename: str, text: str):
+        """Add or replace a note."""
+        folder = _norm_folder(folder)
+        stat = _stat(files_manager.BASE_DIR, folder, filename)
+        with self._lock:
+            self._mark_touched((folder, filename))
+            self._index(folder, filename, text, stat)
+
+    def index_folder(self, folder: str):
+        """Index every note below folder (e.g. a folder moved into the vault)."""
+        folder = _norm_folder(folder)
+        base = os.path.join(files_manager.BASE_DIR, folder)
+        for sub, filename in walk_notes(base):
+            self._reindex(_join_folder(folder, sub), filename)
+
+    def remove_note(self, folder: str, filename: str):
+        """Remove a note from the index."""
+        with self._lock:
+            key = (_norm_folder(folder), filename)
+            self._mark_touched(key)
+            self._remove(key)
+
+    def rename_note(self, folder: str, old_filename: str, new_filename: str):
+        """Move a note's postings to a new file name."""
+        folder = _norm_folder(folder)
+        with self._lock:
+            self._mark_touched((folder, old_filename))
+            self._mark_touched((folder, new_filename))
+            self._rekey({(folder, old_filename): (folder, new_filename)})
+
+    def rename_folder(self, old_folder: str, new_folder: str):
+        """Move every note below old_folder to new_folder."""
+        old_folder, new_folder = _norm_folder(old_folder), _norm_folder(new_folder)
+        with self._lock:
+            moves = {}
+            for folder, filename in self._doc_ids:
+                if _is_within(folder, old_folder):
+                    moved = new_folder + folder[len(old_folder) :]
+                    moves[(folder, filename)] = (moved, filename)
+            for old_key, new_key in moves.items():
+                self._mark_touched(old_key)
+                self._mark_touched(new_key)
+            self._rekey(moves)
+
+    def remove_folder(self, folder: str):
+        """Remove every note below folder."""
+        folder = _norm_folder(folder)
+        with self._lock:
+            for key in [k for k in self._doc_ids if _is_within(k[0], folder)]:
+                self._mark_touched(key)
+                self._remove(key)
+
+    # Queries
+
+    def search(self, query: str, limit: int = 20) -> List[SearchResult]:
+        """Return the best matching notes for query.
+
+        Every query word must match. The last word also matches as a prefix
+        unless the query ends with whitespace, so results update while the
+        user is still typing.
+
+        Args:
+            query: Free text typed by the user.
+            limit: Maximum number of results.
+
+        Returns:
+            Results sorted by descending score, each with a text snippet.
+        """
+        return [
+            SearchResult(folder, filename, score, self._snippet(folder, filename, first))
+            for folder, filename, score, first in self._hits(query, limit)
+        ]
+
+    async def stream(
+        self,
+        query: str,
+        limit: int = 20,
+        token: Optional[CancellationToken] = None,
+    ) -> AsyncIterator[SearchResult]:
+        """Yield the best matching notes for query, best first.
+
+        Ranking (and the first build, if needed) runs in a worker thread.
+        Each result is yielded as soon as its snippet has been read, so the
+        caller can show the top hits before the rest are ready. Nothing more
+        is yielded once token is cancelled.
+
+        Args:
+            query: Free text typed by the user.
+            limit: Maximum number of results.
+            token: Cancelled when the caller no longer wants the results.
+        """
+        from backend import async_files
+
+        token = token or CancellationToken()
+        loop = asyncio.get_running_loop()
+        hits = await loop.run_in_executor(None, self._hits, query, limit, token)
+        for folder, filename, score, first in hits:
+            if token.cancelled:
+                return
+            try:
+                text = await async_files.run(
+                    [_join_folder(folder, filename)],
+                    self.reader,
+                    folder,
+                    filename,
+                    shared=True,
+                )
+            except OSError:
+                text = ""
+            if token.cancelled:
+                return
+            yield SearchResult(folder, filename, score, _snippet_text(text, first))
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    # Internals
+
+    def _hits(
+        self,
+        query: str,
+        limit: int,
+        token: Optional[CancellationToken] = None,
+    ) -> List[Tuple[str, str, float, int]]:
+        # (folder, filename, score, first matched position), best first
+        terms = tokenize(query)
+        if not terms:
+            return []
+        prefix_last = not query[-1:].isspace()
+        self.ensure_built()
+        if self._cold_building:
+            return self._scan(terms, prefix_last, limit, token)
+        with self._lock:
+            ranked = self._rank(terms, prefix_last, limit, token)
+            return [
+                (*self._docs[doc_id], score, first) for doc_id, score, first in ranked
+            ]
+
+    def _scan(
+        self,
+        terms: List[str],
+        prefix_last: bool,
+        limit: int,
+        token: Optional[CancellationToken] = None,
+    ) -> List[Tuple[str, str, float, int]]:
+        # Index-free fallback: read notes until limit of them match every
+        # term, scored by how often the terms occur
+        hits = []
+        base_dir = self._base_dir or files_manager.BASE_DIR
+        for folder, filename in walk_notes(base_dir):
+            if token is not None and token.cancelled:
+                return []
+            try:
+                text = self.reader(folder, filename)
+            except OSError:
+                continue
+            tokens = _index_terms(text)
+            score = 0.0
+            first = None
+            for i, term in enumerate(terms):
+                if prefix_last and i == len(terms) - 1:
+                    found = [p for p, t in enumerate(tokens) if t.startswith(term)]
+                else:
+                    found = [p for p, t in enumerate(tokens) if t == term]
+                if not found:
+                    break
+                score += len(found)
+                if first is None:
+                    first = found[0]
+            else:
+                hits.append((folder, filename, score, first))
+                if len(hits) >= limit:
+                    break
+        hits.sort(key=lambda h: (-h[2], h[0], h[1]))
+        return hits
+
+    def _mark_touched(self, key: Key):
+        if self._building:
+            self._touched.add(key)
+
+    def _reset(self):
+        self._postings.clear()
+        self._terms_sorted.clear()
+        self._doc_ids.clear()
+        self._docs.clear()
+        self._doc_terms.clear()
+        self._doc_len.clear()
+        self._doc_stat.clear()
+        self._total_len = 0
+        self._next_id = 0
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        self._base_count = 0
+        self._base_deleted.clear()
+        self._dirty = False
+
+    def _release_segment(self):
+        # Caller holds the lock; write_segment is about to replace the file
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def _load(self, path: str):
+        # Start over from the segment saved at path, if there is a valid one
+        self._reset()
+        self._path = path
+        segment = open_segment(path)
+        if segment is None:
+            return
+        self._segment = segment
+        for doc_id, note in enumerate(segment.notes):
+            key = (note.folder, note.filename)
+            self._doc_ids[key] = doc_id
+            self._docs[doc_id] = key
+            self._doc_len[doc_id] = note.length
+            self._doc_stat[doc_id] = (note.mtime_ns, note.size)
+            self._total_len += note.length
+        self._base_count = self._next_id = len(segment.notes)
+
+    def _term_postings(self, term: str) -> Dict[int, List[int]]:
+        # Saved postings minus replaced notes, plus the in-memory overlay
+        memory = self._postings.get(term)
+        if self._segment is None:
+            return memory or {}
+        saved = self._segment.postings(term)
+        if not saved:
+            return memory or {}
+        merged = {
+            doc_id: positions
+            for doc_id, positions in saved.items()
+            if doc_id not in self._base_deleted
+        }
+        if memory:
+            merged.update(memory)
+        return merged
+
+    def _index(
+        self,
+        folder: str,
+        filename: str,
+        text: str,
+        stat: Optional[Tuple[int, int]] = None,
+    ):
+        key = (folder, filename)
+        self._remove(key)
+        self._dirty = True
+        doc_id = self._next_id
+        self._next_id += 1
+        self._doc_ids[key] = doc_id
+        self._docs[doc_id] = key
+        self._doc_stat[doc_id] = stat
+        positions: Dict[str, List[int]] = {}
+        terms = _index_terms(text)
+        count = len(terms)
+        for position, term in enumerate(terms):
+            positions.setdefault(term, []).append(position)
+        for term, term_positions in positions.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._insert_term(term)
+            postings[doc_id] = term_positions
+        self._doc_terms[doc_id] = set(positions)
+        self._doc_len[doc_id] = count
+        self._total_len += count
+
+    def _remove(self, key: Key):
+        doc_id = self._doc_ids.pop(key, None)
+        if doc_id is None:
+            return
+        self._dirty = True
+        del self._docs[doc_id]
+        self._doc_stat.pop(doc_id, None)
+        if doc_id < self._base_count:
+            # Saved notes can't be edited in place; hide their postings
+            self._base_deleted.add(doc_id)
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._delete_term(term)
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+
+    def _rekey(self, moves: Dict[Key, Key]):
+        for old_key, new_key in moves.items():
+            doc_id = self._doc_ids.pop(old_key, None)
+            if doc_id is None:
+                continue
+            self._remove(new_key)
+            self._doc_ids[new_key] = doc_id
+            self._docs[doc_id] = new_key
+            self._dirty = True
+
+    def _insert_term(self, term: str):
+        bisect.insort(self._terms_sorted, term)
+
+    def _delete_term(self, term: str):
+        idx = bisect.bisect_left(self._terms_sorted, term)
+        if idx < len(self._terms_sorted) and self._terms_sorted[idx] == term:
+            del self._terms_sorted[idx]
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            if term in self._postings:
+                return [term]
+            if self._segment is not None and self._segment.has(term):
+                return [term]
+            return []
+        expanded = []
+        idx = bisect.bisect_left(self._terms_sorted, term)
+        while idx < len(self._terms_sorted) and len(expanded) < MAX_PREFIX_EXPANSIONS:
+            candidate = self._terms_sorted[idx]
+            if not candidate.startswith(term):
+                break
+            expanded.append(candidate)
+            idx += 1
+        if self._segment is not None:
+            saved = self._segment.prefixed(term, MAX_PREFIX_EXPANSIONS)
+            expanded = list(_merge_sorted(saved, expanded))[:MAX_PREFIX_EXPANSIONS]
+        return expanded
+
+    def _rank(
+        self,
+        terms: List[str],
+        prefix_last: bool,
+        limit: int,
+        token: Optional[CancellationToken] = None,
+    ):
+        # Per query word: doc_id -> merged positions over its expanded terms
+        per_word: List[Dict[int, List[int]]] = []
+        for i, term in enumerate(terms):
+            expanded = self._expand(term, prefix_last and i == len(terms) - 1)
+            if not expanded:
+                return []
+            if len(expanded) == 1:
+                per_word.append(self._term_postings(expanded[0]))
+                continue
+            merged: Dict[int, List[int]] = {}
+            for candidate in expanded:
+                for doc_id, positions in self._term_postings(candidate).items():
+                    merged.setdefault(doc_id, []).extend(positions)
+            per_word.append(merged)
+
+        # Intersect starting from the rarest word
+        by_size = sorted(per_word, key=len)
+        candidates = set(by_size[0])
+        for postings in by_size[1:]:
+            candidates.intersection_update(postings)
+            if not candidates:
+                return []
+
+        total_docs = len(self._doc_ids) or 1
+        avg_len = (self._total_len / total_docs) or 1.0
+        idfs = [
+            math.log(1 + (total_docs - len(p) + 0.5) / (len(p) + 0.5)) for p in per_word
+        ]
+        ranked = []
+        for count, doc_id in enumerate(candidates):
+            if token is not None and count % 1024 == 0 and token.cancelled:
+                return []
+            doc_len = self._doc_len.get(doc_id, 0)
+            norm = _K1 * (1 - _B + _B * doc_len / avg_len)
+            score = 0.0
+            for idf, postings in zip(idfs, per_word):
+                tf = len(postings[doc_id])
+                score += idf * tf * (_K1 + 1) / (tf + norm)
+            score += _proximity_bonus(per_word, doc_id)
+            score += _title_bonus(terms, self._docs[doc_id][1])
+            first = min(per_word[0][doc_id])
+            ranked.append((doc_id, score, first))
+        # Only the top results are sorted; the rest of a broad match is not
+        return heapq.nsmallest(
+            limit, ranked, key=lambda r: (-r[1], self._docs[r[0]])
+        )
+
+    def _snippet(self, folder: str, filename: str, position: int) -> str:
+        try:
+            text = self.reader(folder, filename)
+        except OSError:
+            return ""
+        return _snippet_text(text, position)
+
+
+def _snippet_text(text: str, position: int) -> str:
+    # The text around the token at position, whitespace collapsed
+    for idx, (_, start, end) in enumerate(iter_tokens(text)):
+        if idx == position:
+            break
+    else:
+        return text[: SNIPPET_RADIUS * 2].strip()
+    lo = max(0, start - SNIPPET_RADIUS)
+    hi = min(len(text), end + SNIPPET_RADIUS)
+    snippet = " ".join(text[lo:hi].split())
+    return ("…" if lo > 0 else "") + snippet + ("…" if hi < len(text) else "")
+
+
+def _proximity_bonus(per_word, doc_id) -> float:
+    # Reward notes where consecutive query words appear next to each other
+    bonus = 0.0
+    for left, right in zip(per_word, per_word[1:]):
+        right_positions = set(right[doc_id])
+        if any(p + 1 in right_positions for p in left[doc_id]):
+            bonus += 1.0
+    return bonus
+
+
+def _title_bonus(terms: List[str], filename: str) -> float:
+    title_terms = tokenize(os.path.splitext(filename)[0])
+    return sum(
+        1.5 for term in terms if any(t.startswith(term) for t in title_terms)
+    )
+
+
+def _merge_sorted(left: Iterable[str], right: Iterable[str]) -> Iterator[str]:
+    # Union of two sorted term sequences, in order and without duplicates
+    previous = None
+    for term in heapq.merge(left, right):
+        if term != previous:
+            yield term
+            previous = term
+
+
+def _stat(base_dir: str, folder: str, filename: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(os.path.join(base_dir, folder, filename))
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _join_folder(folder: str, sub: str) -> str:
+    if folder and sub:
+        return f"{folder}/{sub}"
+    return folder or sub
+
+
+def _is_within(folder: str, parent: str) -> bool:
+    return folder == parent or folder.startswith(parent + "/")
+
+
+def walk_notes(base_dir: str) -> Iterator[Key]:
+    """Yield ``(folder, filename)`` for every markdown note under base_dir."""
+    for root, dirs, files in os.walk(base_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        rel = os.path.relpath(root, base_dir)
+        folder = "" if rel == "." else rel.replace(os.sep, "/")
+        for name in files:
+            if name.endswith(".md") and not name.startswith("."):
+                yield folder, name
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Return the process-wide search index (built lazily on first query)."""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(files_manager.read_markdown_file)
+            # Rebuilding is left to the next query rather than done while
+            # the event bus waits
+            files_manager.get_event_bus().subscribe(
+                _search_index.apply_events, _search_index.invalidate
+            )
+        return _search_index
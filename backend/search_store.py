@@ -0,0 +1,316 @@
+"""On-disk segment format for the search index.
+
+A segment is one immutable file written by ``write_segment`` and read back
+through ``mmap`` by ``Segment``. Opening it only parses the note table;
+terms and postings stay on disk until a query needs them, so a query only
+pages in the dictionary entries it bisects over and the postings of the
+terms it matches.
+
+Layout (little endian)::
+
+    header   magic, version, note count, term count, section offsets
+    notes    per note: mtime_ns, size, token count, folder, filename
+    dict     per term, sorted: term offset/length, postings offset/length,
+             document frequency (fixed-size entries, so it can be bisected)
+    terms    UTF-8 term bytes
+    postings per term: varint (doc id delta, position count, position
+             deltas...) for every note containing it
+
+Doc ids are the positions in the note table.
+"""
+
+import itertools
+import mmap
+import os
+import struct
+from functools import lru_cache
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+MAGIC = b"SNIX"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sIIIQQQ")
+_NOTE = struct.Struct("<QQI")
+_NAME_LEN = struct.Struct("<H")
+_ENTRY = struct.Struct("<QIQII")
+
+# Decoded postings kept per open segment, for terms typed again and again
+POSTINGS_CACHE_SIZE = 256
+
+_tmp_ids = itertools.count()
+
+Postings = Dict[int, List[int]]
+
+
+class SegmentNote(NamedTuple):
+    """A note stored in a segment, with the stat it was indexed at."""
+
+    folder: str
+    filename: str
+    mtime_ns: int
+    size: int
+    length: int
+
+
+class Segment:
+    """Read-only view of a segment file.
+
+    Attributes:
+        path: File the segment was opened from.
+        notes: Note table; a note's position is its doc id.
+    """
+
+    def __init__(self, path: str):
+        """Open and map a segment.
+
+        Raises:
+            OSError: The file cannot be read.
+            ValueError: The file is not a segment of this version.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except (struct.error, UnicodeDecodeError) as exc:
+            self.close()
+            raise ValueError(f"corrupt search index: {path}") from exc
+        self.postings = lru_cache(maxsize=POSTINGS_CACHE_SIZE)(self._postings)
+
+    def _open(self):
+        magic, version, n_notes, n_terms, notes_off, dict_off, _ = (
+            _HEADER.unpack_from(self._mm, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a search index: {self.path}")
+        self.term_count = n_terms
+        self._dict_off = dict_off
+        notes = []
+        offset = notes_off
+        for _ in range(n_notes):
+            mtime_ns, size, length = _NOTE.unpack_from(self._mm, offset)
+            offset += _NOTE.size
+            folder, offset = _read_name(self._mm, offset)
+            filename, offset = _read_name(self._mm, offset)
+            notes.append(SegmentNote(folder, filename, mtime_ns, size, length))
+        self.notes = notes
+
+    def close(self):
+        self._mm.close()
+
+    def term(self, index: int) -> str:
+        term_off, term_len, _, _, _ = self._entry(index)
+        return self._mm[term_off : term_off + term_len].decode("utf-8")
+
+    def find(self, term: str) -> int:
+        """Return the index of the first term >= term (bisect_left)."""
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def has(self, term: str) -> bool:
+        index = self.find(term)
+        return index < self.term_count and self.term(index) == term
+
+    def prefixed(self, prefix: str, limit: int) -> List[str]:
+        """Return up to limit terms starting with prefix, in order."""
+        terms = []
+        index = self.find(prefix)
+        while index < self.term_count and len(terms) < limit:
+            term = self.term(index)
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+            index += 1
+        return terms
+
+    def iter_terms(self) -> Iterator[str]:
+        for index in range(self.term_count):
+            yield self.term(index)
+
+    def _postings(self, term: str) -> Postings:
+        # Wrapped in an LRU cache per segment; callers must not mutate it
+        index = self.find(term)
+        if index >= self.term_count or self.term(index) != term:
+            return {}
+        _, _, post_off, post_len, df = self._entry(index)
+        return decode_postings(self._mm[post_off : post_off + post_len], df)
+
+    def _entry(self, index: int):
+        return _ENTRY.unpack_from(self._mm, self._dict_off + index * _ENTRY.size)
+
+
+def write_segment(
+    path: str,
+    notes: List[SegmentNote],
+    postings: Iterable[Tuple[str, Postings]],
+    release: Optional[Callable[[], None]] = None,
+):
+    """Write a segment atomically.
+
+    The segment is written to a temporary file with a name unique to the
+    call (named like ``atomic_write``'s, so stale ones are cleaned up the
+    same way) and moved over path once complete.
+
+    Args:
+        path: Destination file; replaced only once the new file is complete.
+        notes: Note table, indexed by doc id.
+        postings: ``(term, {doc_id: positions})`` pairs in sorted term order.
+        release: Called after the new file is complete and right before it
+            replaces path, to close a ``Segment`` mapping path: Windows
+            refuses to replace a mapped file.
+    """
+    notes_blob = bytearray()
+    for note in notes:
+        notes_blob += _NOTE.pack(note.mtime_ns, note.size, note.length)
+        _write_name(notes_blob, note.folder)
+        _write_name(notes_blob, note.filename)
+
+    terms_blob = bytearray()
+    postings_blob = bytearray()
+    entries = []
+    for term, term_postings in postings:
+        if not term_postings:
+            continue
+        term_bytes = term.encode("utf-8")
+        encoded = encode_postings(term_postings)
+        entries.append(
+            (
+                len(terms_blob),
+                len(term_bytes),
+                len(postings_blob),
+                len(encoded),
+                len(term_postings),
+            )
+        )
+        terms_blob += term_bytes
+        postings_blob += encoded
+
+    notes_off = _HEADER.size
+    dict_off = notes_off + len(notes_blob)
+    terms_off = dict_off + len(entries) * _ENTRY.size
+    postings_off = terms_off + len(terms_blob)
+    dict_blob = bytearray()
+    for term_rel, term_len, post_rel, post_len, df in entries:
+        dict_blob += _ENTRY.pack(
+            terms_off + term_rel, term_len, postings_off + post_rel, post_len, df
+        )
+
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(
+        directory, f".{name}.{os.getpid()}.{next(_tmp_ids)}.tmp"
+    )
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    len(notes),
+                    len(entries),
+                    notes_off,
+                    dict_off,
+                    terms_off,
+                )
+            )
+            f.write(notes_blob)
+            f.write(dict_blob)
+            f.write(terms_blob)
+            f.write(postings_blob)
+            f.flush()
+            os.fsync(f.fileno())
+        if release is not None:
+            release()
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def encode_postings(postings: Postings) -> bytes:
+    out = bytearray()
+    previous_doc = 0
+    for doc_id in sorted(postings):
+        positions = postings[doc_id]
+        _write_varint(out, doc_id - previous_doc)
+        _write_varint(out, len(positions))
+        previous = 0
+        for position in positions:
+            _write_varint(out, position - previous)
+            previous = position
+        previous_doc = doc_id
+    return bytes(out)
+
+
+def decode_postings(data: bytes, count: int) -> Postings:
+    postings: Postings = {}
+    offset = 0
+    doc_id = 0
+    for _ in range(count):
+        delta, offset = _read_varint(data, offset)
+        doc_id += delta
+        n_positions, offset = _read_varint(data, offset)
+        positions = []
+        position = 0
+        for _ in range(n_positions):
+            delta, offset = _read_varint(data, offset)
+            position += delta
+            positions.append(position)
+        postings[doc_id] = positions
+    return postings
+
+
+def open_segment(path: str) -> Optional[Segment]:
+    """Open a segment, or return None if it is missing or unreadable."""
+    try:
+        return Segment(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _write_name(out: bytearray, name: str):
+    encoded = name.encode("utf-8")
+    out += _NAME_LEN.pack(len(encoded))
+    out += encoded
+
+
+def _read_name(mm, offset: int) -> Tuple[str, int]:
+    (length,) = _NAME_LEN.unpack_from(mm, offset)
+    offset += _NAME_LEN.size
+    return mm[offset : offset + length].decode("utf-8"), offset + length
@@ -0,0 +1,378 @@
+"""Log of user actions that took longer than they should.
+
+A UI handler wrapped in ``action(name)`` (or an action started with
+``begin`` when its work spans a background I/O task) is timed from start to
+finish. If it runs over its threshold, one JSON line is appended to a
+rotating log next to ``app_state.json``. The line holds the total time, the
+time split by phase, the arguments of the action and the size of the vault.
+This gives a report like "renaming froze the app" something to go on.
+
+Phases are charged with ``phase(kind)``:
+
+* ``io``: ``files_manager`` and app state calls (through
+  ``instrumented(name, phase="io")``) and the time spent waiting for a
+  background I/O task;
+* ``build``: creating and patching controls;
+* ``update``: ``page.update()`` and ``control.update()``.
+
+Phases nest. A ``list_folders`` call made while the sidebar builds its rows
+is charged to ``io`` and not to ``build``. Time an action spends waiting on
+work done elsewhere is charged with ``Action.lap``. Examples are the I/O
+executor (``io``) and ranking by the search index (``search``). Time not
+covered by any phase is reported as ``other``.
+
+When an action is fast, the cost is a few ``perf_counter`` calls and no
+formatting. With no action running on the thread, ``phase`` costs one
+thread-local lookup. An action started inside another one (``open_file``
+calls ``refresh_sidebar``) is part of the outer action and is not logged on
+its own.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import logging.handlers
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
+
+# Thresholds (ms) per action; actions not listed use DEFAULT_THRESHOLD_MS.
+# Each one can be overridden with the "slow_op_thresholds_ms" app state key.
+DEFAULT_THRESHOLD_MS = 200.0
+DEFAULT_THRESHOLDS_MS = {
+    "ui.open_file": 150.0,
+    "ui.select_tab": 100.0,
+    "ui.refresh_sidebar": 100.0,
+    "ui.on_reorder": 150.0,
+    "ui.search": 500.0,
+    "ui.rename_folder": 500.0,
+    "ui.delete_folder": 1000.0,
+}
+
+LOG_NAME = "slow_ops.log"
+# The log and its backups stay under (BACKUP_COUNT + 1) * MAX_LOG_BYTES
+MAX_LOG_BYTES = 512 * 1024
+BACKUP_COUNT = 3
+# Longest repr of an argument written to the log
+MAX_ARG_CHARS = 200
+
+_local = threading.local()
+_lock = threading.Lock()
+_thresholds: Dict[str, float] = dict(DEFAULT_THRESHOLDS_MS)
+_default_threshold = DEFAULT_THRESHOLD_MS
+_log_path: Optional[str] = None
+_logger: Optional[logging.Logger] = None
+_vault_size: Optional[Callable[[], dict]] = None
+_NO_PHASE = nullcontext()
+# Problems with the configuration; slow actions go to their own logger
+log = logging.getLogger(__name__)
+
+
+class Action:
+    """One timed user action.
+
+    While bound to a thread (``with action:``), the ``phase`` calls made on
+    that thread are charged to it. An action can move between threads, for
+    example from a click handler to the callback of the background task it
+    started, but is bound to one thread at a time.
+
+    Attributes:
+        name: Action name, e.g. ``"ui.rename_folder"``.
+        args: Arguments of the action, written to the log when it is slow.
+        phases: Milliseconds charged to each phase so far.
+    """
+
+    def __init__(self, name: str, args: Optional[dict] = None):
+        self.name = name
+        self.args = args or {}
+        self.phases: Dict[str, float] = {}
+        self.start = time.perf_counter()
+        # [kind, start, ms spent in nested phases] per open phase
+        self._open: List[list] = []
+        # Where the last lap() ended, and the phase total at that point
+        self._lap_at = self.start
+        self._lap_charged = 0.0
+        self._done = False
+
+    def __enter__(self) -> "Action":
+        _bound().append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _bound().remove(self)
+        return False
+
+    @contextmanager
+    def phase(self, kind: str):
+        """Charge the block to kind, less the time of nested phases."""
+        frame = [kind, time.perf_counter(), 0.0]
+        self._open.append(frame)
+        try:
+            yield
+        finally:
+            self._open.pop()
+            elapsed = (time.perf_counter() - frame[1]) * 1000
+            self._charge(kind, elapsed - frame[2])
+            if self._open:
+                self._open[-1][2] += elapsed
+
+    def lap(self, kind: str):
+        """Charge the time since the last lap (or the start) to kind.
+
+        Meant for work the action waited on without running it, such as a
+        rename done by the I/O executor. Phases recorded since the last lap
+        are not charged twice.
+        """
+        now = time.perf_counter()
+        charged = sum(self.phases.values()) - self._lap_charged
+        self._charge(kind, max(0.0, (now - self._lap_at) * 1000 - charged))
+        self._lap_at = now
+        self._lap_charged = sum(self.phases.values())
+
+    def ends(self, fn: Callable, failed: bool = False, waited: str = "io"):
+        """Wrap a callback of the background task so that it ends the action.
+
+        The wrapper charges the wait to waited, runs fn bound to the action
+        and then finishes it.
+
+        Args:
+            fn: The task's ``on_done`` or ``on_error`` callback.
+            failed: Log the action as failed (for ``on_error``).
+            waited: Phase the wait for the task is charged to.
+        """
+
+        def callback(*args):
+            self.lap(waited)
+            ok = False
+            try:
+                with self:
+                    result = fn(*args)
+                ok = True
+                return result
+            finally:
+                self.finish(failed or not ok)
+
+        return callback
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def finish(self, failed: bool = False) -> Optional[dict]:
+        """End the action; log and return its entry if it was slow."""
+        if self._done:
+            return None
+        self._done = True
+        total_ms = self.elapsed_ms()
+        threshold_ms = threshold_for(self.name)
+        if total_ms < threshold_ms:
+            return None
+        entry = self._entry(total_ms, threshold_ms, failed)
+        _write(entry)
+        return entry
+
+    def _charge(self, kind: str, ms: float):
+        self.phases[kind] = self.phases.get(kind, 0.0) + ms
+
+    def _entry(self, total_ms: float, threshold_ms: float, failed: bool) -> dict:
+        phases = {kind: round(ms, 3) for kind, ms in self.phases.items()}
+        phases["other"] = round(max(0.0, total_ms - sum(self.phases.values())), 3)
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "action": self.name,
+            "total_ms": round(total_ms, 3),
+            "threshold_ms": threshold_ms,
+            "failed": failed,
+            "phases": phases,
+            "args": {key: _short(value) for key, value in self.args.items()},
+            "vault": _vault(),
+        }
+
+
+def configure(
+    log_dir: Optional[str] = None,
+    thresholds: Optional[Dict[str, float]] = None,
+    vault_size: Optional[Callable[[], dict]] = None,
+):
+    """Set where slow actions are logged and when an action counts as slow.
+
+    Args:
+        log_dir: Directory of ``slow_ops.log``; nothing is written until set.
+        thresholds: Milliseconds per action name, merged over the defaults;
+            the ``"default"`` key replaces DEFAULT_THRESHOLD_MS. It comes
+            from app state as typed by the user, so anything that is not a
+            dict of numbers is logged and skipped.
+        vault_size: Returns the vault numbers written with each entry.
+    """
+    global _default_threshold, _log_path, _vault_size
+
+    if thresholds is not None and not isinstance(thresholds, dict):
+        log.warning("slow_op_thresholds_ms is not a dict, ignored: %r", thresholds)
+        thresholds = None
+    with _lock:
+        if thresholds:
+            for name, ms in thresholds.items():
+                if not _is_threshold(ms):
+                    log.warning("Slow op threshold %r is not a number: %r", name, ms)
+                elif name == "default":
+                    _default_threshold = float(ms)
+                else:
+                    _thresholds[name] = float(ms)
+        if vault_size is not None:
+            _vault_size = vault_size
+        if log_dir is not None:
+            path = os.path.join(log_dir, LOG_NAME)
+            if path != _log_path:
+                _close_logger()
+                _log_path = path
+
+
+def threshold_for(name: str) -> float:
+    return _thresholds.get(name, _default_threshold)
+
+
+def log_path() -> Optional[str]:
+    return _log_path
+
+
+def current() -> Optional[Action]:
+    """Return the innermost action bound to this thread, if any."""
+    stack = getattr(_local, "actions", None)
+    return stack[-1] if stack else None
+
+
+def begin(name: str, args: Optional[dict] = None) -> Action:
+    """Start an action finished later by ``Action.finish``.
+
+    For actions whose work outlives the handler that started them; bind the
+    action (``with action:``) in every callback that continues it.
+    """
+    return Action(name, args)
+
+
+def action(name: str) -> Callable:
+    """Decorator timing each top-level call of the function as one action.
+
+    The call's positional and keyword arguments are logged by parameter name
+    when the call is slow.
+    """
+
+    def decorate(fn):
+        code = inspect.unwrap(fn).__code__
+        params = code.co_varnames[: code.co_argcount]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current() is not None:
+                return fn(*args, **kwargs)
+            op = Action(name, {**dict(zip(params, args)), **kwargs})
+            failed = True
+            try:
+                with op:
+                    result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                op.finish(failed)
+
+        return wrapper
+
+    return decorate
+
+
+def phase(kind: str):
+    """Context manager charging the block to kind in the action bound to
+    this thread (a no-op when there is none)."""
+    stack = getattr(_local, "actions", None)
+    if not stack:
+        return _NO_PHASE
+    return stack[-1].phase(kind)
+
+
+def read_entries(path: Optional[str] = None) -> List[dict]:
+    """Return the logged entries, oldest first, backups included."""
+    path = path or _log_path
+    if path is None:
+        return []
+    entries = []
+    for index in range(BACKUP_COUNT, -1, -1):
+        name = f"{path}.{index}" if index else path
+        if not os.path.exists(name):
+            continue
+        with open(name, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+    return entries
+
+
+def _bound() -> List[Action]:
+    stack = getattr(_local, "actions", None)
+    if stack is None:
+        stack = _local.actions = []
+    return stack
+
+
+def _write(entry: dict):
+    logger = _get_logger()
+    if logger is not None:
+        logger.warning(json.dumps(entry, ensure_ascii=False))
+
+
+def _get_logger() -> Optional[logging.Logger]:
+    global _logger
+    if _logger is None and _log_path is not None:
+        with _lock:
+            if _logger is None and _log_path is not None:
+                handler = logging.handlers.RotatingFileHandler(
+                    _log_path,
+                    maxBytes=MAX_LOG_BYTES,
+                    backupCount=BACKUP_COUNT,
+                    encoding="utf-8",
+                    delay=True,
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger("study_notebook.slow_ops")
+                logger.setLevel(logging.WARNING)
+                logger.propagate = False
+                logger.addHandler(handler)
+                _logger = logger
+    return _logger
+
+
+def _close_logger():
+    global _logger
+    if _logger is not None:
+        for handler in list(_logger.handlers):
+            _logger.removeHandler(handler)
+            handler.close()
+        _logger = None
+
+
+def _is_threshold(value) -> bool:
+    # bool is an int, but "true" is no threshold
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return math.isfinite(value) and value >= 0
+
+
+def _vault() -> dict:
+    if _vault_size is None:
+        return {}
+    try:
+        return _vault_size()
+    except Exception as exc:
+        return {"error": str(exc)}
+
+
+def _short(value) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) > MAX_ARG_CHARS:
+        text = text[: MAX_ARG_CHARS - 3] + "..."
+    return text
@@ -0,0 +1,180 @@
+"""Change events for the vault.
+
+Every ``files_manager`` mutation (and every external change picked up by
+``fs_watcher``) is published as a ``VaultEvent`` on the process-wide
+``VaultEventBus``. Caches such as the vault tree and the search index
+subscribe to the bus and update themselves from the events, touching only
+the notes that changed; they never need a full rebuild to stay current.
+
+Events published inside ``bus.batch()`` (one autosave flush, one batch of
+watcher events) are delivered together when the batch ends. Each event
+carries a sequence number. Delivery is in sequence order, so a subscriber
+that sees a gap knows it missed events (for instance because its handler
+raised) and resyncs from disk instead.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, NamedTuple, Optional
+
+log = logging.getLogger(__name__)
+
+
+class VaultEvent(NamedTuple):
+    """A change to a note or folder.
+
+    ``kind`` is one of "created", "saved", "deleted", "renamed", "reordered"
+    or "resync" (changes were lost; caches should be rebuilt). ``folder`` is
+    the parent folder relative to the vault root and ``name`` the entry's
+    name in it; for "reordered" the folder itself is ``folder`` and ``name``
+    is empty. Renames and moves also set ``new_folder`` and ``new_name``.
+    ``text`` is the saved content when the publisher already had it.
+    """
+
+    seq: int
+    kind: str
+    folder: str
+    name: str
+    is_dir: bool = False
+    new_folder: Optional[str] = None
+    new_name: Optional[str] = None
+    text: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        return _join(self.folder, self.name)
+
+    @property
+    def new_path(self) -> Optional[str]:
+        if self.new_name is None:
+            return None
+        return _join(self.new_folder or "", self.new_name)
+
+
+EventHandler = Callable[[List[VaultEvent]], None]
+
+
+class _Subscription:
+    __slots__ = ("on_events", "on_resync", "last_seq")
+
+    def __init__(self, on_events, on_resync, last_seq):
+        self.on_events = on_events
+        self.on_resync = on_resync
+        # Sequence number of the last batch this subscriber handled
+        self.last_seq = last_seq
+
+
+class VaultEventBus:
+    """Delivers batches of vault events to subscribers, in order."""
+
+    def __init__(self):
+        """Initialize a bus without subscribers."""
+        # Held while numbering and delivering, so batches arrive in order
+        self._lock = threading.RLock()
+        self._subscriptions: List[_Subscription] = []
+        self._seq = 0
+        self._local = threading.local()
+        self._counters = {"events": 0, "batches": 0, "resyncs": 0}
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the last delivered event."""
+        return self._seq
+
+    def subscribe(
+        self,
+        on_events: EventHandler,
+        on_resync: Optional[Callable[[], None]] = None,
+    ) -> Callable[[], None]:
+        """Register a subscriber.
+
+        Args:
+            on_events: Called with each batch of events.
+            on_resync: Called instead when the subscriber missed events or a
+                "resync" event was published; it should rebuild from disk.
+
+        Returns:
+            A function that removes the subscription.
+        """
+        with self._lock:
+            subscription = _Subscription(on_events, on_resync, self._seq)
+            self._subscriptions.append(subscription)
+
+        def unsubscribe():
+            with self._lock:
+                if subscription in self._subscriptions:
+                    self._subscriptions.remove(subscription)
+
+        return unsubscribe
+
+    @contextmanager
+    def batch(self):
+        """Collect events published by this thread and deliver them at exit."""
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            # Nested: the outermost batch delivers
+            yield
+            return
+        self._local.pending = []
+        try:
+            yield
+        finally:
+            pending, self._local.pending = self._local.pending, None
+            self._deliver(pending)
+
+    def publish(self, kind: str, folder: str = "", name: str = "", **fields):
+        """Publish one event (delivered now, or when the current batch ends)."""
+        event = (kind, (folder or "").strip("/"), name, fields)
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append(event)
+        else:
+            self._deliver([event])
+
+    def stats(self) -> dict:
+        """Return event/batch/resync counters and the current sequence number."""
+        with self._lock:
+            counters = dict(self._counters)
+            counters["seq"] = self._seq
+            counters["subscribers"] = len(self._subscriptions)
+        return counters
+
+    def _deliver(self, pending):
+        if not pending:
+            return
+        with self._lock:
+            events = []
+            for kind, folder, name, fields in pending:
+                self._seq += 1
+                events.append(VaultEvent(self._seq, kind, folder, name, **fields))
+            self._counters["events"] += len(events)
+            self._counters["batches"] += 1
+            resync = any(event.kind == "resync" for event in events)
+            for subscription in list(self._subscriptions):
+                self._deliver_to(subscription, events, resync)
+
+    def _deliver_to(self, subscription: _Subscription, events, resync: bool):
+        gap = events[0].seq != subscription.last_seq + 1
+        if (resync or gap) and subscription.on_resync is not None:
+            # A rebuild from disk already includes this batch
+            self._counters["resyncs"] += 1
+            handler, args = subscription.on_resync, ()
+        else:
+            handler, args = subscription.on_events, (events,)
+        try:
+            handler(*args)
+        except Exception:
+            # last_seq stays behind, so the next batch shows up as a gap
+            log.exception(
+                "Vault event subscriber %r failed on events %d-%d",
+                handler,
+                events[0].seq,
+                events[-1].seq,
+            )
+            return
+        subscription.last_seq = events[-1].seq
+
+
+def _join(folder: str, name: str) -> str:
+    return f"{folder}/{name}" if folder and name else folder or name
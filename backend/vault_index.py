@@ -0,0 +1,271 @@
+"""In-memory index of the vault folder tree.
+
+The sidebar and the listing helpers in ``files_manager`` used to hit the disk
+on every render: one ``os.listdir`` per folder, an ``isdir``/``isfile`` per
+entry and a read of ``.order.json``. ``VaultIndex`` keeps that information in
+memory instead. Each folder is loaded from disk the first time it is
+requested and is then kept current by the ``files_manager`` mutators.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def merge_children(order: dict, files: List[str], folders: List[str]) -> List[dict]:
+    """Merge a persisted order with the entries that actually exist on disk.
+
+    Entries listed in the order are kept in their persisted position as long
+    as they still exist. Entries missing from the order are added at the top,
+    which keeps the UI robust when the order file is stale.
+
+    Args:
+        order: Parsed ``.order.json`` content (``{"items": [...]}``).
+        files: Markdown file names present in the folder.
+        folders: Subfolder names present in the folder.
+
+    Returns:
+        List of ``{"name": ..., "type": "file" | "folder"}`` dicts.
+    """
+    file_names = set(files)
+    folder_names = set(folders)
+    children = []
+    seen = set()
+    for item in order.get("items", []) or []:
+        name = item.get("name")
+        item_type = item.get("type")
+        if not name or name in seen:
+            continue
+        if item_type == "file" and name in file_names:
+            children.append({"name": name, "type": "file"})
+            seen.add(name)
+        elif item_type == "folder" and name in folder_names:
+            children.append({"name": name, "type": "folder"})
+            seen.add(name)
+
+    for name in folders:
+        if name not in seen:
+            children.insert(0, {"name": name, "type": "folder"})
+            seen.add(name)
+    for name in files:
+        if name not in seen:
+            children.insert(0, {"name": name, "type": "file"})
+            seen.add(name)
+    return children
+
+
+class _FolderNode:
+    """Cached contents of a single folder."""
+
+    __slots__ = ("files", "folders", "order", "hints", "_children")
+
+    def __init__(
+        self,
+        files: List[str],
+        folders: List[str],
+        order: dict,
+        hints: Optional[Dict[str, bool]] = None,
+    ):
+        self.files = files
+        self.folders = folders
+        self.order = order
+        # subfolder name -> whether it has children, when known without a scan
+        self.hints = hints or {}
+        self._children: Optional[List[dict]] = None
+
+    def children(self) -> List[dict]:
+        if self._children is None:
+            self._children = merge_children(self.order, self.files, self.folders)
+        return self._children
+
+    def changed(self):
+        self._children = None
+
+
+class VaultIndex:
+    """Process-wide cache of folder contents and ordering.
+
+    Folder paths are relative to ``BASE_DIR`` and use ``/`` as separator
+    (``""`` is the vault root), matching the paths used throughout the UI.
+
+    Folders are loaded lazily: nothing below a folder is read until that
+    folder itself is requested, so collapsed subtrees cost no I/O. Whether a
+    folder has children can still be answered for unloaded folders from
+    hints recorded when their parent was listed (see ``has_children``).
+
+    Attributes:
+        loader: Callable returning ``(files, folders, order, hints)`` for a
+            folder path, where hints maps subfolder names to a has-children
+            flag. Only called for folders that are not cached yet.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Tuple[List[str], List[str], dict, Dict[str, bool]]],
+    ):
+        """Initialize an empty index.
+
+        Args:
+            loader: Function used to read a folder from disk on first access.
+        """
+        self.loader = loader
+        self._folders: Dict[str, _FolderNode] = {}
+        self._lock = threading.RLock()
+
+    def _node(self, folder: str) -> _FolderNode:
+        node = self._folders.get(folder)
+        if node is None:
+            files, folders, order, hints = self.loader(folder)
+            node = _FolderNode(list(files), list(folders), order, dict(hints))
+            self._folders[folder] = node
+        return node
+
+    def children(self, folder: str) -> List[dict]:
+        """Return the ordered children of a folder.
+
+        Args:
+            folder: Folder path relative to the vault root.
+
+        Returns:
+            List of ``{"name", "type"}`` dicts in display order.
+        """
+        with self._lock:
+            return [dict(child) for child in self._node(folder).children()]
+
+    def list_folders(self, folder: str = "") -> List[str]:
+        """Return the ordered subfolder names of a folder."""
+        with self._lock:
+            return [
+                c["name"]
+                for c in self._node(folder).children()
+                if c["type"] == "folder"
+            ]
+
+    def list_files(self, folder: str) -> List[str]:
+        """Return the ordered markdown file names of a folder."""
+        with self._lock:
+            return [
+                c["name"] for c in self._node(folder).children() if c["type"] == "file"
+            ]
+
+    def is_loaded(self, folder: str) -> bool:
+        """Return True if the folder is already cached."""
+        with self._lock:
+            return folder in self._folders
+
+    def has_children(self, folder: str) -> Optional[bool]:
+        """Return whether a folder has children, without loading it.
+
+        Exact for cached folders. For other folders the hint recorded when
+        the parent was listed is returned, or None when it is unknown.
+        """
+        with self._lock:
+            node = self._folders.get(folder)
+            if node is not None:
+                return bool(node.files or node.folders)
+            parent, _, name = folder.rpartition("/")
+            parent_node = self._folders.get(parent)
+            if parent_node is None:
+                return None
+            return parent_node.hints.get(name)
+
+    # Mutation hooks, applied from vault events after the disk was updated.
+
+    def add_entry(self, folder: str, name: str, item_type: str):
+        """Record a new file or subfolder inside a cached folder."""
+        with self._lock:
+            node = self._folders.get(folder)
+            if node is None:
+                return
+            entries = node.files if item_type == "file" else node.folders
+            if name not in entries:
+                entries.append(name)
+                node.changed()
+            if item_type == "folder":
+                # A folder that was just created is empty
+                node.hints.setdefault(name, False)
+            self._set_hint(folder, True)
+
+    def remove_entry(self, folder: str, name: str):
+        """Forget a file or subfolder (and any cached subtree below it)."""
+        with self._lock:
+            node = self._folders.get(folder)
+            if node is not None:
+                if name in node.files:
+                    node.files.remove(name)
+                if name in node.folders:
+                    node.folders.remove(name)
+                node.hints.pop(name, None)
+                node.changed()
+            self._drop_subtree(_join(folder, name))
+
+    def rename_entry(self, folder: str, old_name: str, new_name: str):
+        """Rename a file or subfolder, moving any cached subtree along."""
+        with self._lock:
+            node = self._folders.get(folder)
+            if node is not None:
+                for entries in (node.files, node.folders):
+                    if old_name in entries:
+                        entries[entries.index(old_name)] = new_name
+                if old_name in node.hints:
+                    node.hints[new_name] = node.hints.pop(old_name)
+                node.changed()
+            old_path = _join(folder, old_name)
+            new_path = _join(folder, new_name)
+            moved = {}
+            for path in list(self._folders):
+                if path == old_path or path.startswith(old_path + "/"):
+                    moved[new_path + path[len(old_path) :]] = self._folders.pop(path)
+            self._folders.update(moved)
+
+    def apply_events(self, events):
+        """Update cached folders from a batch of ``VaultEvent``s."""
+        with self._lock:
+            for event in events:
+                item_type = "folder" if event.is_dir else "file"
+                if event.kind == "created":
+                    self.add_entry(event.folder, event.name, item_type)
+                elif event.kind == "deleted":
+                    self.remove_entry(event.folder, event.name)
+                elif event.kind == "renamed":
+                    if event.new_folder == event.folder:
+                        self.rename_entry(event.folder, event.name, event.new_name)
+                    else:
+                        self.remove_entry(event.folder, event.name)
+                        self.add_entry(event.new_folder, event.new_name, item_type)
+
+    def set_order(self, folder: str, order: dict):
+        """Replace the cached order of a folder after it was persisted."""
+        with self._lock:
+            node = self._folders.get(folder)
+            if node is not None:
+                node.order = order
+                node.changed()
+
+    def invalidate(self, folder: Optional[str] = None):
+        """Drop cached data so it is reloaded from disk on next access.
+
+        Args:
+            folder: Folder to drop, or None to clear the whole index.
+        """
+        with self._lock:
+            if folder is None:
+                self._folders.clear()
+            else:
+                self._folders.pop(folder, None)
+
+    def _set_hint(self, folder: str, value: bool):
+        if not folder:
+            return
+        parent, _, name = folder.rpartition("/")
+        parent_node = self._folders.get(parent)
+        if parent_node is not None:
+            parent_node.hints[name] = value
+
+    def _drop_subtree(self, path: str):
+        for cached in list(self._folders):
+            if cached == path or cached.startswith(path + "/"):
+                del self._folders[cached]
+
+
+def _join(folder: str, name: str) -> str:
+    return f"{folder}/{name}" if folder else name
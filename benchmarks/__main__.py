@@ -0,0 +1,80 @@
+"""Run the benchmarks and save the results as JSON.
+
+Usage::
+
+    python -m benchmarks --notes 5000 --depth 3 --out bench.json
+    python -m benchmarks --vault /tmp/vault --compare old.json
+
+Without ``--vault`` a synthetic vault is generated in a temporary directory
+(and removed afterwards); with it, an existing vault is generated into once
+when it is empty and reused as is otherwise.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+from benchmarks import bench_files, bench_sidebar
+from benchmarks.harness import (
+    compare,
+    environment,
+    load_results,
+    use_vault,
+    write_results,
+)
+from benchmarks.vault_generator import (
+    add_spec_arguments,
+    generate_vault,
+    load_vault,
+    spec_from_args,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--vault", help="vault directory to generate or reuse")
+    add_spec_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="JSON file for the results")
+    parser.add_argument("--compare", help="earlier results JSON to compare with")
+    args = parser.parse_args(argv)
+
+    spec = spec_from_args(args)
+    temporary = args.vault is None
+    path = tempfile.mkdtemp(prefix="bench-vault-") if temporary else args.vault
+    try:
+        if temporary or not os.path.isdir(path) or not os.listdir(path):
+            vault = generate_vault(path, spec)
+        else:
+            vault = load_vault(path)
+        with use_vault(path):
+            benchmarks = bench_files.run(vault, args.repeat)
+            benchmarks.update(bench_sidebar.run(vault, args.repeat))
+    finally:
+        if temporary:
+            shutil.rmtree(path, ignore_errors=True)
+
+    results = {
+        "environment": environment(),
+        "spec": {
+            **spec._asdict(),
+            "folders": len(vault.folders),
+            "notes": len(vault.notes),
+        },
+        "benchmarks": benchmarks,
+    }
+    commit = results["environment"]["commit"] or "local"
+    out = args.out or f"bench-{commit[:12]}.json"
+    write_results(out, results)
+    for name, metrics in sorted(benchmarks.items()):
+        print(f"{name:40} {metrics['median_ms']:10.3f} ms")
+    print(f"results written to {out}")
+    if args.compare:
+        compare(load_results(args.compare), results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
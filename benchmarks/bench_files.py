@@ -0,0 +1,92 @@
+"""Benchmarks for the ``files_manager`` listing, ordering and save paths.
+
+"cold" runs drop the in-memory vault index first, so they include the disk
+reads a fresh start pays; "warm" runs are served from the index.
+"""
+
+import os
+from typing import Dict
+
+from backend import files_manager
+from backend.atomic_write import forget
+from benchmarks.harness import measure
+from benchmarks.vault_generator import GeneratedVault
+
+
+def run(vault: GeneratedVault, repeat: int = 5) -> Dict[str, dict]:
+    """Run every benchmark against vault (already selected with use_vault)."""
+    index = files_manager.get_vault_index()
+    invalidate = index.invalidate
+    results = {}
+
+    results["list_folders.cold"] = measure(
+        files_manager.list_folders, repeat, setup=invalidate
+    )
+    results["list_folders.warm"] = measure(files_manager.list_folders, repeat)
+
+    def list_every_folder():
+        for folder in vault.folders:
+            files_manager.list_markdown_files(folder)
+
+    results["list_markdown_files.all.cold"] = measure(
+        list_every_folder, repeat, setup=invalidate
+    )
+    results["list_markdown_files.all.warm"] = measure(list_every_folder, repeat)
+
+    # The folder with the most entries is the worst case for order handling
+    folder = _largest_folder(vault)
+    folder_path = files_manager._folder_path(folder)
+    order_path = os.path.join(folder_path, files_manager.ORDER_FILENAME)
+    with open(order_path, "rb") as f:
+        generated_order = f.read()
+    results["_sync_order_with_fs.largest"] = measure(
+        lambda: files_manager._sync_order_with_fs(folder_path),
+        repeat,
+        # Forgetting the file defeats the skip-if-unchanged write
+        setup=lambda: forget(order_path),
+    )
+    # The synced order depends on file creation times; put the generated one
+    # back so later benchmarks see the same vault on every run
+    with open(order_path, "wb") as f:
+        f.write(generated_order)
+    forget(order_path)
+    index.invalidate()
+
+    names = [child["name"] for child in index.children(folder)]
+    orders = [list(reversed(names)), names]
+    runs = [0]
+
+    def reorder():
+        # Alternate two orders so every run really rewrites the order file
+        runs[0] += 1
+        files_manager.reorder_items(folder, orders[runs[0] % 2])
+
+    results["reorder_items.largest"] = measure(reorder, repeat)
+
+    note = vault.notes[0]
+    note_folder, _, note_name = note.rpartition("/")
+    with open(os.path.join(vault.path, note), "r", encoding="utf-8") as f:
+        text = f.read()
+    contents = [text, text + "\nedited\n"]
+
+    def save():
+        runs[0] += 1
+        files_manager.save_markdown_file(
+            note_folder, note_name, contents[runs[0] % 2]
+        )
+
+    results["save_markdown_file"] = measure(save, repeat)
+    files_manager.save_markdown_file(note_folder, note_name, text)
+
+    return results
+
+
+def _largest_folder(vault: GeneratedVault) -> str:
+    counts = {}
+    for note in vault.notes:
+        folder = note.rpartition("/")[0]
+        counts[folder] = counts.get(folder, 0) + 1
+    for folder in vault.folders:
+        parent = folder.rpartition("/")[0]
+        counts[parent] = counts.get(parent, 0) + 1
+    return max(sorted(counts), key=counts.get)
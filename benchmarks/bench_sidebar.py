@@ -0,0 +1,219 @@
+"""Headless sidebar render benchmark.
+
+``render_sidebar`` calls ``sidebar()`` for an ``expanded_folders`` map
+without a page or a Flet server and reports what the build produced: the
+time it took, how many rows the tree flattened to and how many of them were
+materialized, the controls created (in total and per type, so a change that
+adds a Draggable or a drop bar per row shows up), and the size of the
+commands Flet would send to add the sidebar to a page.
+
+Usage::
+
+    python -m benchmarks.bench_sidebar --vault /tmp/vault --expanded all
+    python -m benchmarks.bench_sidebar --vault /tmp/vault \\
+        --expanded expanded.json --reorder
+
+Counting controls and sizing the payload goes through Flet internals
+(``Control._get_children``, ``Control._build_add_commands`` and
+``CommandEncoder``), so the module checks the installed Flet on import and
+refuses to run on a version without them.
+"""
+
+import argparse
+import json
+import time
+import warnings
+from collections import Counter
+from importlib import metadata
+from typing import Dict, Iterator, NamedTuple
+
+import flet as ft
+
+from backend import files_manager
+from benchmarks.harness import measure, use_vault
+from benchmarks.vault_generator import GeneratedVault, load_vault
+
+# Flet release series whose private APIs this module was written against
+TESTED_FLET = "0.28."
+
+
+def _flet_version() -> str:
+    try:
+        return metadata.version("flet")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _check_flet():
+    # Fail with a clear message instead of an AttributeError halfway through
+    version = _flet_version()
+    try:
+        from flet.core.protocol import CommandEncoder
+    except ImportError:
+        CommandEncoder = None
+    missing = [
+        name
+        for name in ("_get_children", "_build_add_commands")
+        if not hasattr(ft.Control, name)
+    ]
+    if CommandEncoder is None:
+        missing.append("flet.core.protocol.CommandEncoder")
+    if missing:
+        raise ImportError(
+            f"bench_sidebar needs Flet {TESTED_FLET}x internals that Flet "
+            f"{version} does not have: {', '.join(missing)}"
+        )
+    if not version.startswith(TESTED_FLET):
+        warnings.warn(
+            f"bench_sidebar was written against Flet {TESTED_FLET}x and uses "
+            f"its private APIs; Flet {version} may report wrong numbers",
+            RuntimeWarning,
+        )
+    return CommandEncoder
+
+
+CommandEncoder = _check_flet()
+
+
+class SidebarReport(NamedTuple):
+    """What one headless ``sidebar()`` build produced."""
+
+    build_ms: float
+    rows: int
+    materialized_rows: int
+    controls: int
+    controls_by_type: Dict[str, int]
+    payload_bytes: int
+    serialize_ms: float
+
+
+def render_sidebar(
+    expanded_folders: dict, reorder_mode: bool = False
+) -> SidebarReport:
+    """Build the sidebar once for the vault ``files_manager`` points at.
+
+    Args:
+        expanded_folders: Mapping of folder path to expanded state, as kept
+            in the app state.
+        reorder_mode: Build the drag-and-drop variant of every row.
+    """
+    start = time.perf_counter()
+    container, tree = build_sidebar(expanded_folders, reorder_mode)
+    build_ms = (time.perf_counter() - start) * 1000
+    window_start, window_end = tree._window
+    by_type = count_controls(container)
+    start = time.perf_counter()
+    payload_bytes = estimate_payload(container)
+    serialize_ms = (time.perf_counter() - start) * 1000
+    return SidebarReport(
+        round(build_ms, 3),
+        len(tree.rows),
+        window_end - window_start,
+        sum(by_type.values()),
+        dict(sorted(by_type.items())),
+        payload_bytes,
+        round(serialize_ms, 3),
+    )
+
+
+def build_sidebar(expanded_folders: dict, reorder_mode: bool = False):
+    """Call ``sidebar()`` headless and return (container, SidebarTree)."""
+    from ui.widgets.sidebar import sidebar
+
+    tree_ref = ft.Ref()
+    container = sidebar(
+        expanded_folders, reorder_mode=reorder_mode, tree_ref=tree_ref
+    )
+    return container, tree_ref.current
+
+
+def iter_controls(control: ft.Control) -> Iterator[ft.Control]:
+    """Yield control and every control below it."""
+    yield control
+    for child in control._get_children():
+        yield from iter_controls(child)
+
+
+def count_controls(control: ft.Control) -> Counter:
+    """Count the controls below control (inclusive) by type name."""
+    return Counter(type(c).__name__ for c in iter_controls(control))
+
+
+def estimate_payload(control: ft.Control) -> int:
+    """Return the JSON size of the commands that add control to a page.
+
+    This is the encoding Flet uses on the wire, without the envelope of the
+    batch message.
+    """
+    commands = control._build_add_commands()
+    return len(json.dumps(commands, cls=CommandEncoder, separators=(",", ":")))
+
+
+def expanded_map(vault: GeneratedVault, mode: str) -> dict:
+    """Return an expanded_folders map: "all", "none" or "top" level only."""
+    if mode not in ("all", "none", "top"):
+        raise ValueError(f"unknown expansion mode: {mode}")
+    return {
+        folder: mode == "all" or (mode == "top" and "/" not in folder)
+        for folder in vault.folders
+    }
+
+
+def run(vault: GeneratedVault, repeat: int = 5) -> Dict[str, dict]:
+    """Benchmark sidebar builds for a few expansion states of vault.
+
+    Each entry has the build timings from ``measure`` plus the row, control
+    and payload numbers of one build.
+    """
+    index = files_manager.get_vault_index()
+    scenarios = [
+        ("collapsed", expanded_map(vault, "none"), False),
+        ("top", expanded_map(vault, "top"), False),
+        ("expanded", expanded_map(vault, "all"), False),
+        ("expanded.reorder", expanded_map(vault, "all"), True),
+    ]
+    results = {}
+    for name, expanded, reorder_mode in scenarios:
+        for temperature, setup in (("cold", index.invalidate), ("warm", None)):
+            timings = measure(
+                lambda: build_sidebar(expanded, reorder_mode),
+                repeat,
+                setup=setup,
+            )
+            results[f"sidebar.{name}.{temperature}"] = timings
+        report = render_sidebar(expanded, reorder_mode)
+        results[f"sidebar.{name}.warm"].update(
+            rows=report.rows,
+            materialized_rows=report.materialized_rows,
+            controls=report.controls,
+            controls_by_type=report.controls_by_type,
+            payload_bytes=report.payload_bytes,
+            serialize_ms=report.serialize_ms,
+        )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the sidebar headless.")
+    parser.add_argument("--vault", required=True)
+    parser.add_argument(
+        "--expanded",
+        default="all",
+        help='"all", "none", "top" or a JSON file with an expanded_folders map',
+    )
+    parser.add_argument("--reorder", action="store_true")
+    args = parser.parse_args(argv)
+
+    vault = load_vault(args.vault)
+    if args.expanded in ("all", "none", "top"):
+        expanded = expanded_map(vault, args.expanded)
+    else:
+        with open(args.expanded, "r", encoding="utf-8") as f:
+            expanded = json.load(f)
+    with use_vault(args.vault):
+        report = render_sidebar(expanded, args.reorder)
+    print(json.dumps(report._asdict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Typing-load simulator for the editor save path.
+
+Every keystroke in the editor runs ``main_page``'s ``instant_save``: the
+text goes into the note buffer cache and is handed to the autosave engine,
+which writes it with ``save_markdown_file`` once typing pauses. This module
+replays generated typing against a stand-in for that path (the same
+objects, wired the same way, without a page) and reports:
+
+* handler latency (p50/p99/max) of the per-keystroke call;
+* bytes written per typed character (write amplification);
+* fsyncs per minute of typing;
+
+from ``atomic_write.stats()`` and the autosave counters. ``instant`` is the
+old design, a synchronous save per keystroke, kept as a baseline, so a new
+autosave design can be judged by the same numbers.
+
+Typing is bursts of keystrokes at ``chars_per_second`` separated by pauses.
+``speed`` replays it faster than real time; the autosave delays are scaled
+by the same factor, so the write pattern matches a real-time run and the
+per-minute numbers are reported in typing time.
+
+Usage::
+
+    python -m benchmarks.bench_typing --sizes 1k,64k,1m,5m --duration 30
+"""
+
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+from backend import atomic_write, files_manager
+from backend.autosave import AutosaveEngine
+from backend.note_buffers import NoteBufferCache
+from benchmarks.harness import use_vault
+from benchmarks.vault_generator import note_text
+
+DEFAULT_SIZES = "1k,64k,1m,5m"
+_UNITS = {"k": 1024, "m": 1024 * 1024}
+_FOLDER = "Typing"
+_FILENAME = "note.md"
+
+
+class TypingProfile(NamedTuple):
+    """How the simulated user types."""
+
+    chars_per_second: float = 8.0
+    burst_chars: Tuple[int, int] = (15, 80)
+    pause_seconds: Tuple[float, float] = (0.3, 3.0)
+    seed: int = 0
+
+
+def keystrokes(profile: TypingProfile, duration: float) -> List[Tuple[float, str]]:
+    """Return ``(seconds since start, character)`` for duration seconds."""
+    rng = random.Random(profile.seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz     ,.\n"
+    interval = 1.0 / profile.chars_per_second
+    events = []
+    now = 0.0
+    while now < duration:
+        for _ in range(rng.randint(*profile.burst_chars)):
+            # Some jitter around the nominal typing rate
+            now += rng.uniform(0.5, 1.5) * interval
+            if now >= duration:
+                break
+            events.append((now, rng.choice(alphabet)))
+        now += rng.uniform(*profile.pause_seconds)
+    return events
+
+
+class AutosavePath:
+    """Stand-in for ``main_page``'s editor save path."""
+
+    name = "autosave"
+
+    def __init__(self, folder: str, filename: str, speed: float = 1.0):
+        self.folder = folder
+        self.filename = filename
+        self.buffers = NoteBufferCache()
+
+        def save_note(folder, filename, content):
+            written = files_manager.save_markdown_file(folder, filename, content)
+            self.buffers.mark_saved(folder, filename, content)
+            return written
+
+        self.autosave = AutosaveEngine(
+            save_note, idle_delay=0.75 / speed, max_delay=5.0 / speed
+        )
+
+    def on_change(self, content: str):
+        # instant_save
+        self.buffers.put(self.folder, self.filename, content)
+        self.autosave.mark_dirty(self.folder, self.filename, content)
+
+    def close(self) -> dict:
+        self.autosave.close()
+        return self.autosave.stats()
+
+
+class InstantPath:
+    """Baseline: write the whole note on every keystroke."""
+
+    name = "instant"
+
+    def __init__(self, folder: str, filename: str, speed: float = 1.0):
+        self.folder = folder
+        self.filename = filename
+
+    def on_change(self, content: str):
+        files_manager.save_markdown_file(self.folder, self.filename, content)
+
+    def close(self) -> dict:
+        return {}
+
+
+DESIGNS = {design.name: design for design in (AutosavePath, InstantPath)}
+
+
+def simulate(
+    design: str,
+    note_size: int,
+    profile: TypingProfile = TypingProfile(),
+    duration: float = 30.0,
+    speed: float = 1.0,
+) -> dict:
+    """Type into a note of note_size characters and measure the save path.
+
+    Must run inside ``use_vault``; the note is created in that vault.
+
+    Returns:
+        Latency percentiles in ms, bytes written per character, writes and
+        fsyncs per minute of typing time, and the design's own counters.
+    """
+    rng = random.Random(profile.seed)
+    text = note_text(rng, 0, note_size)
+    files_manager.save_markdown_file(_FOLDER, _FILENAME, text)
+    path = DESIGNS[design](_FOLDER, _FILENAME, speed)
+    events = keystrokes(profile, duration)
+    # Type in the middle of the note, where every save rewrites both halves
+    cursor = len(text) // 2
+
+    before = atomic_write.stats()
+    latencies = []
+    start = time.monotonic()
+    for at, char in events:
+        delay = start + at / speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        text = text[:cursor] + char + text[cursor:]
+        cursor += 1
+        handler_start = time.perf_counter()
+        path.on_change(text)
+        latencies.append((time.perf_counter() - handler_start) * 1000)
+    counters = path.close()
+    after = atomic_write.stats()
+
+    typed = len(events)
+    minutes = duration / 60
+    written = after["bytes_written"] - before["bytes_written"]
+    writes = after["writes"] - before["writes"]
+    fsyncs = after["fsyncs"] - before["fsyncs"]
+    latencies.sort()
+    return {
+        "design": design,
+        "note_size": note_size,
+        "chars_typed": typed,
+        "p50_ms": round(_percentile(latencies, 50), 4),
+        "p99_ms": round(_percentile(latencies, 99), 4),
+        "max_ms": round(latencies[-1], 4) if latencies else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 4) if latencies else 0.0,
+        "bytes_written": written,
+        "bytes_per_char": round(written / typed, 1) if typed else 0.0,
+        "writes": writes,
+        "writes_per_minute": round(writes / minutes, 1),
+        "fsyncs_per_minute": round(fsyncs / minutes, 1),
+        "counters": counters,
+    }
+
+
+def run(
+    sizes: List[int],
+    designs: List[str] = ("autosave",),
+    profile: TypingProfile = TypingProfile(),
+    duration: float = 30.0,
+    speed: float = 1.0,
+) -> Dict[str, dict]:
+    """Simulate every design against every note size in a scratch vault."""
+    results = {}
+    path = tempfile.mkdtemp(prefix="bench-typing-")
+    try:
+        with use_vault(path):
+            for design in designs:
+                for size in sizes:
+                    results[f"typing.{design}.{_format_size(size)}"] = simulate(
+                        design, size, profile, duration, speed
+                    )
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+    return results
+
+
+def parse_size(value: str) -> int:
+    """Parse "512", "64k" or "5m" into a number of characters."""
+    value = value.strip().lower()
+    if value[-1:] in _UNITS:
+        return int(float(value[:-1]) * _UNITS[value[-1]])
+    return int(value)
+
+
+def _format_size(size: int) -> str:
+    for suffix, unit in sorted(_UNITS.items(), key=lambda item: -item[1]):
+        if size >= unit and size % unit == 0:
+            return f"{size // unit}{suffix}"
+    return str(size)
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    # Nearest-rank percentile of sorted values
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def main(argv=None):
+    defaults = TypingProfile()
+    parser = argparse.ArgumentParser(description="Simulate typing into a note.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--designs", default="autosave", help="comma separated: autosave,instant"
+    )
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--cps", type=float, default=defaults.chars_per_second)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--out", help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    from benchmarks.harness import environment, write_results
+
+    profile = defaults._replace(chars_per_second=args.cps, seed=args.seed)
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    designs = [design.strip() for design in args.designs.split(",")]
+    results = run(sizes, designs, profile, args.duration, args.speed)
+    for name, result in results.items():
+        print(
+            f"{name:24} p50 {result['p50_ms']:8.3f} ms"
+            f"  p99 {result['p99_ms']:8.3f} ms"
+            f"  {result['bytes_per_char']:>12} B/char"
+            f"  {result['fsyncs_per_minute']:>8} fsyncs/min"
+        )
+    if args.out:
+        write_results(
+            args.out,
+            {
+                "environment": environment(),
+                "profile": {**profile._asdict(), "duration": args.duration},
+                "benchmarks": results,
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
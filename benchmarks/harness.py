@@ -0,0 +1,140 @@
+"""Timing and result helpers shared by the benchmark modules.
+
+Every benchmark produces a dict of numbers keyed by name. Timings come from
+``measure`` (milliseconds; the median is what ``compare`` looks at). A run
+is saved as one JSON file together with the commit, the machine and the
+vault spec, so runs on different commits can be compared with ``compare``.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Medians that moved by less than this are reported as unchanged
+NOISE_FRACTION = 0.05
+# Exact counts reported by ``compare`` whenever they differ
+COUNTS = ("controls", "materialized_rows", "payload_bytes")
+
+
+def measure(
+    fn: Callable[[], object],
+    repeat: int = 5,
+    setup: Optional[Callable[[], object]] = None,
+    warmup: int = 1,
+) -> Dict[str, float]:
+    """Time fn repeatedly.
+
+    Args:
+        fn: The call to time.
+        repeat: Number of timed runs.
+        setup: Called before every run (warmup included), outside the timing.
+        warmup: Untimed runs done first.
+
+    Returns:
+        ``min_ms``, ``median_ms``, ``mean_ms``, ``max_ms`` and ``runs``.
+    """
+    times = []
+    for run in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if run >= warmup:
+            times.append(elapsed * 1000)
+    return {
+        "min_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "max_ms": round(max(times), 3),
+        "runs": len(times),
+    }
+
+
+@contextmanager
+def use_vault(path: str):
+    """Point ``files_manager`` at the vault in path for the duration."""
+    from backend import files_manager
+
+    previous = files_manager.BASE_DIR
+    files_manager.BASE_DIR = path
+    files_manager.get_vault_index().invalidate()
+    try:
+        yield
+    finally:
+        files_manager.BASE_DIR = previous
+        files_manager.get_vault_index().invalidate()
+
+
+def environment() -> dict:
+    """Describe the commit and machine the benchmarks ran on."""
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_results(path: str, results: dict):
+    """Save a run (``{"environment", "spec", "benchmarks"}``) as JSON."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(old: dict, new: dict, out=sys.stdout):
+    """Print the median change of every timing present in both runs, and
+    every count in ``COUNTS`` that changed."""
+    old_benchmarks = old.get("benchmarks", {})
+    for name, metrics in sorted(new.get("benchmarks", {}).items()):
+        for count in COUNTS:
+            before = old_benchmarks.get(name, {}).get(count)
+            after = metrics.get(count)
+            if before is not None and after is not None and before != after:
+                print(f"{name:40} {count}: {before} -> {after}", file=out)
+        before = old_benchmarks.get(name, {}).get("median_ms")
+        after = metrics.get("median_ms")
+        if before is None or after is None:
+            continue
+        ratio = after / before if before else float("inf")
+        if abs(ratio - 1) < NOISE_FRACTION:
+            verdict = "unchanged"
+        elif ratio < 1:
+            verdict = "faster"
+        else:
+            verdict = "slower"
+        print(
+            f"{name:40} {before:10.3f} -> {after:10.3f} ms  x{ratio:.2f} {verdict}",
+            file=out,
+        )
+
+
+def _git(*args) -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", *args],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
@@ -0,0 +1,177 @@
+"""Synthetic vaults for the benchmarks.
+
+``generate_vault`` writes a reproducible vault: a folder tree ``depth``
+levels deep with ``fan_out`` subfolders per folder, ``notes`` markdown notes
+spread evenly over every folder, each about ``note_size`` characters of
+pseudo-random words (some accented, some repeated across notes, so search
+has realistic postings), and an ``.order.json`` per folder like the app
+writes. The same spec and seed always produce the same vault.
+
+Usage::
+
+    python -m benchmarks.vault_generator /tmp/vault --depth 3 --fan-out 4 \\
+        --notes 5000 --note-size 2000
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import List, NamedTuple
+
+ORDER_FILENAME = ".order.json"
+
+_WORDS = (
+    "alpha beta gamma delta epsilon theta lambda sigma omega vector matrix "
+    "tensor entropy energy momentum force field wave particle quantum atom "
+    "cell gene protein enzyme history empire revolution treaty economy "
+    "market theorem proof lemma integral derivative limit series graph "
+    "ação função equação relação solução física química história álgebra"
+).split()
+
+
+class VaultSpec(NamedTuple):
+    """Shape of a synthetic vault."""
+
+    depth: int = 2
+    fan_out: int = 4
+    notes: int = 1000
+    note_size: int = 2000
+    seed: int = 0
+
+
+class GeneratedVault(NamedTuple):
+    """What ``generate_vault`` wrote, as vault-relative paths."""
+
+    path: str
+    folders: List[str]
+    notes: List[str]
+
+
+def generate_vault(path: str, spec: VaultSpec = VaultSpec()) -> GeneratedVault:
+    """Write a synthetic vault under path (created if missing).
+
+    Args:
+        path: Directory to fill; existing files with the same names are
+            overwritten.
+        spec: Shape of the vault.
+
+    Returns:
+        The folders (parents before children) and notes that were written.
+    """
+    rng = random.Random(spec.seed)
+    folders = _folder_tree(spec.depth, spec.fan_out)
+    for folder in folders:
+        os.makedirs(os.path.join(path, folder), exist_ok=True)
+
+    # Notes round-robin over the folders; the root keeps only folders
+    note_folders = folders or [""]
+    by_folder = {folder: [] for folder in [""] + folders}
+    notes = []
+    for i in range(spec.notes):
+        folder = note_folders[i % len(note_folders)]
+        filename = f"note-{i:06d}.md"
+        with open(
+            os.path.join(path, folder, filename), "w", encoding="utf-8"
+        ) as f:
+            f.write(note_text(rng, i, spec.note_size))
+        by_folder[folder].append(filename)
+        notes.append(f"{folder}/{filename}" if folder else filename)
+
+    subfolders = {folder: [] for folder in by_folder}
+    for folder in folders:
+        parent, _, name = folder.rpartition("/")
+        subfolders[parent].append(name)
+    for folder, files in by_folder.items():
+        _write_order(os.path.join(path, folder), subfolders[folder], files)
+    return GeneratedVault(path, folders, notes)
+
+
+def load_vault(path: str) -> GeneratedVault:
+    """Describe an existing vault the way ``generate_vault`` would."""
+    folders = []
+    notes = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        rel = os.path.relpath(root, path)
+        folder = "" if rel == "." else rel.replace(os.sep, "/")
+        if folder:
+            folders.append(folder)
+        for name in sorted(files):
+            if name.endswith(".md") and not name.startswith("."):
+                notes.append(f"{folder}/{name}" if folder else name)
+    return GeneratedVault(path, folders, notes)
+
+
+def _folder_tree(depth: int, fan_out: int) -> List[str]:
+    folders = []
+    level = [""]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fan_out):
+                name = f"folder-{i:02d}"
+                next_level.append(f"{parent}/{name}" if parent else name)
+        folders.extend(next_level)
+        level = next_level
+    return folders
+
+
+def note_text(rng: random.Random, index: int, size: int) -> str:
+    """Return about size characters of markdown for note number index."""
+    lines = [f"# Note {index}", ""]
+    length = 0
+    line = []
+    while length < size:
+        word = rng.choice(_WORDS)
+        if rng.random() < 0.1:
+            word += str(rng.randint(0, 99))
+        line.append(word)
+        length += len(word) + 1
+        if len(line) >= 12:
+            lines.append(" ".join(line))
+            line = []
+    lines.append(" ".join(line))
+    return "\n".join(lines) + "\n"
+
+
+def _write_order(folder_path: str, folders: List[str], files: List[str]):
+    # Same shape as files_manager's order files: folders first here, with
+    # decreasing creation times so the order is stable
+    items = [{"name": name, "type": "folder"} for name in folders]
+    items += [{"name": name, "type": "file"} for name in files]
+    created = 1_700_000_000 + len(items)
+    for offset, item in enumerate(items):
+        item["created"] = created - offset
+    with open(
+        os.path.join(folder_path, ORDER_FILENAME), "w", encoding="utf-8"
+    ) as f:
+        json.dump({"items": items}, f, indent=2)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    """Add --depth, --fan-out, --notes, --note-size and --seed to parser."""
+    defaults = VaultSpec()
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument("--fan-out", type=int, default=defaults.fan_out)
+    parser.add_argument("--notes", type=int, default=defaults.notes)
+    parser.add_argument("--note-size", type=int, default=defaults.note_size)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args: argparse.Namespace) -> VaultSpec:
+    return VaultSpec(args.depth, args.fan_out, args.notes, args.note_size, args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic vault.")
+    parser.add_argument("path")
+    add_spec_arguments(parser)
+    args = parser.parse_args(argv)
+    spec = spec_from_args(args)
+    vault = generate_vault(args.path, spec)
+    print(f"{len(vault.folders)} folders, {len(vault.notes)} notes in {vault.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,4 +6,6 @@ def main(page: ft.Page):
     main_page(page)
 
 
-ft.app(target=main)
+# Guarded so worker processes (cold search indexing) can import this module
+if __name__ == "__main__":
+    ft.app(target=main)
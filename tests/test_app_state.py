@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+
+import pytest
+
+from backend import app_state
+from backend.app_state import AppStateStore
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_flush_writes_only_changed_state(tmp_path):
+    path = str(tmp_path / "app_state.json")
+    store = AppStateStore(path, interval=60)
+    store.update(theme="dark")
+    store.flush()
+    assert _read(path) == {"theme": "dark"}
+    assert store.stats()["writes"] == 1
+
+    store.update(theme="dark")
+    assert not store.is_dirty()
+    store.flush()
+    assert store.stats()["writes"] == 1
+    store.close()
+
+
+def test_store_reloads_saved_state(tmp_path):
+    path = str(tmp_path / "app_state.json")
+    store = AppStateStore(path, interval=60)
+    store.update(tabs=["A/n.md"], expanded={"A": True})
+    store.close()
+    assert AppStateStore(path).get("expanded") == {"A": True}
+
+
+def test_older_snapshot_never_lands_last(tmp_path, monkeypatch):
+    path = str(tmp_path / "app_state.json")
+    store = AppStateStore(path, interval=60)
+    started = threading.Event()
+    release = threading.Event()
+    real_write = app_state.write_text_atomic
+
+    def slow_write(target, text):
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        return real_write(target, text)
+
+    monkeypatch.setattr(app_state, "write_text_atomic", slow_write)
+    store.update(counter=1)
+    first = threading.Thread(target=store.flush)
+    first.start()
+    assert started.wait(5)
+    store.update(counter=2)
+    second = threading.Thread(target=store.flush)
+    second.start()
+    second.join(0.1)
+    # The second flush waits for the first write to be in place
+    assert second.is_alive()
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert _read(path) == {"counter": 2}
+    assert not store.is_dirty()
+    store.close()
+
+
+def test_failed_write_keeps_changes_dirty(tmp_path, monkeypatch):
+    path = str(tmp_path / "app_state.json")
+    store = AppStateStore(path, interval=60)
+
+    def failing_write(target, text):
+        raise OSError("read-only")
+
+    monkeypatch.setattr(app_state, "write_text_atomic", failing_write)
+    store.update(theme="dark")
+    with pytest.raises(OSError):
+        store.flush()
+    assert store.is_dirty()
+
+    monkeypatch.undo()
+    store.close()
+    assert _read(path) == {"theme": "dark"}
+
+
+def test_timer_retries_failed_writes_with_backoff(tmp_path, monkeypatch):
+    path = str(tmp_path / "app_state.json")
+    monkeypatch.setattr(app_state, "RETRY_DELAY", 0.05)
+    store = AppStateStore(path, interval=0)
+    real_write = app_state.write_text_atomic
+    attempts = []
+
+    def flaky_write(target, text):
+        attempts.append(time.monotonic())
+        if len(attempts) <= 3:
+            raise OSError("file is locked")
+        return real_write(target, text)
+
+    monkeypatch.setattr(app_state, "write_text_atomic", flaky_write)
+    store.update(theme="dark")
+    deadline = time.monotonic() + 5
+    while store.is_dirty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not store.is_dirty()
+    assert _read(path) == {"theme": "dark"}
+    assert len(attempts) == 4
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    # 0.05s, then 0.1s, then 0.2s
+    assert gaps[0] >= 0.04 and gaps[1] >= 0.09 and gaps[2] >= 0.19
+    store.close()
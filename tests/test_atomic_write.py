@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+from backend import atomic_write
+from backend.atomic_write import fsync_batch, remove_stale_tmp, write_text_atomic
+
+
+def _tmp_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+def test_write_skips_unchanged_content(tmp_path):
+    path = str(tmp_path / "note.md")
+
+    assert write_text_atomic(path, "hello") is True
+    assert write_text_atomic(path, "hello") is False
+    assert write_text_atomic(path, "hello again") is True
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "hello again"
+    assert _tmp_files(tmp_path) == []
+
+
+def test_batch_commits_at_end_of_block(tmp_path):
+    paths = [str(tmp_path / f"n{i}.md") for i in range(3)]
+
+    with fsync_batch():
+        for path in paths:
+            write_text_atomic(path, path)
+        assert not any(os.path.exists(path) for path in paths)
+        assert len(_tmp_files(tmp_path)) == 3
+
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == path
+    assert _tmp_files(tmp_path) == []
+
+
+def test_batch_fsync_failure_commits_nothing(tmp_path, monkeypatch):
+    paths = [str(tmp_path / f"n{i}.md") for i in range(3)]
+
+    def failing_fsync(fd):
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(atomic_write, "_fsync", failing_fsync)
+    with pytest.raises(OSError, match="disk gone"):
+        with fsync_batch():
+            for path in paths:
+                write_text_atomic(path, "text")
+
+    assert not any(os.path.exists(path) for path in paths)
+    assert _tmp_files(tmp_path) == []
+
+
+def test_batch_commit_failure_discards_the_rest(tmp_path, monkeypatch):
+    paths = [str(tmp_path / f"n{i}.md") for i in range(3)]
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if dst == paths[1]:
+            raise OSError("replace failed")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(atomic_write.os, "replace", replace)
+    with pytest.raises(OSError, match="replace failed"):
+        with fsync_batch():
+            for path in paths:
+                write_text_atomic(path, "text")
+
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1])
+    assert not os.path.exists(paths[2])
+    assert _tmp_files(tmp_path) == []
+
+
+def test_remove_stale_tmp(tmp_path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    old = time.time() - atomic_write.STALE_TMP_SECONDS - 10
+    stale = sub / ".note.md.1.0.tmp"
+    own = tmp_path / f".note.md.{os.getpid()}.0.tmp"
+    young = tmp_path / ".note.md.1.1.tmp"
+    other = tmp_path / "backup.tmp"
+    for path in (stale, own, young, other):
+        path.write_text("x")
+    for path in (stale, own, other):
+        os.utime(path, (old, old))
+
+    assert remove_stale_tmp(str(tmp_path), recursive=False) == 0
+    assert remove_stale_tmp(str(tmp_path)) == 1
+    assert not stale.exists()
+    assert own.exists() and young.exists() and other.exists()
@@ -0,0 +1,116 @@
+import threading
+from contextlib import contextmanager
+
+from backend.autosave import AutosaveEngine
+
+
+class Recorder:
+    def __init__(self):
+        self.writes = []
+        self.lock = threading.Lock()
+
+    def __call__(self, folder, filename, content):
+        with self.lock:
+            self.writes.append((folder, filename, content))
+        return True
+
+
+def test_flush_writes_latest_content_once():
+    writer = Recorder()
+    engine = AutosaveEngine(writer, idle_delay=60, max_delay=60)
+    try:
+        for text in ("a", "ab", "abc"):
+            engine.mark_dirty("A", "n.md", text)
+        assert engine.is_dirty("A", "n.md")
+        engine.flush()
+        assert writer.writes == [("A", "n.md", "abc")]
+        assert not engine.is_dirty("A", "n.md")
+        assert engine.stats()["writes_avoided"] == 2
+    finally:
+        engine.close()
+
+
+def test_flush_limited_to_folder():
+    writer = Recorder()
+    engine = AutosaveEngine(writer, idle_delay=60, max_delay=60)
+    try:
+        engine.mark_dirty("A", "n.md", "in A")
+        engine.mark_dirty("A/sub", "n.md", "in A/sub")
+        engine.mark_dirty("AB", "n.md", "in AB")
+        engine.flush("A")
+        assert sorted(writer.writes) == [
+            ("A", "n.md", "in A"),
+            ("A/sub", "n.md", "in A/sub"),
+        ]
+        assert engine.is_dirty("AB", "n.md")
+    finally:
+        engine.close()
+
+
+def test_flush_waits_for_background_write():
+    started = threading.Event()
+    release = threading.Event()
+    writes = []
+
+    def writer(folder, filename, content):
+        if not writes:
+            started.set()
+            release.wait(5)
+        writes.append(content)
+
+    engine = AutosaveEngine(writer, idle_delay=0.01, max_delay=0.01)
+    try:
+        engine.mark_dirty("A", "n.md", "old")
+        assert started.wait(5)
+        engine.mark_dirty("A", "n.md", "new")
+        flusher = threading.Thread(target=engine.flush)
+        flusher.start()
+        flusher.join(0.1)
+        # The flush must not overtake the write already in progress
+        assert flusher.is_alive()
+        release.set()
+        flusher.join(5)
+        assert writes == ["old", "new"]
+    finally:
+        release.set()
+        engine.close()
+
+
+def test_close_flushes_pending_changes():
+    writer = Recorder()
+    engine = AutosaveEngine(writer, idle_delay=60, max_delay=60)
+    engine.mark_dirty("A", "n.md", "text")
+    engine.close()
+    assert writer.writes == [("A", "n.md", "text")]
+    engine._thread.join(2)
+    assert not engine._thread.is_alive()
+
+
+def test_discard_drops_pending_changes():
+    writer = Recorder()
+    engine = AutosaveEngine(writer, idle_delay=60, max_delay=60)
+    engine.mark_dirty("A", "n.md", "text")
+    engine.mark_dirty("B", "n.md", "text")
+    assert engine.discard("A") == 1
+    engine.close()
+    assert writer.writes == [("B", "n.md", "text")]
+
+
+def test_writes_hold_the_lock_of_their_notes():
+    held = []
+    writer_saw = []
+
+    @contextmanager
+    def lock(keys):
+        held.append(sorted(keys))
+        yield
+        held.append(None)
+
+    def writer(folder, filename, content):
+        writer_saw.append(list(held))
+
+    engine = AutosaveEngine(writer, idle_delay=60, max_delay=60, lock=lock)
+    engine.mark_dirty("A", "n.md", "text")
+    engine.close()
+    assert writer_saw == [[[("A", "n.md")]]]
+    assert held == [[("A", "n.md")], None]
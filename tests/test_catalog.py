@@ -0,0 +1,114 @@
+import os
+import threading
+
+import pytest
+
+from backend import catalog as catalog_module
+from backend import files_manager
+from backend.catalog import Catalog, fts5_available
+
+pytestmark = pytest.mark.skipif(not fts5_available(), reason="sqlite3 lacks FTS5")
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    base = tmp_path / "vault"
+    base.mkdir()
+    monkeypatch.setattr(files_manager, "BASE_DIR", str(base))
+    files_manager.create_folder("Notebooks")
+    files_manager.create_subfolder("Notebooks", "Physics")
+    files_manager.create_file("Notebooks/Physics", "a")
+    files_manager.save_markdown_file("Notebooks/Physics", "a.md", "entropy rises")
+    for i in range(5):
+        files_manager.create_file("Notebooks", f"n{i}")
+        files_manager.save_markdown_file("Notebooks", f"n{i}.md", f"note {i}")
+    return base
+
+
+@pytest.fixture
+def catalog(vault, tmp_path):
+    catalog = Catalog(str(tmp_path / "catalog.sqlite3"), str(vault))
+    unsubscribe = files_manager.get_event_bus().subscribe(
+        catalog.apply_events, catalog.resync
+    )
+    yield catalog
+    unsubscribe()
+    catalog.wait_applied()
+    catalog.close()
+
+
+def _found(catalog, text):
+    return sorted((n.folder, n.filename) for n in catalog.find_notes(text=text))
+
+
+def test_reconcile_in_chunks(catalog, vault, monkeypatch):
+    monkeypatch.setattr(catalog_module, "RECONCILE_CHUNK", 2)
+    assert catalog.reconcile() == 6
+    assert catalog.stats() == {"notes": 6, "folders": 2}
+    assert _found(catalog, "entropy") == [("Notebooks/Physics", "a.md")]
+    assert catalog.reconcile() == 0
+
+    # Changed while the app was closed
+    (vault / "Notebooks" / "Physics" / "a.md").write_text("entropy falls again")
+    os.remove(vault / "Notebooks" / "n0.md")
+    assert catalog.reconcile() == 1
+    assert _found(catalog, "falls") == [("Notebooks/Physics", "a.md")]
+    assert catalog.stats()["notes"] == 5
+
+
+def test_reconcile_drops_removed_folders(catalog, vault):
+    catalog.reconcile()
+    for name in os.listdir(vault / "Notebooks" / "Physics"):
+        os.remove(vault / "Notebooks" / "Physics" / name)
+    os.rmdir(vault / "Notebooks" / "Physics")
+    catalog.reconcile()
+    assert _found(catalog, "entropy") == []
+    assert catalog.stats()["folders"] == 1
+
+
+def test_events_are_applied_on_the_catalog_thread(catalog, monkeypatch):
+    catalog.reconcile()
+    readers = []
+    read = catalog._read
+
+    def tracking_read(folder, filename):
+        readers.append(threading.current_thread().name)
+        return read(folder, filename)
+
+    monkeypatch.setattr(catalog, "_read", tracking_read)
+    with files_manager.get_event_bus().batch():
+        files_manager.get_event_bus().publish("saved", "Notebooks", "n1.md")
+    files_manager.rename_folder("Notebooks/Physics", "Phys")
+    catalog.wait_applied()
+
+    assert readers == ["catalog"]
+    assert _found(catalog, "entropy") == [("Notebooks/Phys", "a.md")]
+
+
+def test_resync_is_queued(catalog, vault):
+    catalog.resync()
+    catalog.wait_applied()
+    assert catalog.stats()["notes"] == 6
+
+
+def test_database_lives_outside_the_vault(vault, tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_module, "_catalog", None)
+    old = vault / ".catalog.sqlite3"
+    old.write_text("")
+    (vault / ".catalog.sqlite3-wal").write_text("")
+    state_dir = tmp_path / "state"
+    state_dir.mkdir()
+
+    catalog = catalog_module.get_catalog(str(state_dir))
+    try:
+        assert catalog.path == str(state_dir / "catalog.sqlite3")
+        catalog.resync()
+        catalog.wait_applied()
+        assert not any(name.startswith(".catalog") for name in os.listdir(vault))
+        assert "catalog.sqlite3" in os.listdir(state_dir)
+    finally:
+        catalog.close()
+        bus = files_manager.get_event_bus()
+        bus._subscriptions = [
+            s for s in bus._subscriptions if s.on_events != catalog.apply_events
+        ]
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from backend import cold_index
+from backend.search_index import INDEX_FILENAME, SearchIndex
+from backend.search_store import open_segment
+
+WORDS = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+
+
+@pytest.fixture
+def vault(tmp_path):
+    for i in range(30):
+        folder = tmp_path / ("A" if i % 3 else "B/sub")
+        folder.mkdir(parents=True, exist_ok=True)
+        words = [WORDS[(i * k) % len(WORDS)] for k in range(1, 6 + i % 4)]
+        (folder / f"n{i:02}.md").write_text(
+            f"Note {i}\n" + " ".join(words), encoding="utf-8"
+        )
+    # Skipped by both builds
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / ".hidden" / "h.md").write_text("alpha", encoding="utf-8")
+    (tmp_path / "A" / "notes.txt").write_text("alpha", encoding="utf-8")
+    return tmp_path
+
+
+def _reader(base):
+    def read(folder, filename):
+        with open(os.path.join(base, folder, filename), encoding="utf-8") as f:
+            return f.read()
+
+    return read
+
+
+def _contents(path):
+    # The segment keyed by note rather than doc id, so that builds that
+    # number the notes differently compare equal
+    segment = open_segment(path)
+    assert segment is not None
+    try:
+        keys = [(note.folder, note.filename) for note in segment.notes]
+        notes = {key: note for key, note in zip(keys, segment.notes)}
+        postings = {}
+        for term in segment.iter_terms():
+            docs = segment.postings(term)
+            postings[term] = {keys[doc_id]: list(docs[doc_id]) for doc_id in docs}
+    finally:
+        segment.close()
+    return notes, postings
+
+
+def _build(vault):
+    index = SearchIndex(_reader(vault))
+    progress = []
+    index.on_progress = lambda done, total: progress.append((done, total))
+    index.ensure_built(str(vault))
+    assert index.is_built()
+    return index, progress, _contents(str(vault / INDEX_FILENAME))
+
+
+def test_parallel_build_matches_serial_build(vault, monkeypatch):
+    serial_index, progress, serial = _build(vault)
+    assert progress == []
+    os.remove(vault / INDEX_FILENAME)
+
+    monkeypatch.setattr(cold_index, "PARALLEL_MIN_NOTES", 10)
+    monkeypatch.setattr(cold_index, "CHUNK_SIZE", 4)
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    parallel_index, progress, parallel = _build(vault)
+
+    # 30 notes in chunks of 4
+    assert len(progress) == 8 + 1
+    assert progress[-1] == (30, 30)
+    assert [done for done, _ in progress[:-1]] == sorted(d for d, _ in progress[:-1])
+    assert parallel == serial
+    assert len(parallel[0]) == 30
+    for query in ("alpha", "gam", "note 7", "beta delta"):
+        assert [
+            (r.folder, r.filename, r.score) for r in parallel_index.search(query)
+        ] == [(r.folder, r.filename, r.score) for r in serial_index.search(query)]
+
+
+def test_small_vaults_are_not_parallelized(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert not cold_index.should_parallelize(cold_index.PARALLEL_MIN_NOTES - 1)
+    assert cold_index.should_parallelize(cold_index.PARALLEL_MIN_NOTES)
+    monkeypatch.setattr(os, "cpu_count", lambda: 1)
+    assert not cold_index.should_parallelize(cold_index.PARALLEL_MIN_NOTES)
+
+
+def test_merge_partials_shifts_doc_ids():
+    first = (["a", "b"], {"x": {0: [1], 1: [0]}})
+    second = (["c"], {"x": {0: [2]}, "y": {0: [0]}})
+
+    notes, postings = cold_index.merge_partials([first, second])
+
+    assert notes == ["a", "b", "c"]
+    assert postings == {"x": {0: [1], 1: [0], 2: [2]}, "y": {2: [0]}}
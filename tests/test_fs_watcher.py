@@ -0,0 +1,136 @@
+import os
+import struct
+import threading
+import time
+
+from backend import files_manager, fs_watcher
+from backend.fs_watcher import FsEvent, _InotifyBackend, coalesce, watch_vault
+
+_HEADER = struct.Struct("iIII")
+
+
+def _backend(folders):
+    # A backend over fake watch descriptors, without an inotify fd
+    backend = _InotifyBackend.__new__(_InotifyBackend)
+    backend.base_dir = "/vault"
+    backend.fd = -1
+    backend._paths = {wd: folder for wd, folder in enumerate(folders, 1)}
+    backend._wds = {folder: wd for wd, folder in backend._paths.items()}
+    return backend
+
+
+def _event(wd, mask, name="", cookie=0):
+    raw = os.fsencode(name)
+    if raw:
+        raw += b"\0" * (16 - len(raw) % 16)
+    return _HEADER.pack(wd, mask, cookie, len(raw)) + raw
+
+
+def test_paired_move_becomes_one_moved_event():
+    backend = _backend(["", "A", "B"])
+    data = _event(2, fs_watcher._IN_MOVED_FROM, "n.md", cookie=7) + _event(
+        3, fs_watcher._IN_MOVED_TO, "m.md", cookie=7
+    )
+    assert backend._parse(data) == [FsEvent("moved", "A/n.md", False, "B/m.md")]
+
+
+def test_move_out_of_vault_is_a_delete():
+    backend = _backend(["", "A", "A/sub"])
+    data = _event(1, fs_watcher._IN_MOVED_FROM | fs_watcher._IN_ISDIR, "A", 3)
+    assert backend._parse(data) == [FsEvent("deleted", "A", True)]
+    assert backend._wds == {"": 1}
+    assert backend._paths == {1: ""}
+
+
+def test_move_into_vault_is_a_create():
+    backend = _backend(["", "A"])
+    data = _event(2, fs_watcher._IN_MOVED_TO, "n.md", cookie=9)
+    assert backend._parse(data) == [FsEvent("created", "A/n.md", False)]
+
+
+def test_folder_move_keeps_watches_of_subfolders():
+    backend = _backend(["", "A", "A/sub"])
+    isdir = fs_watcher._IN_ISDIR
+    data = _event(1, fs_watcher._IN_MOVED_FROM | isdir, "A", cookie=4) + _event(
+        1, fs_watcher._IN_MOVED_TO | isdir, "C", cookie=4
+    )
+    assert backend._parse(data) == [FsEvent("moved", "A", True, "C")]
+    assert backend._wds == {"": 1, "C": 2, "C/sub": 3}
+    assert backend._paths == {1: "", 2: "C", 3: "C/sub"}
+
+
+def test_irrelevant_names_and_overflow():
+    backend = _backend([""])
+    data = (
+        _event(1, fs_watcher._IN_CLOSE_WRITE, ".n.md.1.0.tmp")
+        + _event(1, fs_watcher._IN_CLOSE_WRITE, "image.png")
+        + _event(1, fs_watcher._IN_CLOSE_WRITE, "n.md")
+        + _event(-1, fs_watcher._IN_Q_OVERFLOW)
+    )
+    assert backend._parse(data) == [
+        FsEvent("modified", "n.md", False),
+        FsEvent("resync", "", True),
+    ]
+
+
+def test_coalesce_keeps_last_event_per_path():
+    events = [
+        FsEvent("modified", "n.md", False),
+        FsEvent("created", "m.md", False),
+        FsEvent("modified", "n.md", False),
+    ]
+    assert coalesce(events) == [
+        FsEvent("created", "m.md", False),
+        FsEvent("modified", "n.md", False),
+    ]
+    assert coalesce(events + [FsEvent("resync", "", True)]) == [
+        FsEvent("resync", "", True)
+    ]
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_one_watcher_per_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(files_manager, "BASE_DIR", str(tmp_path))
+    published = []
+    unsubscribe = files_manager.get_event_bus().subscribe(published.extend)
+    seen = {"first": [], "second": []}
+    called_from = set()
+
+    def listener(name):
+        def on_events(events, tree_changed):
+            called_from.add(threading.current_thread().name)
+            seen[name].extend(events)
+
+        return on_events
+
+    unwatch_first = watch_vault(listener("first"))
+    unwatch_second = watch_vault(listener("second"))
+    try:
+        watcher = fs_watcher._watcher
+        assert watcher is not None
+        # The backend walks the vault on the watcher thread
+        assert _wait(lambda: watcher.backend_name is not None)
+        (tmp_path / "n.md").write_text("external")
+        assert _wait(lambda: seen["first"] and seen["second"])
+    finally:
+        unwatch_first()
+        unwatch_second()
+        unsubscribe()
+
+    assert seen["first"] == seen["second"]
+    assert called_from == {"vault-watcher"}
+    # Published once, not once per listener
+    assert [(e.kind, e.name) for e in published] == [
+        ("created", "n.md"),
+        ("saved", "n.md"),
+    ]
+    assert fs_watcher._watcher is None
+    assert not watcher._thread.is_alive()
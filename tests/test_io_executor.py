@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+
+from backend import files_manager, io_executor
+from backend.io_executor import IOExecutor, _overlaps
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = IOExecutor(max_workers=4)
+    monkeypatch.setattr(io_executor, "_executor", executor)
+    yield executor
+    executor.shutdown()
+
+
+def _blocker():
+    started = threading.Event()
+    release = threading.Event()
+
+    def run(*args):
+        started.set()
+        assert release.wait(TIMEOUT)
+        return args
+
+    return run, started, release
+
+
+def _fail():
+    raise OSError("disk full")
+
+
+def test_overlaps():
+    assert _overlaps("A", "A")
+    assert _overlaps("A", "A/sub/n.md")
+    assert _overlaps("A/sub", "A")
+    assert not _overlaps("A", "AB")
+    assert not _overlaps("A/n.md", "A/m.md")
+    # "" is the whole vault
+    assert _overlaps("", "A/n.md")
+    assert _overlaps("B", "")
+    assert _overlaps("", "")
+
+
+def test_overlapping_tasks_run_in_order_and_others_in_parallel(executor):
+    run, started, release = _blocker()
+    first = executor.submit(["A"], run)
+    assert started.wait(TIMEOUT)
+
+    inside = executor.submit(["A/n.md"], lambda: "inside")
+    unrelated = executor.submit(["B"], lambda: "unrelated")
+    assert unrelated.result(TIMEOUT) == "unrelated"
+    assert not inside.done()
+
+    release.set()
+    first.result(TIMEOUT)
+    assert inside.result(TIMEOUT) == "inside"
+
+
+def test_shared_tasks_run_together_but_not_with_a_writer(executor):
+    run, started, release = _blocker()
+    reader = executor.submit(["A/n.md"], run, shared=True)
+    assert started.wait(TIMEOUT)
+
+    other_reader = executor.submit(["A/n.md"], lambda: "read", shared=True)
+    assert other_reader.result(TIMEOUT) == "read"
+    writer = executor.submit(["A/n.md"], lambda: "written")
+    assert not writer.done()
+
+    release.set()
+    reader.result(TIMEOUT)
+    assert writer.result(TIMEOUT) == "written"
+
+
+def test_rename_folder_locks_the_parent(executor, monkeypatch):
+    run, started, release = _blocker()
+    monkeypatch.setattr(files_manager, "rename_folder", run)
+    rename = io_executor.rename_folder("P/old", "new")
+    assert started.wait(TIMEOUT)
+
+    # A sibling shares the parent's .order.json
+    sibling = executor.submit(["P/sibling"], lambda: "sibling")
+    elsewhere = executor.submit(["Q"], lambda: "elsewhere")
+    assert elsewhere.result(TIMEOUT) == "elsewhere"
+    assert not sibling.done()
+
+    release.set()
+    assert rename.result(TIMEOUT) == ("P/old", "new")
+    assert sibling.result(TIMEOUT) == "sibling"
+
+
+def test_hold_notes_waits_for_a_running_task(executor):
+    run, started, release = _blocker()
+    task = executor.submit(["A"], run)
+    assert started.wait(TIMEOUT)
+    entered = threading.Event()
+
+    def write():
+        with io_executor.hold_notes([("A", "n.md")]):
+            entered.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    assert not entered.wait(0.2)
+
+    release.set()
+    task.result(TIMEOUT)
+    assert entered.wait(TIMEOUT)
+    writer.join(TIMEOUT)
+
+
+def test_tasks_wait_for_a_hold(executor):
+    with io_executor.hold_notes([("A", "n.md")]):
+        unrelated = executor.submit(["A/m.md"], lambda: "unrelated")
+        assert unrelated.result(TIMEOUT) == "unrelated"
+        task = executor.submit(["A"], lambda: "done")
+        assert not task.done()
+    assert task.result(TIMEOUT) == "done"
+
+
+def test_callbacks_go_through_the_dispatcher(executor):
+    dispatched = []
+    done = threading.Event()
+
+    def dispatcher(fn, *args):
+        dispatched.append(fn.__name__)
+        fn(*args)
+        done.set()
+
+    results = []
+
+    def on_done(result):
+        results.append(result)
+
+    def on_error(exc):
+        results.append(exc)
+
+    executor.submit(["A"], lambda: 42, on_done=on_done, dispatcher=dispatcher)
+    assert done.wait(TIMEOUT)
+    done.clear()
+    executor.submit(["A"], _fail, on_error=on_error, dispatcher=dispatcher)
+    assert done.wait(TIMEOUT)
+
+    assert dispatched == ["on_done", "on_error"]
+    assert results[0] == 42
+    assert isinstance(results[1], OSError)
+    stats = executor.stats()
+    assert stats["completed"] == 1 and stats["failed"] == 1
@@ -0,0 +1,116 @@
+import sys
+import threading
+
+import pytest
+
+from backend import files_manager
+from backend.note_buffers import NoteBufferCache
+
+TEXT = "x" * 1000
+SIZE = sys.getsizeof(TEXT)
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    monkeypatch.setattr(files_manager, "BASE_DIR", str(tmp_path))
+    (tmp_path / "A").mkdir()
+    for name in ("a.md", "b.md", "c.md"):
+        (tmp_path / "A" / name).write_text(TEXT, encoding="utf-8")
+    return tmp_path
+
+
+def test_clean_buffers_are_evicted_least_recently_used_first(vault):
+    cache = NoteBufferCache(budget_bytes=2 * SIZE)
+    cache.get("A", "a.md")
+    cache.get("A", "b.md")
+    cache.get("A", "a.md")
+    cache.get("A", "c.md")
+
+    stats = cache.stats()
+    assert stats["buffers"] == 2
+    assert stats["bytes"] <= cache.budget_bytes
+    assert stats["evictions"] == 1
+    # b.md was the least recently used
+    cache.get("A", "a.md")
+    cache.get("A", "c.md")
+    assert cache.stats()["misses"] == 3
+    cache.get("A", "b.md")
+    assert cache.stats()["misses"] == 4
+
+
+def test_changed_file_is_reloaded(vault):
+    cache = NoteBufferCache()
+    assert cache.get("A", "a.md") == TEXT
+    (vault / "A" / "a.md").write_text("changed", encoding="utf-8")
+
+    assert cache.get("A", "a.md") == "changed"
+    assert cache.stats()["reloads"] == 1
+
+
+def test_dirty_buffers_are_never_evicted_and_scheduled_once(vault):
+    scheduled = []
+    cache = None
+
+    def schedule_write(folder, filename, text):
+        # Must be called without the cache lock held
+        other = threading.Thread(target=cache.is_dirty, args=(folder, filename))
+        other.start()
+        other.join(timeout=2)
+        assert not other.is_alive()
+        scheduled.append((folder, filename, text))
+
+    cache = NoteBufferCache(budget_bytes=SIZE, schedule_write=schedule_write)
+    cache.put("A", "a.md", "a" * 1000)
+    cache.get("A", "b.md")
+    cache.get("A", "c.md")
+
+    assert cache.is_dirty("A", "a.md")
+    assert cache.get("A", "a.md") == "a" * 1000
+    assert scheduled == [("A", "a.md", "a" * 1000)]
+
+    # Edited again: scheduled again with the new text
+    cache.put("A", "a.md", "b" * 1000)
+    cache.get("A", "b.md")
+    assert scheduled[-1] == ("A", "a.md", "b" * 1000)
+    assert len(scheduled) == 2
+
+
+def test_mark_saved_lets_a_dirty_buffer_be_evicted(vault):
+    cache = NoteBufferCache(budget_bytes=SIZE, schedule_write=lambda *args: None)
+    cache.put("A", "a.md", "a" * 1000)
+    cache.get("A", "b.md")
+    assert cache.stats()["buffers"] == 2
+
+    # A stale save (older text) keeps the buffer dirty
+    cache.mark_saved("A", "a.md", "old")
+    assert cache.is_dirty("A", "a.md")
+
+    (vault / "A" / "a.md").write_text("a" * 1000, encoding="utf-8")
+    cache.mark_saved("A", "a.md", "a" * 1000)
+    assert not cache.is_dirty("A", "a.md")
+    stats = cache.stats()
+    assert stats["buffers"] == 1
+    assert stats["bytes"] <= cache.budget_bytes
+
+
+def test_without_schedule_write_dirty_buffers_stay(vault):
+    cache = NoteBufferCache(budget_bytes=SIZE)
+    cache.put("A", "a.md", "a" * 1000)
+    cache.put("A", "b.md", "b" * 1000)
+    cache.get("A", "c.md")
+
+    assert cache.is_dirty("A", "a.md") and cache.is_dirty("A", "b.md")
+    assert cache.get("A", "a.md") == "a" * 1000
+
+
+def test_discard_drops_a_folder_subtree(vault):
+    cache = NoteBufferCache()
+    cache.get("A", "a.md")
+    cache.put("A/sub", "n.md", "text")
+    cache.put("AB", "n.md", "text")
+
+    cache.discard("A")
+
+    stats = cache.stats()
+    assert stats["buffers"] == 1
+    assert cache.is_dirty("AB", "n.md")
@@ -0,0 +1,85 @@
+import pytest
+
+from backend.quick_open import (
+    TIER_FUZZY,
+    TIER_NAME_PREFIX,
+    TIER_NAME_SUBSTRING,
+    QuickOpenIndex,
+    fold,
+)
+
+
+@pytest.mark.parametrize(
+    "text, folded",
+    [
+        ("Notebooks/Archive.md", "notebooks/archive.md"),
+        ("Reunião Ação", "reuniao acao"),
+        ("İstanbul", "istanbul"),
+        ("ﬁle", "fle"),
+    ],
+)
+def test_fold_keeps_length(text, folded):
+    assert fold(text) == folded
+    assert len(fold(text)) == len(text)
+
+
+@pytest.fixture
+def index(tmp_path):
+    for path in (
+        "Notebooks/Archive.md",
+        "Notebooks/Todo.md",
+        "Arch/readme.md",
+        "Work/search notes.md",
+        "Work/Reunião semanal.md",
+        "archived.md",
+    ):
+        note = tmp_path / path
+        note.parent.mkdir(parents=True, exist_ok=True)
+        note.write_text("")
+    index = QuickOpenIndex()
+    index.ensure_built(str(tmp_path))
+    return index
+
+
+def _names(matches):
+    return [(m.folder, m.filename) for m in matches]
+
+
+def test_empty_query_lists_notes_in_order(index):
+    assert _names(index.search("", limit=3)) == [
+        ("", "archived.md"),
+        ("Arch", "readme.md"),
+        ("Notebooks", "Archive.md"),
+    ]
+
+
+def test_tiers_rank_name_prefix_first(index):
+    matches = index.search("arch")
+    tiers = [m.tier for m in matches]
+    assert tiers == sorted(tiers, reverse=True)
+    assert {(m.folder, m.filename) for m in matches if m.tier == TIER_NAME_PREFIX} == {
+        ("", "archived.md"),
+        ("Notebooks", "Archive.md"),
+    }
+    assert ("Work", "search notes.md") in [
+        (m.folder, m.filename) for m in matches if m.tier == TIER_NAME_SUBSTRING
+    ]
+    assert ("Arch", "readme.md") in [
+        (m.folder, m.filename) for m in matches if m.tier == TIER_FUZZY
+    ]
+
+
+def test_fuzzy_subsequence_and_accents(index):
+    assert ("Notebooks", "Archive.md") in _names(index.search("nbarch"))
+    assert _names(index.search("reuniao")) == [("Work", "Reunião semanal.md")]
+    assert _names(index.search("arch tod")) == []
+    assert _names(index.search("note tod")) == [("Notebooks", "Todo.md")]
+
+
+def test_narrowed_query_matches_full_scan(index, tmp_path):
+    index.search("a")
+    narrowed = index.search("ar")
+    fresh = QuickOpenIndex()
+    fresh.ensure_built(str(tmp_path))
+    assert _names(narrowed) == _names(fresh.search("ar"))
+    assert index.search("zzz") == []
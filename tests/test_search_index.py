@@ -0,0 +1,75 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from backend import files_manager
+from backend.search_index import SearchIndex
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    monkeypatch.setattr(files_manager, "BASE_DIR", str(tmp_path))
+    (tmp_path / "A").mkdir()
+    (tmp_path / "A" / "x.md").write_text("hello world", encoding="utf-8")
+    return tmp_path
+
+
+def _reader(base):
+    def read(folder, filename):
+        with open(os.path.join(base, folder, filename), encoding="utf-8") as f:
+            return f.read()
+
+    return read
+
+
+def _event(kind, folder, name, **fields):
+    path = f"{folder}/{name}" if folder else name
+    return SimpleNamespace(
+        kind=kind,
+        folder=folder,
+        name=name,
+        path=path,
+        is_dir=False,
+        text=None,
+        **fields,
+    )
+
+
+def _found(index, query):
+    return [(r.folder, r.filename) for r in index.search(query)]
+
+
+def test_unreadable_note_is_removed(vault):
+    index = SearchIndex(_reader(vault))
+    index.ensure_built(str(vault))
+    assert _found(index, "hello") == [("A", "x.md")]
+
+    # Deleted again before the index got to read it
+    os.remove(vault / "A" / "x.md")
+    (vault / "A" / "y.md").write_text("goodbye", encoding="utf-8")
+    index.apply_events([_event("saved", "A", "x.md")])
+    index.apply_events([_event("created", "A", "y.md")])
+    index.wait_applied()
+
+    assert index.is_built()
+    assert _found(index, "hello") == []
+    assert _found(index, "goodbye") == [("A", "y.md")]
+
+
+def test_invalidate_during_build_is_kept(vault):
+    read = _reader(vault)
+    calls = []
+
+    def reader(folder, filename):
+        calls.append(filename)
+        if len(calls) == 1:
+            index.invalidate()
+        return read(folder, filename)
+
+    index = SearchIndex(reader)
+    index.ensure_built(str(vault))
+    assert not index.is_built()
+    index.ensure_built(str(vault))
+    assert index.is_built()
+    assert _found(index, "hello") == [("A", "x.md")]
@@ -0,0 +1,73 @@
+import os
+
+from backend.search_store import (
+    SegmentNote,
+    decode_postings,
+    encode_postings,
+    open_segment,
+    write_segment,
+)
+
+NOTES = [
+    SegmentNote("", "a.md", 1_000, 10, 3),
+    SegmentNote("Área/sub", "b.md", 2_000, 20, 2),
+]
+# In sorted term order, as write_segment expects
+POSTINGS = [
+    ("alpha", {0: [0, 2]}),
+    ("alphabet", {1: [1]}),
+    ("ação", {1: [5, 9, 300]}),
+    ("beta", {0: [1], 1: [0]}),
+]
+
+
+def test_postings_round_trip():
+    postings = {0: [0, 1, 200], 7: [3], 1000: [0, 5_000_000]}
+    data = encode_postings(postings)
+    assert decode_postings(data, len(postings)) == postings
+
+
+def test_segment_round_trip(tmp_path):
+    path = str(tmp_path / ".search_index")
+    write_segment(path, NOTES, iter(POSTINGS))
+
+    segment = open_segment(path)
+    try:
+        assert segment.notes == NOTES
+        assert list(segment.iter_terms()) == [term for term, _ in POSTINGS]
+        for term, postings in POSTINGS:
+            assert segment.postings(term) == postings
+        assert segment.postings("gamma") == {}
+        assert segment.has("beta") and not segment.has("bet")
+        assert segment.prefixed("alp", 10) == ["alpha", "alphabet"]
+        assert segment.prefixed("alp", 1) == ["alpha"]
+    finally:
+        segment.close()
+    assert os.listdir(tmp_path) == [".search_index"]
+
+
+def test_rewrite_releases_the_mapping_first(tmp_path):
+    path = str(tmp_path / ".search_index")
+    write_segment(path, NOTES, iter(POSTINGS))
+    segment = open_segment(path)
+    released = []
+
+    def release():
+        released.append(True)
+        segment.close()
+
+    write_segment(path, NOTES[:1], iter(POSTINGS[:1]), release=release)
+    assert released == [True]
+    segment = open_segment(path)
+    try:
+        assert segment.notes == NOTES[:1]
+        assert list(segment.iter_terms()) == ["alpha"]
+    finally:
+        segment.close()
+
+
+def test_missing_or_corrupt_segment(tmp_path):
+    path = tmp_path / ".search_index"
+    assert open_segment(str(path)) is None
+    path.write_bytes(b"not a segment at all" * 10)
+    assert open_segment(str(path)) is None
@@ -0,0 +1,181 @@
+import logging
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend import slow_ops
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, ms):
+        self.now += ms / 1000
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(
+        slow_ops, "time", SimpleNamespace(perf_counter=clock, strftime=time.strftime)
+    )
+    monkeypatch.setattr(slow_ops, "_thresholds", dict(slow_ops.DEFAULT_THRESHOLDS_MS))
+    monkeypatch.setattr(slow_ops, "_default_threshold", slow_ops.DEFAULT_THRESHOLD_MS)
+    monkeypatch.setattr(slow_ops, "_vault_size", None)
+    monkeypatch.setattr(slow_ops, "_log_path", None)
+    slow_ops._close_logger()
+    slow_ops.configure(log_dir=str(tmp_path), thresholds={"default": 0})
+    yield clock
+    slow_ops._close_logger()
+
+
+def test_nested_phases_are_not_charged_twice(clock):
+    op = slow_ops.begin("ui.rename_file", {"filename": "n.md"})
+    with op:
+        with slow_ops.phase("build"):
+            clock.advance(10)
+            with slow_ops.phase("io"):
+                clock.advance(5)
+            clock.advance(3)
+        clock.advance(2)
+    entry = op.finish()
+
+    assert entry["phases"] == pytest.approx({"build": 13.0, "io": 5.0, "other": 2.0})
+    assert entry["total_ms"] == pytest.approx(20.0)
+    assert entry["args"] == {"filename": "n.md"}
+    assert slow_ops.read_entries() == [entry]
+
+
+def test_lap_does_not_charge_phases_again(clock):
+    op = slow_ops.begin("ui.rename_folder")
+    with op:
+        with slow_ops.phase("build"):
+            clock.advance(20)
+    clock.advance(30)
+    op.lap("io")
+    assert op.phases == pytest.approx({"build": 20.0, "io": 30.0})
+
+    with op:
+        with slow_ops.phase("update"):
+            clock.advance(5)
+    clock.advance(10)
+    op.lap("search")
+    assert op.phases == pytest.approx(
+        {"build": 20.0, "io": 30.0, "update": 5.0, "search": 10.0}
+    )
+
+
+def test_ends_hands_the_action_to_the_callback_thread(clock):
+    op = slow_ops.begin("ui.rename_file")
+    with op:
+        with slow_ops.phase("build"):
+            clock.advance(2)
+    seen = []
+
+    def on_done(result):
+        seen.append((result, slow_ops.current()))
+        with slow_ops.phase("update"):
+            clock.advance(5)
+
+    callback = op.ends(on_done)
+    clock.advance(40)
+    worker = threading.Thread(target=callback, args=("renamed",))
+    worker.start()
+    worker.join()
+
+    assert seen == [("renamed", op)]
+    assert slow_ops.current() is None
+    (entry,) = slow_ops.read_entries()
+    assert entry["phases"] == pytest.approx(
+        {"build": 2.0, "io": 40.0, "update": 5.0, "other": 0.0}
+    )
+    assert not entry["failed"]
+    # Already finished: not logged again
+    assert op.finish() is None
+
+
+def test_ends_logs_failed_callbacks(clock):
+    op = slow_ops.begin("ui.rename_file")
+    op.ends(lambda exc: None, failed=True)(OSError("busy"))
+
+    def on_done(result):
+        raise ValueError(result)
+
+    other = slow_ops.begin("ui.rename_file")
+    with pytest.raises(ValueError):
+        other.ends(on_done)("bad")
+
+    assert [entry["failed"] for entry in slow_ops.read_entries()] == [True, True]
+
+
+def test_nested_action_is_part_of_the_outer_one(clock):
+    @slow_ops.action("ui.refresh_sidebar")
+    def refresh():
+        clock.advance(200)
+
+    @slow_ops.action("ui.open_file")
+    def open_file(folder, filename):
+        refresh()
+
+    open_file("A", filename="n.md")
+
+    (entry,) = slow_ops.read_entries()
+    assert entry["action"] == "ui.open_file"
+    assert entry["args"] == {"folder": "A", "filename": "n.md"}
+
+
+def test_fast_actions_are_not_logged(clock):
+    slow_ops.configure(thresholds={"ui.select_tab": 100})
+    op = slow_ops.begin("ui.select_tab")
+    clock.advance(99)
+    assert op.finish() is None
+    assert slow_ops.read_entries() == []
+
+
+def test_configure_skips_invalid_thresholds(clock, caplog):
+    with caplog.at_level(logging.WARNING, logger=slow_ops.__name__):
+        slow_ops.configure(thresholds=[("ui.search", 10)])
+        slow_ops.configure(
+            thresholds={
+                "ui.search": "fast",
+                "ui.open_file": True,
+                "ui.select_tab": float("nan"),
+                "ui.on_reorder": -1,
+                "ui.rename_folder": 50,
+                "default": 7.5,
+            }
+        )
+
+    assert slow_ops.threshold_for("ui.search") == 500.0
+    assert slow_ops.threshold_for("ui.open_file") == 150.0
+    assert slow_ops.threshold_for("ui.select_tab") == 100.0
+    assert slow_ops.threshold_for("ui.on_reorder") == 150.0
+    assert slow_ops.threshold_for("ui.rename_folder") == 50.0
+    assert slow_ops.threshold_for("ui.unknown") == 7.5
+    assert len(caplog.records) == 5
+
+
+def test_log_rotates_and_read_entries_keeps_order(clock, tmp_path, monkeypatch):
+    monkeypatch.setattr(slow_ops, "MAX_LOG_BYTES", 1000)
+    monkeypatch.setattr(slow_ops, "BACKUP_COUNT", 2)
+    for index in range(40):
+        op = slow_ops.begin("ui.search", {"index": index})
+        clock.advance(600)
+        op.finish()
+
+    path = slow_ops.log_path()
+    names = sorted(os.listdir(tmp_path))
+    assert names == ["slow_ops.log", "slow_ops.log.1", "slow_ops.log.2"]
+    for name in names:
+        assert os.path.getsize(tmp_path / name) <= 1000
+    indexes = [int(entry["args"]["index"]) for entry in slow_ops.read_entries(path)]
+    assert indexes == sorted(indexes)
+    assert indexes[-1] == 39
+    assert len(indexes) < 40
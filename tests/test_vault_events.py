@@ -0,0 +1,120 @@
+import logging
+import threading
+
+from backend.vault_events import VaultEventBus
+
+
+class Recorder:
+    def __init__(self, fail_on=()):
+        self.batches = []
+        self.resyncs = 0
+        self.fail_on = set(fail_on)
+
+    def on_events(self, events):
+        if len(self.batches) + self.resyncs in self.fail_on:
+            self.fail_on.discard(len(self.batches) + self.resyncs)
+            raise RuntimeError("handler bug")
+        self.batches.append(events)
+
+    def on_resync(self):
+        self.resyncs += 1
+
+
+def test_events_are_numbered_in_order():
+    bus = VaultEventBus()
+    recorder = Recorder()
+    bus.subscribe(recorder.on_events, recorder.on_resync)
+    bus.publish("created", "/A/", "n.md")
+    bus.publish("saved", "A", "n.md", text="hi")
+
+    assert [[e.seq for e in batch] for batch in recorder.batches] == [[1], [2]]
+    created, saved = recorder.batches[0][0], recorder.batches[1][0]
+    assert (created.kind, created.folder, created.path) == ("created", "A", "A/n.md")
+    assert saved.text == "hi"
+    assert bus.last_seq == 2
+    assert recorder.resyncs == 0
+
+
+def test_batch_delivers_once_at_the_end():
+    bus = VaultEventBus()
+    recorder = Recorder()
+    bus.subscribe(recorder.on_events)
+    with bus.batch():
+        bus.publish("created", "A", "n.md")
+        with bus.batch():
+            bus.publish("renamed", "A", "n.md", new_folder="B", new_name="m.md")
+        assert recorder.batches == []
+    bus.publish("deleted", "B", "m.md")
+
+    assert [[e.kind for e in batch] for batch in recorder.batches] == [
+        ["created", "renamed"],
+        ["deleted"],
+    ]
+    assert recorder.batches[0][1].new_path == "B/m.md"
+    assert bus.stats()["batches"] == 2
+
+
+def test_batches_are_per_thread():
+    bus = VaultEventBus()
+    recorder = Recorder()
+    bus.subscribe(recorder.on_events)
+    with bus.batch():
+        bus.publish("saved", "A", "mine.md")
+        other = threading.Thread(target=bus.publish, args=("saved", "A", "other.md"))
+        other.start()
+        other.join()
+        # The other thread was not inside the batch
+        assert [e.name for e in recorder.batches[0]] == ["other.md"]
+    assert [e.name for e in recorder.batches[1]] == ["mine.md"]
+
+
+def test_failed_handler_is_logged_and_resynced(caplog):
+    bus = VaultEventBus()
+    broken = Recorder(fail_on={0})
+    healthy = Recorder()
+    bus.subscribe(broken.on_events, broken.on_resync)
+    bus.subscribe(healthy.on_events, healthy.on_resync)
+
+    with caplog.at_level(logging.ERROR, logger="backend.vault_events"):
+        bus.publish("saved", "A", "n.md")
+    assert "failed on events 1-1" in caplog.text
+    assert "handler bug" in caplog.text
+
+    # The gap left by the failure makes the next batch a resync
+    bus.publish("saved", "A", "n.md")
+    bus.publish("saved", "A", "n.md")
+    assert broken.resyncs == 1
+    assert [[e.seq for e in batch] for batch in broken.batches] == [[3]]
+    assert [[e.seq for e in batch] for batch in healthy.batches] == [[1], [2], [3]]
+    assert bus.stats()["resyncs"] == 1
+
+
+def test_resync_event_goes_to_on_resync():
+    bus = VaultEventBus()
+    recorder = Recorder()
+    plain = Recorder()
+    bus.subscribe(recorder.on_events, recorder.on_resync)
+    bus.subscribe(plain.on_events)
+    with bus.batch():
+        bus.publish("saved", "A", "n.md")
+        bus.publish("resync")
+
+    assert recorder.resyncs == 1
+    assert recorder.batches == []
+    # Without on_resync the batch is delivered as is
+    assert [e.kind for e in plain.batches[0]] == ["saved", "resync"]
+
+
+def test_unsubscribe_and_late_subscribers():
+    bus = VaultEventBus()
+    bus.publish("saved", "A", "n.md")
+    recorder = Recorder()
+    unsubscribe = bus.subscribe(recorder.on_events, recorder.on_resync)
+    bus.publish("saved", "A", "n.md")
+    unsubscribe()
+    unsubscribe()
+    bus.publish("saved", "A", "n.md")
+
+    # A subscriber starts at the current sequence number, without a gap
+    assert recorder.resyncs == 0
+    assert [[e.seq for e in batch] for batch in recorder.batches] == [[2]]
@@ -0,0 +1,171 @@
+import os
+
+import pytest
+
+from backend import files_manager
+from backend.vault_events import VaultEvent
+from backend.vault_index import VaultIndex, merge_children
+
+# folder -> (files, folders, order, hints)
+TREE = {
+    "": ([], ["A", "B"], {"items": []}, {"A": True}),
+    "A": (["a.md"], ["sub"], {"items": []}, {"sub": True}),
+    "A/sub": ([], ["deep"], {"items": []}, {"deep": False}),
+    "A/sub/deep": ([], [], {"items": []}, {}),
+    "B": (["b.md"], [], {"items": []}, {}),
+}
+
+
+@pytest.fixture
+def index():
+    loads = []
+
+    def loader(folder):
+        loads.append(folder)
+        files, folders, order, hints = TREE[folder]
+        return list(files), list(folders), order, dict(hints)
+
+    index = VaultIndex(loader)
+    index.loads = loads
+    return index
+
+
+def _event(kind, folder, name, **fields):
+    return VaultEvent(0, kind, folder, name, **fields)
+
+
+def test_merge_children_keeps_order_and_adds_missing_on_top():
+    order = {
+        "items": [
+            {"name": "old.md", "type": "file"},
+            {"name": "F", "type": "folder"},
+            {"name": "gone.md", "type": "file"},
+        ]
+    }
+    assert merge_children(order, ["old.md", "new.md"], ["F", "G"]) == [
+        {"name": "new.md", "type": "file"},
+        {"name": "G", "type": "folder"},
+        {"name": "old.md", "type": "file"},
+        {"name": "F", "type": "folder"},
+    ]
+
+
+def test_folders_load_lazily_once(index):
+    assert index.list_folders("") == ["B", "A"]
+    assert index.loads == [""]
+    assert not index.is_loaded("A")
+
+    assert index.list_files("A") == ["a.md"]
+    index.children("A")
+    assert index.loads == ["", "A"]
+    assert not index.is_loaded("A/sub")
+
+
+def test_has_children_hint_without_loading(index):
+    assert index.has_children("A") is None
+    index.children("")
+    assert index.has_children("A") is True
+    # Not in the hints: unknown until B itself is listed
+    assert index.has_children("B") is None
+    assert index.loads == [""]
+
+    index.children("A")
+    assert index.has_children("A/sub") is True
+    index.children("A/sub")
+    assert index.has_children("A/sub/deep") is False
+
+
+def test_created_entries_update_loaded_folders_only(index):
+    index.children("")
+    index.children("B")
+    index.apply_events(
+        [
+            _event("created", "B", "C", is_dir=True),
+            _event("created", "B", "new.md"),
+            _event("created", "A", "x.md"),
+        ]
+    )
+    # Entries missing from the order go on top, files above folders
+    assert index.children("B") == [
+        {"name": "new.md", "type": "file"},
+        {"name": "b.md", "type": "file"},
+        {"name": "C", "type": "folder"},
+    ]
+    assert index.has_children("B/C") is False
+    assert index.has_children("B") is True
+    # A was never loaded; it is read from disk with the file already there
+    assert not index.is_loaded("A")
+
+
+def test_rename_nested_folder_moves_cached_subtree(index):
+    for folder in ("", "A", "A/sub", "A/sub/deep"):
+        index.children(folder)
+    index.apply_events(
+        [_event("renamed", "", "A", is_dir=True, new_folder="", new_name="Z")]
+    )
+
+    assert index.list_folders("") == ["B", "Z"]
+    assert index.is_loaded("Z/sub") and index.is_loaded("Z/sub/deep")
+    assert not any(index.is_loaded(p) for p in ("A", "A/sub", "A/sub/deep"))
+    assert index.has_children("Z") is True
+    assert index.list_files("Z") == ["a.md"]
+    assert index.loads == ["", "A", "A/sub", "A/sub/deep"]
+
+
+def test_move_nested_folder_to_another_parent(index):
+    for folder in ("", "A", "A/sub", "B"):
+        index.children(folder)
+    index.apply_events(
+        [
+            _event(
+                "renamed", "A", "sub", is_dir=True, new_folder="B", new_name="sub"
+            )
+        ]
+    )
+    assert index.list_folders("A") == []
+    assert index.list_folders("B") == ["sub"]
+    assert not index.is_loaded("A/sub")
+    # The moved subtree is read again from its new place on demand
+    assert not index.is_loaded("B/sub")
+
+
+def test_delete_nested_folder_drops_cached_subtree(index):
+    for folder in ("", "A", "A/sub", "A/sub/deep"):
+        index.children(folder)
+    index.apply_events([_event("deleted", "A", "sub", is_dir=True)])
+
+    assert index.list_folders("A") == []
+    assert not index.is_loaded("A/sub") and not index.is_loaded("A/sub/deep")
+    assert index.has_children("A/sub") is None
+
+
+def test_set_order_and_invalidate(index):
+    index.children("B")
+    index.apply_events([_event("created", "B", "c.md")])
+    order = {
+        "items": [{"name": "b.md", "type": "file"}, {"name": "c.md", "type": "file"}]
+    }
+    index.set_order("B", order)
+    assert index.list_files("B") == ["b.md", "c.md"]
+
+    index.invalidate("B")
+    assert not index.is_loaded("B")
+    assert index.list_files("B") == ["b.md"]
+    index.invalidate()
+    assert not index.is_loaded("")
+    assert index.loads == ["B", "B"]
+
+
+def test_scan_folder_reports_has_children_hint(tmp_path, monkeypatch):
+    (tmp_path / "A" / "sub").mkdir(parents=True)
+    (tmp_path / "B").mkdir()
+    (tmp_path / "n.md").write_text("")
+    (tmp_path / "skip.txt").write_text("")
+    if os.stat(tmp_path / "A").st_nlink <= 2:
+        pytest.skip("filesystem does not count subdirectory links")
+    monkeypatch.setattr(files_manager, "BASE_DIR", str(tmp_path))
+
+    files, folders, order, hints = files_manager._scan_folder("")
+    assert files == ["n.md"]
+    assert sorted(folders) == ["A", "B"]
+    assert hints == {"A": True}
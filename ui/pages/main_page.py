@@ -1,28 +1,38 @@
+import asyncio
 import flet as ft
 from ui.themes.theme import theme
+import os
 import sys
+import atexit
+import threading
 from typing import Optional
 
 sys.path.append("../../backend")
 from backend.files_manager import (
-    read_markdown_file,
     save_markdown_file,
     list_markdown_files,
     list_folders,
     create_folder,
-    delete_folder,
 )
 from ui.widgets.header_footer import build_header, build_footer
 from ui.widgets.tabs import TabsBar
 from ui.containers.main_content import MainContent
 from ui.state.window_state import WindowState
+from backend.autosave import AutosaveEngine
+from backend.note_buffers import NoteBufferCache
+from backend import async_files, atomic_write, io_executor, slow_ops
+from backend.instrumentation import instrumented
+from backend.search_index import CancellationToken, get_search_index
+from backend.quick_open import get_quick_open_index
+from backend.fs_watcher import watch_vault
+from ui.widgets.search_results import SearchResults
+from ui.widgets.debug_panel import DebugPanel
+from ui.widgets.quick_open import QuickOpenPalette
 
 
 def main_page(page: ft.Page):
-    # Sidebar scroll position preservation
-    sidebar_column_ref = ft.Ref[ft.Column]()
-    # Persistent scroll offset for sidebar
-    prev_scroll_offset = 0
+    # Persistent sidebar tree, patched in place by refresh_sidebar()
+    sidebar_tree_ref = ft.Ref()
     # Global dialog reference for ESC handling
     current_dialog = None
 
@@ -35,6 +45,16 @@ def main_page(page: ft.Page):
         ):
             current_dialog.open = False
             page.update()
+        elif e.key == "Escape" and quick_open.is_open:
+            quick_open.close()
+        elif e.key == "Escape" and search_results.container.visible:
+            search_results.clear()
+        elif e.key == "D" and e.shift and (e.ctrl or e.meta):
+            debug_panel.toggle()
+        elif e.key == "P" and (e.ctrl or e.meta):
+            quick_open.open()
+        elif quick_open.is_open and e.key in ("Arrow Down", "Arrow Up"):
+            quick_open.move(1 if e.key == "Arrow Down" else -1)
 
     page.on_keyboard_event = esc_handler
 
@@ -200,19 +220,18 @@ def main_page(page: ft.Page):
     )
 
     # State for tabs and file content
-    from backend.app_state import save_app_state, load_app_state
+    from backend.app_state import AppStateStore
 
-    app_state = load_app_state()
+    app_state = AppStateStore()
+    atexit.register(app_state.close)
 
     def update_app_state(**updates):
-        """Merge updates into persisted app state.
+        """Merge updates into the app state store.
 
-        This avoids overwriting unrelated keys when we persist open tabs or
-        last opened file.
+        Only changed keys mark the store dirty; it writes the file at most
+        once per interval and on shutdown.
         """
-        nonlocal app_state
-        app_state.update(updates)
-        save_app_state(app_state)
+        app_state.update(**updates)
 
     # Deduplicate open_tabs and normalize folder paths (remove trailing slashes)
     def normalize_tab(tab):
@@ -266,8 +285,10 @@ def main_page(page: ft.Page):
     page.controls.append(snackbar)
     page.controls.append(dialog)
 
+    @slow_ops.action("ui.open_file")
+    @instrumented("ui.open_file")
     def open_file(folder, filename):
-        instant_save()
+        flush_save()
         tab = normalize_tab((folder, filename))
         # Only add the tab if it does not already exist
         if tab not in open_tabs:
@@ -280,18 +301,24 @@ def main_page(page: ft.Page):
         update_app_state(
             last_opened={"folder": file_folder.current, "filename": file_name.current}
         )
-        content = read_markdown_file(tab[0], tab[1])
+        content = buffers.get(tab[0], tab[1])
         main_content_component.set_content(content)
-        main_content_component.update()
+        with slow_ops.phase("update"):
+            main_content_component.update()
         tabs_bar.update()
-        main_column.controls[1] = main_content_component.get_view(file_name.current)
+        with slow_ops.phase("build"):
+            view = main_content_component.get_view(file_name.current)
+        main_column.controls[1] = view
         if getattr(main_column, "page", None) is not None:
-            main_column.update()
+            with slow_ops.phase("update"):
+                main_column.update()
         # Ensure sidebar reflects the newly opened file immediately
         refresh_sidebar()
 
+    @slow_ops.action("ui.select_tab")
+    @instrumented("ui.select_tab")
     def select_tab(index):
-        instant_save()
+        flush_save()
         if 0 <= index < len(open_tabs):
             selected_tab_idx[0] = index
             folder, filename = open_tabs[index]
@@ -303,13 +330,17 @@ def main_page(page: ft.Page):
                     "filename": file_name.current,
                 }
             )
-            content = read_markdown_file(folder, filename)
+            content = buffers.get(folder, filename)
             main_content_component.set_content(content)
-            main_content_component.update()
+            with slow_ops.phase("update"):
+                main_content_component.update()
             tabs_bar.update()
-            main_column.controls[1] = main_content_component.get_view(file_name.current)
+            with slow_ops.phase("build"):
+                view = main_content_component.get_view(file_name.current)
+            main_column.controls[1] = view
             if getattr(main_column, "page", None) is not None:
-                main_column.update()
+                with slow_ops.phase("update"):
+                    main_column.update()
             # Update sidebar highlight on tab selection
             refresh_sidebar()
 
@@ -325,8 +356,21 @@ def main_page(page: ft.Page):
 
     def on_close_window(_):
         """Close the application window."""
+        flush_save()
+        shutdown()
         page.window.close()
 
+    def shutdown(_=None):
+        """Stop background services and write anything still pending."""
+        unwatch_vault()
+        autosave.close()
+        app_state.close()
+        # Registered per session; a web server would otherwise pile them up
+        atexit.unregister(autosave.close)
+        atexit.unregister(app_state.close)
+        # Lets the next start skip re-indexing the notes edited this session
+        get_search_index().save()
+
     def on_page_resized(e: ft.WindowResizeEvent):
         """Handle window resize events."""
         window_state.on_window_resized(e)
@@ -337,6 +381,73 @@ def main_page(page: ft.Page):
         """Toggle between full/maximized size and half-size snap."""
         window_state.toggle_half_size(page)
 
+    # Full-text search over all notes, shown below the header while typing
+    search_index = get_search_index()
+
+    def open_search_result(folder, filename):
+        search_results.clear()
+        open_file(folder, filename)
+
+    search_results = SearchResults(on_open=open_search_result)
+
+    # Ctrl+P: jump to any note by fuzzy-matching its folder/filename
+    quick_open = QuickOpenPalette(get_quick_open_index(), on_open=open_file)
+    page.controls.append(quick_open.dialog)
+
+    # Ctrl+Shift+D: live instrumentation numbers, dumped next to app_state.json
+    state_dir = os.path.dirname(os.path.abspath(app_state.path))
+    debug_panel = DebugPanel(state_dir)
+    page.controls.append(debug_panel.dialog)
+
+    def vault_size():
+        tree = sidebar_tree_ref.current
+        return {
+            "notes": len(quick_open.index),
+            "sidebar_rows": len(tree.rows) if tree is not None else None,
+            "open_tabs": len(open_tabs),
+        }
+
+    # Actions over their threshold go to slow_ops.log, next to app_state.json
+    slow_ops.configure(
+        log_dir=state_dir,
+        thresholds=app_state.get("slow_op_thresholds_ms"),
+        vault_size=vault_size,
+    )
+
+    # Each keystroke cancels the query still streaming for the previous one
+    search_token = CancellationToken()
+
+    async def stream_search_results(query, generation, token, op):
+        # Time spent waiting on the index (ranking, snippets) is charged to
+        # "search"; the rows are built and sent under op
+        async for result in search_index.stream(
+            query, limit=theme["SEARCH_RESULTS_LIMIT"], token=token
+        ):
+            op.lap("search")
+            with op:
+                added = search_results.add(generation, result)
+            if not added:
+                token.cancel()
+                return
+        if token.cancelled:
+            return
+        op.lap("search")
+        with op:
+            search_results.finish(generation)
+        op.finish()
+
+    def on_search_change(e):
+        nonlocal search_token
+        query = e.control.value or ""
+        search_token.cancel()
+        if not query.strip():
+            search_results.clear()
+            return
+        search_token = CancellationToken()
+        generation = search_results.begin(query.strip())
+        op = slow_ops.begin("ui.search", {"query": query.strip()})
+        page.run_task(stream_search_results, query, generation, search_token, op)
+
     # Build header using new modular component
     header = build_header(
         page,
@@ -344,7 +455,7 @@ def main_page(page: ft.Page):
         on_maximize=on_maximize_window,
         on_close=on_close_window,
         on_half_size=toggle_half_size,
-        on_search_change=None,  # Implement search functionality later
+        on_search_change=on_search_change,
     )
 
     # Create TabsBar instance with callbacks
@@ -371,35 +482,119 @@ def main_page(page: ft.Page):
     # Create the tab row container
     tab_row = tabs_bar.container
 
+    # Open notes stay in memory; tab switches revalidate with a stat only
+    # Dirty notes over the memory budget are handed to autosave, created below
+    buffers = NoteBufferCache(
+        schedule_write=lambda folder, filename, text: autosave.mark_dirty(
+            folder, filename, text
+        )
+    )
+
+    def save_note(folder, filename, content):
+        written = save_markdown_file(folder, filename, content)
+        buffers.mark_saved(folder, filename, content)
+        return written
+
+    # Edits are coalesced and written in the background; see backend/autosave.py.
+    # Writes take the I/O executor's per-path lock, so they never interleave
+    # with a rename or delete running on the pool.
+    autosave = AutosaveEngine(save_note, lock=io_executor.hold_notes)
+    atexit.register(autosave.close)
+    page.on_disconnect = shutdown
+
     def instant_save(e=None):
         if file_name.current and file_folder.current:
-            current_content = main_content_component.get_content()
-            save_markdown_file(
-                file_folder.current,
-                file_name.current,
-                current_content,
-            )
-        # Persist open tabs only
-        update_app_state(open_tabs=open_tabs)
+            content = main_content_component.get_content()
+            buffers.put(file_folder.current, file_name.current, content)
+            autosave.mark_dirty(file_folder.current, file_name.current, content)
+
+    def flush_save():
+        """Queue the editor content and write all pending notes now."""
+        instant_save()
+        autosave.flush()
+
+    def detach_editor(folder, filename=None):
+        """Write and stop saving the open note if it is in folder (or is
+        folder/filename), before that path is deleted or renamed.
+
+        Until ``reattach_editor`` the editor keeps its text, but keystrokes
+        no longer mark the old path dirty, so a background autosave can not
+        recreate it.
+
+        Returns:
+            (folder, filename, content) of the detached note, or None.
+        """
+        instant_save()
+        autosave.flush(folder, filename)
+        detached = None
+        current = file_folder.current or ""
+        if filename is not None:
+            inside = (current, file_name.current) == (folder, filename)
+        else:
+            inside = current == folder or current.startswith(folder + "/")
+        if file_name.current and inside:
+            content = main_content_component.get_content()
+            detached = (current, file_name.current, content)
+            file_folder.current = ""
+            file_name.current = ""
+        # Changes re-queued by a failed write would otherwise be retried
+        autosave.discard(folder, filename)
+        return detached
+
+    def reattach_editor(detached, folder=None, filename=None):
+        """Point the editor back at a detached note, at its new path if given.
+
+        Text typed while it was detached is saved to that path.
+        """
+        if detached is None:
+            return
+        old_folder, old_filename, content = detached
+        file_folder.current = folder if folder is not None else old_folder
+        file_name.current = filename if filename is not None else old_filename
+        if main_content_component.get_content() != content:
+            instant_save()
+
+    def close_editor():
+        """Show the empty state after the open note was deleted."""
+        main_column.controls[1] = main_content_component.get_view("")
+        if getattr(main_column, "page", None) is not None:
+            main_column.update()
 
     # Initialize main content with instant save callback
     main_content_component = MainContent(on_change=instant_save)
 
     from ui.widgets.sidebar import sidebar
 
+    # Slow file operations run on the I/O pool; callbacks come back on the page
+    ui_dispatcher = io_executor.page_dispatcher(page)
+
     def on_delete_file(folder, filename):
-        def do_delete_file(_):
-            from backend.files_manager import delete_markdown_file
+        detached = None
+
+        def on_deleted(_):
+            buffers.discard(folder, filename)
+            if detached is not None:
+                close_editor()
+            show_snackbar(
+                f"Deleted {filename} from {folder}", color=theme["SUCCESS_COLOR"]
+            )
+            refresh_sidebar()
 
-            try:
-                delete_markdown_file(folder, filename)
-                show_snackbar(
-                    f"Deleted {filename} from {folder}", color=theme["SUCCESS_COLOR"]
-                )
-            except Exception as ex:
-                show_snackbar(f"Error deleting file: {ex}", color=theme["ERROR_COLOR"])
+        def on_delete_error(ex):
+            reattach_editor(detached)
+            show_snackbar(f"Error deleting file: {ex}", color=theme["ERROR_COLOR"])
+
+        def do_delete_file(_):
+            nonlocal detached
+            detached = detach_editor(folder, filename)
+            io_executor.delete_markdown_file(
+                folder,
+                filename,
+                on_done=on_deleted,
+                on_error=on_delete_error,
+                dispatcher=ui_dispatcher,
+            )
             dialog.open = False
-            refresh_sidebar()
             page.update()
 
         dialog.title = ft.Text("Delete File")
@@ -425,18 +620,33 @@ def main_page(page: ft.Page):
         page.update()
 
     def on_delete_folder(folder):
+        detached = None
+
+        def on_deleted(_):
+            buffers.discard(folder)
+            if detached is not None:
+                close_editor()
+            show_snackbar(f"Deleted folder '{folder}'", color=theme["SUCCESS_COLOR"])
+            refresh_sidebar()
+
+        def on_delete_error(ex):
+            reattach_editor(detached)
+            show_snackbar(f"Error deleting folder: {ex}", color=theme["ERROR_COLOR"])
+
         def do_delete_folder(_):
-            try:
-                delete_folder(folder)
-                show_snackbar(
-                    f"Deleted folder '{folder}'", color=theme["SUCCESS_COLOR"]
-                )
-            except Exception as ex:
-                show_snackbar(
-                    f"Error deleting folder: {ex}", color=theme["ERROR_COLOR"]
-                )
+            nonlocal detached
+            # Timed until the folder is gone and the sidebar shows it
+            op = slow_ops.begin("ui.delete_folder", {"folder": folder})
+            with op:
+                detached = detach_editor(folder)
+            # rmtree of a big folder must not block the UI
+            io_executor.delete_folder(
+                folder,
+                on_done=op.ends(on_deleted),
+                on_error=op.ends(on_delete_error, failed=True),
+                dispatcher=ui_dispatcher,
+            )
             dialog.open = False
-            refresh_sidebar()
             page.update()
 
         dialog.title = ft.Text("Delete Folder")
@@ -490,10 +700,30 @@ def main_page(page: ft.Page):
                 error_text.value = "Invalid file name."
                 page.update()
                 return
-            from backend.files_manager import rename_markdown_file
+            op = slow_ops.begin(
+                "ui.rename_file",
+                {"folder": folder, "filename": old_filename, "new_name": new_filename},
+            )
+            with op:
+                detached = detach_editor(folder, old_filename)
+            io_executor.rename_markdown_file(
+                folder,
+                old_filename,
+                new_filename,
+                on_done=op.ends(lambda _: on_renamed(new_filename, detached)),
+                on_error=op.ends(
+                    lambda ex: on_rename_error(ex, detached), failed=True
+                ),
+                dispatcher=ui_dispatcher,
+            )
 
+        def on_rename_error(ex, detached):
+            reattach_editor(detached)
+            show_error(f"Error renaming file: {ex}")
+
+        def on_renamed(new_filename, detached):
             try:
-                rename_markdown_file(folder, old_filename, new_filename)
+                buffers.discard(folder, old_filename)
                 # Update open tabs to reflect the new filename
                 for idx, tab in enumerate(open_tabs):
                     if tab == (folder, old_filename):
@@ -514,9 +744,10 @@ def main_page(page: ft.Page):
                 dialog.open = False
                 show_success(f"File renamed to '{new_filename}'")
 
-                # If the file is currently open, update references and refresh UI
-                if file_name.current == old_filename and file_folder.current == folder:
-                    file_name.current = new_filename
+                # The open note was detached if it is the renamed file; point
+                # the editor at its new name and refresh the UI
+                if detached is not None:
+                    reattach_editor(detached, filename=new_filename)
                     update_app_state(
                         last_opened={
                             "folder": file_folder.current,
@@ -582,10 +813,28 @@ def main_page(page: ft.Page):
                 error_text.value = err
                 page.update()
                 return
-            from backend.files_manager import rename_folder
+            op = slow_ops.begin(
+                "ui.rename_folder", {"folder": folder_path, "new_name": new_name}
+            )
+            with op:
+                detached = detach_editor(folder_path)
+            io_executor.rename_folder(
+                folder_path,
+                new_name,
+                on_done=op.ends(lambda _: on_renamed(new_name, detached)),
+                on_error=op.ends(
+                    lambda ex: on_rename_error(ex, detached), failed=True
+                ),
+                dispatcher=ui_dispatcher,
+            )
 
+        def on_rename_error(ex, detached):
+            reattach_editor(detached)
+            show_error(f"Error renaming folder: {ex}")
+
+        def on_renamed(new_name, detached):
             try:
-                rename_folder(folder_path, new_name)
+                buffers.discard(folder_path)
 
                 # Build new folder path for open tabs
                 if "/" in folder_path:
@@ -603,13 +852,11 @@ def main_page(page: ft.Page):
                         suffix = tab_folder[len(folder_path) :]
                         open_tabs[idx] = (new_folder_path + suffix, tab_file)
 
-                # Update currently open file folder if it was inside the renamed folder
-                if file_folder.current:
-                    if file_folder.current == folder_path:
-                        file_folder.current = new_folder_path
-                    elif file_folder.current.startswith(folder_path + "/"):
-                        suffix = file_folder.current[len(folder_path) :]
-                        file_folder.current = new_folder_path + suffix
+                # The open note was detached if it was inside the renamed
+                # folder; point the editor at its new path
+                if detached is not None:
+                    suffix = detached[0][len(folder_path) :]
+                    reattach_editor(detached, folder=new_folder_path + suffix)
 
                 # Keep persisted state consistent
                 last = app_state.get("last_opened") or {}
@@ -694,9 +941,10 @@ def main_page(page: ft.Page):
         show_snackbar(f"Reorder mode {mode_text}", color=theme.get("COLOR_PRIMARY"))
         refresh_sidebar()
 
+    @slow_ops.action("ui.on_reorder")
     def on_reorder(parent_folder, item_name, target_item_name, insert_before=True):
         """Handle reordering of items via drag and drop."""
-        from backend.files_manager import reorder_items, BASE_DIR, _ensure_order_file
+        from backend.files_manager import reorder_items, BASE_DIR, resolve_order
         import os
 
         if parent_folder == "":
@@ -705,7 +953,8 @@ def main_page(page: ft.Page):
             folder_path = os.path.join(BASE_DIR, parent_folder)
 
         try:
-            order = _ensure_order_file(folder_path)
+            with slow_ops.phase("io"):
+                order = resolve_order(folder_path)
             items = [i.get("name") for i in order.get("items", []) if i.get("name")]
 
             if item_name in items:
@@ -724,61 +973,16 @@ def main_page(page: ft.Page):
             show_snackbar(f"Error reordering: {ex}", color=theme["ERROR_COLOR"])
 
     # Sidebar scrollable container
+    @slow_ops.action("ui.refresh_sidebar")
+    @instrumented("ui.refresh_sidebar")
     def refresh_sidebar():
-        # Update persistent scroll offset before sidebar rebuild
-        nonlocal prev_scroll_offset
-        # Debug prints removed
-
-        def on_sidebar_scroll(e):
-            nonlocal prev_scroll_offset
-            if hasattr(e, "pixels"):
-                prev_scroll_offset = e.pixels
-
-        # Hide sidebar before update to mask flicker
-        sidebar_view.opacity = 0
-        sidebar_view.update()
-        sidebar_view.content = sidebar(
-            expanded_folders=expanded_folders,
-            on_file_selected=open_file,
-            on_delete_file=on_delete_file,
-            on_delete_folder=on_delete_folder,
-            on_create_folder=on_create_folder,
-            on_create_subfolder=on_create_subfolder,
-            on_create_file=on_create_file,
-            on_toggle_folder=on_toggle_folder,
-            on_rename_file=on_rename_file,
-            on_rename_folder=on_rename_folder,
+        """Patch the sidebar rows that changed; scroll position is kept."""
+        sidebar_tree_ref.current.refresh(
+            expanded_folders,
             current_file=file_name.current,
             current_folder=file_folder.current,
-            sidebar_column_ref=sidebar_column_ref,
-            on_sidebar_scroll=on_sidebar_scroll,
             reorder_mode=reorder_mode["active"],
-            on_toggle_reorder_mode=on_toggle_reorder_mode,
-            on_reorder=on_reorder,
-            page=page,
         )
-        sidebar_view.update()
-        # Restore scroll offset after sidebar_column_ref is re-attached, with a longer delay and repeated attempts
-        import threading
-
-        max_attempts = 3
-        delay = 0.03  # 30ms, try to minimize blink
-
-        def restore_scroll(attempt=1):
-            if sidebar_column_ref.current is not None:
-                try:
-                    sidebar_column_ref.current.scroll_to(offset=prev_scroll_offset)
-                except Exception:
-                    pass
-                else:
-                    # After successful scroll restore, show sidebar again
-                    sidebar_view.opacity = 1
-                    sidebar_view.update()
-                    return  # Success
-            if attempt < max_attempts:
-                threading.Timer(delay, lambda: restore_scroll(attempt + 1)).start()
-
-        threading.Timer(delay, restore_scroll).start()
 
     sidebar_view = ft.Container(
         content=sidebar(
@@ -794,19 +998,17 @@ def main_page(page: ft.Page):
             on_rename_folder=on_rename_folder,
             current_file=file_name.current,
             current_folder=file_folder.current,
-            sidebar_column_ref=sidebar_column_ref,
             reorder_mode=reorder_mode["active"],
             on_toggle_reorder_mode=on_toggle_reorder_mode,
             on_reorder=on_reorder,
             page=page,
+            tree_ref=sidebar_tree_ref,
         ),
         width=theme.get("SIDEBAR_WIDTH", 250),
         expand=False,
         bgcolor=theme["SIDEBAR_BG"],
         padding=theme.get("SIDEBAR_PADDING", 8),
         border_radius=theme.get("BORDER_RADIUS", 6),
-        opacity=1,
-        animate_opacity=ft.Animation(150, ft.AnimationCurve.EASE_IN_OUT),
     )
 
     main_column = ft.Column(
@@ -828,15 +1030,105 @@ def main_page(page: ft.Page):
         expand=True,
     )
 
-    # Build footer using new modular component
-    footer = build_footer()
+    # Build footer using new modular component; the status text shows the
+    # progress of a cold search index build
+    index_status = ft.Text(
+        "",
+        size=theme["FOOTER_FONT_SIZE"],
+        color=theme["FOOTER_COLOR"],
+        visible=False,
+    )
+    footer = build_footer(status=index_status)
+
+    def show_index_progress(done, total):
+        index_status.value = theme["FOOTER_INDEXING_TEXT"].format(
+            done=done, total=total
+        )
+        index_status.visible = done < total
+        if getattr(index_status, "page", None) is not None:
+            index_status.update()
+
+    # Reported from the build thread; the update runs on the page
+    search_index.on_progress = lambda done, total: ui_dispatcher(
+        show_index_progress, done, total
+    )
 
     # Compose the page: header (top), main_layout (row), footer (bottom)
     page.add(
         header,
+        search_results.container,
         main_layout,
         footer,
     )
+    # Load the open tabs in the background so switching never waits on disk
+    async def prefetch_tabs(notes):
+        await asyncio.gather(
+            *(
+                async_files.run(
+                    [f"{folder}/{filename}"],
+                    buffers.get,
+                    folder,
+                    filename,
+                    shared=True,
+                )
+                for folder, filename in notes
+            ),
+            return_exceptions=True,
+        )
+
+    page.run_task(prefetch_tabs, list(open_tabs))
+
+    def remove_stale_tmp():
+        """Delete temp files of writes interrupted in an earlier session."""
+        from backend.files_manager import BASE_DIR
+
+        atomic_write.remove_stale_tmp(BASE_DIR)
+        atomic_write.remove_stale_tmp(state_dir, recursive=False)
+
+    threading.Thread(target=remove_stale_tmp, name="tmp-cleanup", daemon=True).start()
+    # Build the search index off the UI thread; queries use it once ready
+    threading.Thread(
+        target=search_index.ensure_built, name="search-index", daemon=True
+    ).start()
+    threading.Thread(
+        target=quick_open.index.ensure_built, name="quick-open-index", daemon=True
+    ).start()
+    if app_state.get("catalog_enabled", False):
+        # Optional SQLite catalog: catch up with changes made while closed
+        from backend.catalog import get_catalog
+
+        catalog = get_catalog(state_dir)
+        if catalog is not None:
+            catalog.resync()
+
+    def on_fs_events(events, tree_changed):
+        """Refresh the UI once per batch of external changes.
+
+        Runs on the watcher thread after the batch reached the indexes; the
+        UI part is posted to the page.
+        """
+        ui_dispatcher(show_fs_events, events, tree_changed)
+
+    def show_fs_events(events, tree_changed):
+        current = f"{file_folder.current}/{file_name.current}"
+        # Editors that save atomically replace the note with a rename, which
+        # arrives as "created" (or "moved" when the temp file is a note too)
+        if file_name.current and any(
+            (e.kind in ("modified", "created") and e.path == current)
+            or (e.kind == "moved" and e.dest_path == current)
+            for e in events
+        ):
+            # Reload the open note unless the user has unsaved edits
+            if not autosave.is_dirty(file_folder.current, file_name.current):
+                content = buffers.get(file_folder.current, file_name.current)
+                if content != main_content_component.get_content():
+                    main_content_component.set_content(content)
+                    main_content_component.update()
+        if tree_changed:
+            refresh_sidebar()
+
+    # Pick up notes edited or synced by other tools (one watcher per process)
+    unwatch_vault = watch_vault(on_fs_events)
     # Initial sidebar build
     refresh_sidebar()
     tabs_bar.update()
@@ -862,7 +1154,7 @@ def main_page(page: ft.Page):
     _auto_open_startup_file()
 
     def close_tab(idx):
-        instant_save()
+        flush_save()
         if 0 <= idx < len(open_tabs):
             open_tabs.pop(idx)
             update_app_state(open_tabs=open_tabs)
@@ -878,7 +1170,7 @@ def main_page(page: ft.Page):
                         "filename": file_name.current,
                     }
                 )
-                content = read_markdown_file(folder, filename)
+                content = buffers.get(folder, filename)
                 main_content_component.set_content(content)
                 main_content_component.update()
                 selected_tab_idx[0] = new_index
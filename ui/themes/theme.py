@@ -89,6 +89,33 @@ theme = {
     "SEARCH_TEXT_ALIGN": ft.TextAlign.CENTER,
     "SEARCH_FONT_SIZE": 13,
     "SEARCH_TEXT_VERTICAL_ALIGN": ft.VerticalAlignment.CENTER,
+    # SEARCH RESULTS
+    "SEARCH_RESULTS_LIMIT": 20,
+    "SEARCH_RESULTS_MAX_HEIGHT": 260,
+    "SEARCH_RESULTS_BG": "#E0E0E0",
+    "SEARCH_RESULTS_PADDING": 6,
+    "SEARCH_RESULTS_SPACING": 2,
+    "SEARCH_RESULTS_ROW_PADDING": ft.Padding(8, 4, 8, 4),
+    "SEARCH_RESULTS_TITLE_SIZE": 13,
+    "SEARCH_RESULTS_META_SIZE": 11,
+    "SEARCH_RESULTS_META_COLOR": "#666666",
+    "SEARCH_RESULTS_SNIPPET_SIZE": 12,
+    "SEARCH_RESULTS_SNIPPET_LINES": 2,
+    # QUICK OPEN
+    "QUICK_OPEN_HINT": "Ir para nota...",
+    "QUICK_OPEN_LIMIT": 30,
+    "QUICK_OPEN_WIDTH": 520,
+    "QUICK_OPEN_MAX_HEIGHT": 360,
+    "QUICK_OPEN_PADDING": ft.Padding(12, 12, 12, 12),
+    "QUICK_OPEN_SELECTED_BG": "#D6D6D6",
+    # DEBUG PANEL (Ctrl+Shift+D)
+    "DEBUG_PANEL_TITLE": "Instrumentation",
+    "DEBUG_PANEL_WIDTH": 760,
+    "DEBUG_PANEL_HEIGHT": 420,
+    "DEBUG_PANEL_FONT": "monospace",
+    "DEBUG_PANEL_FONT_SIZE": 11,
+    "DEBUG_PANEL_ROWS": 25,
+    "DEBUG_PANEL_REFRESH_SECONDS": 1.0,
     # SIDEBAR
     "SIDEBAR_WIDTH": 250,
     "SIDEBAR_PADDING": ft.Padding(4, 4, 4, 4),
@@ -103,6 +130,11 @@ theme = {
     "SIDEBAR_FILE_ROW_RADIUS": 2,
     "SIDEBAR_DIVIDER_MARGIN": 8,
     "SIDEBAR_INDENT_STEP": 18,
+    "SIDEBAR_EXPANDER_SIZE": 16,
+    # SIDEBAR VIRTUALIZATION (rows materialized around the viewport)
+    "SIDEBAR_VIRTUAL_VIEWPORT": 900,  # px, assumed until the first scroll event
+    "SIDEBAR_VIRTUAL_OVERSCAN": 40,  # rows built above and below the viewport
+    "SIDEBAR_VIRTUAL_SCROLL_INTERVAL": 50,  # ms between scroll events
     # SIDEBAR HIGHLIGHT
     "SIDEBAR_HIGHLIGHT_BG": "#B3E5FC",
     "SIDEBAR_HIGHLIGHT_COLOR": "#003E6D",
@@ -115,6 +147,7 @@ theme = {
     "FOOTER_BG": "#CCCCCC",
     "FOOTER_PADDING": 6,
     "FOOTER_ALIGNMENT": ft.alignment.center,
+    "FOOTER_STATUS_SPACING": 16,
     # TAB ROW
     "TAB_FONT_SIZE": 11,
     "TAB_ROW_HEIGHT": 40,
@@ -200,6 +233,7 @@ theme = {
     "SIDEBAR_SCROLLBAR_SPACER_WIDTH": 16,
     "FILECONTENT_MIN_LINES_SMALL": 1,
     "FOOTER_TEXT": "© 2025 - from Diego - to Beatriz - with love ❤️.",
+    "FOOTER_INDEXING_TEXT": "Indexando notas... {done}/{total}",
     "COLOR_TRANSPARENT": "transparent",
     "COLOR_ON_PRIMARY": "#FFFFFF",
     # RENAME DIALOGS
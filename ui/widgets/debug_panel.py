@@ -0,0 +1,157 @@
+"""Hidden debug panel for the Study Notebook UI.
+
+This module provides the DebugPanel component: a dialog (Ctrl+Shift+D) that
+shows the live ``backend.instrumentation`` numbers, lets the user switch
+recording on and off, reset the numbers and dump them to a JSON file that
+can be attached to a bug report.
+"""
+
+import asyncio
+import os
+import time
+
+import flet as ft
+from backend import instrumentation
+from ui.themes.theme import theme
+
+
+class DebugPanel:
+    """Manages the debug dialog.
+
+    Attributes:
+        dump_dir: Directory the JSON dumps are written to.
+        table: Text showing one line per instrumented name.
+        status: Text showing the result of the last action.
+        dialog: The AlertDialog holding the panel.
+    """
+
+    def __init__(self, dump_dir: str):
+        """Initialize the panel (closed).
+
+        Args:
+            dump_dir: Directory the JSON dumps are written to.
+        """
+        self.dump_dir = dump_dir
+        self.recording = ft.Switch(
+            label="Recording",
+            value=instrumentation.is_enabled(),
+            on_change=lambda e: self.set_recording(e.control.value),
+        )
+        self.table = ft.Text(
+            "",
+            font_family=theme["DEBUG_PANEL_FONT"],
+            size=theme["DEBUG_PANEL_FONT_SIZE"],
+            selectable=True,
+        )
+        self.status = ft.Text(
+            "",
+            size=theme["SEARCH_RESULTS_META_SIZE"],
+            color=theme["SEARCH_RESULTS_META_COLOR"],
+        )
+        self.dialog = ft.AlertDialog(
+            title=ft.Text(theme["DEBUG_PANEL_TITLE"]),
+            content=ft.Container(
+                content=ft.Column(
+                    [self.recording, self.table, self.status],
+                    scroll=ft.ScrollMode.AUTO,
+                    spacing=theme["SPACING_SM"],
+                ),
+                width=theme["DEBUG_PANEL_WIDTH"],
+                height=theme["DEBUG_PANEL_HEIGHT"],
+            ),
+            actions=[
+                ft.TextButton("Reset", on_click=lambda _: self.reset()),
+                ft.TextButton("Dump JSON", on_click=lambda _: self.dump()),
+                ft.TextButton("Close", on_click=lambda _: self.close()),
+            ],
+            actions_alignment=theme["DIALOG_ACTIONS_ALIGNMENT"],
+            open=False,
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self.dialog.open)
+
+    def open(self):
+        """Show the panel and keep it current while it is open."""
+        self.dialog.open = True
+        self.render()
+        page = getattr(self.dialog, "page", None)
+        if page is not None:
+            page.run_task(self._refresh_while_open)
+
+    def close(self):
+        """Hide the panel."""
+        self.dialog.open = False
+        self.update()
+
+    def toggle(self):
+        if self.is_open:
+            self.close()
+        else:
+            self.open()
+
+    def set_recording(self, on: bool):
+        instrumentation.enable(on)
+        self.render()
+
+    def reset(self):
+        instrumentation.reset()
+        self.status.value = ""
+        self.render()
+
+    def dump(self):
+        """Write the numbers to a timestamped JSON file in dump_dir."""
+        name = time.strftime("instrumentation-%Y%m%d-%H%M%S.json")
+        try:
+            path = instrumentation.dump(os.path.join(self.dump_dir, name))
+        except OSError as exc:
+            self.status.value = f"Dump failed: {exc}"
+        else:
+            self.status.value = f"Saved {os.path.abspath(path)}"
+        self.update()
+
+    def render(self):
+        """Rebuild the table from the current numbers."""
+        self.recording.value = instrumentation.is_enabled()
+        rows = instrumentation.top(theme["DEBUG_PANEL_ROWS"])
+        if not rows:
+            self.table.value = "No calls recorded."
+        else:
+            lines = [
+                f"{'name':34} {'calls':>6} {'total':>9} {'p50':>6} {'p99':>6}"
+                f" {'max':>8} {'read':>9} {'written':>9}"
+            ]
+            for name, m in rows:
+                lines.append(
+                    f"{name[-34:]:34} {m['calls']:>6} {m['total_ms']:>9.1f}"
+                    f" {_bound(m['p50_ms']):>6} {_bound(m['p99_ms']):>6}"
+                    f" {m['max_ms']:>8.1f} {_size(m['bytes_read']):>9}"
+                    f" {_size(m['bytes_written']):>9}"
+                )
+            self.table.value = "\n".join(lines)
+        self.update()
+
+    def update(self):
+        """Update the dialog if it is attached to a page."""
+        if getattr(self.dialog, "page", None) is not None:
+            self.dialog.update()
+
+    async def _refresh_while_open(self):
+        while self.is_open:
+            await asyncio.sleep(theme["DEBUG_PANEL_REFRESH_SECONDS"])
+            if self.is_open:
+                self.render()
+
+
+def _bound(value) -> str:
+    # Histogram quantiles are bucket upper bounds; None is above the last
+    return "slow" if value is None else f"{value:g}"
+
+
+def _size(count: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f}{unit}"
+        count /= 1024
+    return f"{count:.1f}GB"
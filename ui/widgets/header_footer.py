@@ -136,18 +136,31 @@ def build_header(
     return header
 
 
-def build_footer() -> ft.Container:
+def build_footer(status: Optional[ft.Control] = None) -> ft.Container:
     """Build the footer component.
 
+    Args:
+        status: Optional control shown before the footer text, e.g. the
+            progress of a background job.
+
     Returns:
         A Container representing the application footer with text.
     """
+    text = ft.Text(
+        theme["FOOTER_TEXT"],
+        size=theme["FOOTER_FONT_SIZE"],
+        color=theme["FOOTER_COLOR"],
+    )
+    if status is not None:
+        content = ft.Row(
+            [status, text],
+            alignment=ft.MainAxisAlignment.CENTER,
+            spacing=theme["FOOTER_STATUS_SPACING"],
+        )
+    else:
+        content = text
     footer = ft.Container(
-        content=ft.Text(
-            theme["FOOTER_TEXT"],
-            size=theme["FOOTER_FONT_SIZE"],
-            color=theme["FOOTER_COLOR"],
-        ),
+        content=content,
         padding=theme["FOOTER_PADDING"],
         bgcolor=theme["FOOTER_BG"],
         alignment=theme["FOOTER_ALIGNMENT"],
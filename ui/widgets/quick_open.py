@@ -0,0 +1,158 @@
+"""Quick-open palette for the Study Notebook UI.
+
+This module provides the QuickOpenPalette component: a dialog (Ctrl+P) with
+a query field and the notes whose ``folder/filename`` fuzzy-matches it,
+with theme-driven styling.
+"""
+
+from typing import Callable, List
+
+import flet as ft
+from ui.themes.theme import theme
+
+
+class QuickOpenPalette:
+    """Manages the quick-open dialog.
+
+    Attributes:
+        index: A QuickOpenIndex answering the queries.
+        on_open: Callback called with (folder, filename) when a note is picked.
+        query_field: TextField the user types into.
+        results_list: ListView holding one row per match.
+        dialog: The AlertDialog holding the palette.
+    """
+
+    def __init__(self, index, on_open: Callable[[str, str], None]):
+        """Initialize the palette (closed).
+
+        Args:
+            index: A QuickOpenIndex answering the queries.
+            on_open: Callback called with (folder, filename) on pick.
+        """
+        self.index = index
+        self.on_open = on_open
+        self.matches: List = []
+        self.selected = 0
+        self.query_field = ft.TextField(
+            hint_text=theme["QUICK_OPEN_HINT"],
+            autofocus=True,
+            dense=True,
+            text_size=theme["SEARCH_FONT_SIZE"],
+            on_change=lambda e: self.show(e.control.value or ""),
+            on_submit=lambda _: self.submit(),
+        )
+        self.results_list = ft.ListView(
+            [],
+            spacing=theme["SEARCH_RESULTS_SPACING"],
+            height=theme["QUICK_OPEN_MAX_HEIGHT"],
+        )
+        self.dialog = ft.AlertDialog(
+            content=ft.Container(
+                content=ft.Column(
+                    [self.query_field, self.results_list],
+                    tight=True,
+                    spacing=theme["SPACING_SM"],
+                ),
+                width=theme["QUICK_OPEN_WIDTH"],
+            ),
+            content_padding=theme["QUICK_OPEN_PADDING"],
+            open=False,
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self.dialog.open)
+
+    def open(self):
+        """Show the palette with an empty query."""
+        self.query_field.value = ""
+        self.dialog.open = True
+        self.show("")
+
+    def close(self):
+        """Hide the palette."""
+        self.dialog.open = False
+        self.update()
+
+    def show(self, query: str):
+        """Display the best matches for query, selecting the first one."""
+        self.matches = self.index.search(query, limit=theme["QUICK_OPEN_LIMIT"])
+        self.selected = 0
+        self.render()
+
+    def move(self, delta: int):
+        """Move the selection up (-1) or down (+1)."""
+        if not self.matches:
+            return
+        self.selected = (self.selected + delta) % len(self.matches)
+        self.render()
+
+    def submit(self):
+        """Open the selected match."""
+        if self.matches:
+            self.pick(self.matches[self.selected])
+
+    def pick(self, match):
+        self.dialog.open = False
+        self.update()
+        self.on_open(match.folder, match.filename)
+
+    def build_row(self, match, selected: bool) -> ft.Container:
+        """Build a clickable row for a single match.
+
+        Args:
+            match: A QuickOpenMatch with folder and filename.
+            selected: Whether the row is the keyboard selection.
+
+        Returns:
+            A Container showing the note name and its folder.
+        """
+        return ft.Container(
+            content=ft.Row(
+                [
+                    ft.Text(
+                        match.filename,
+                        size=theme["SEARCH_RESULTS_TITLE_SIZE"],
+                        weight=theme["SIDEBAR_HIGHLIGHT_WEIGHT"],
+                        color=theme["SIDEBAR_HIGHLIGHT_COLOR"],
+                        max_lines=1,
+                        overflow=ft.TextOverflow.ELLIPSIS,
+                    ),
+                    ft.Text(
+                        match.folder,
+                        size=theme["SEARCH_RESULTS_META_SIZE"],
+                        color=theme["SEARCH_RESULTS_META_COLOR"],
+                        max_lines=1,
+                        overflow=ft.TextOverflow.ELLIPSIS,
+                    ),
+                ],
+                spacing=theme["SPACING_SM"],
+            ),
+            padding=theme["SEARCH_RESULTS_ROW_PADDING"],
+            border_radius=theme["SIDEBAR_FILE_ROW_RADIUS"],
+            bgcolor=theme["QUICK_OPEN_SELECTED_BG"] if selected else None,
+            ink=True,
+            on_click=lambda _, m=match: self.pick(m),
+        )
+
+    def render(self):
+        if self.matches:
+            rows = [
+                self.build_row(m, i == self.selected)
+                for i, m in enumerate(self.matches)
+            ]
+        else:
+            rows = [
+                ft.Text(
+                    "No matching notes",
+                    size=theme["SEARCH_RESULTS_META_SIZE"],
+                    color=theme["SEARCH_RESULTS_META_COLOR"],
+                )
+            ]
+        self.results_list.controls[:] = rows
+        self.update()
+
+    def update(self):
+        """Update the dialog if it is attached to a page."""
+        if getattr(self.dialog, "page", None) is not None:
+            self.dialog.update()
@@ -0,0 +1,175 @@
+"""Search results panel for the Study Notebook UI.
+
+This module provides the SearchResults component that lists the notes
+matching the header search field, with theme-driven styling. Results can be
+shown all at once or streamed in one by one; every query gets a generation
+number and rows of an older generation are dropped, so a slow query never
+overwrites the results of the one typed after it.
+"""
+
+import threading
+from typing import Callable, List
+
+import flet as ft
+from backend import slow_ops
+from ui.themes.theme import theme
+
+
+class SearchResults:
+    """Manages the search results list shown below the header.
+
+    Attributes:
+        on_open: Callback called with (folder, filename) when a result is picked.
+        results_list: ListView holding one row per result.
+        container: The Container holding the panel (hidden when empty).
+    """
+
+    def __init__(self, on_open: Callable[[str, str], None]):
+        """Initialize the SearchResults panel.
+
+        Args:
+            on_open: Callback called with (folder, filename) on result click.
+        """
+        self.on_open = on_open
+        self.query = ""
+        # Bumped for every new query (and on clear); guarded by _lock since
+        # streamed rows arrive from the event loop while typing starts new
+        # queries from handler threads
+        self.generation = 0
+        self._lock = threading.Lock()
+        self.results_list = ft.ListView(
+            [],
+            spacing=theme["SEARCH_RESULTS_SPACING"],
+            height=theme["SEARCH_RESULTS_MAX_HEIGHT"],
+        )
+        self.container = ft.Container(
+            content=self.results_list,
+            bgcolor=theme["SEARCH_RESULTS_BG"],
+            padding=theme["SEARCH_RESULTS_PADDING"],
+            border_radius=theme["BORDER_RADIUS"],
+            visible=False,
+        )
+
+    def build_result_row(self, result) -> ft.Container:
+        """Build a clickable row for a single search result.
+
+        Args:
+            result: A SearchResult with folder, filename and snippet.
+
+        Returns:
+            A Container showing the note name, its folder and a snippet.
+        """
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Row(
+                        [
+                            ft.Text(
+                                result.filename,
+                                size=theme["SEARCH_RESULTS_TITLE_SIZE"],
+                                weight=theme["SIDEBAR_HIGHLIGHT_WEIGHT"],
+                                color=theme["SIDEBAR_HIGHLIGHT_COLOR"],
+                                max_lines=1,
+                                overflow=ft.TextOverflow.ELLIPSIS,
+                            ),
+                            ft.Text(
+                                result.folder,
+                                size=theme["SEARCH_RESULTS_META_SIZE"],
+                                color=theme["SEARCH_RESULTS_META_COLOR"],
+                                max_lines=1,
+                                overflow=ft.TextOverflow.ELLIPSIS,
+                            ),
+                        ],
+                        spacing=theme["SPACING_SM"],
+                    ),
+                    ft.Text(
+                        result.snippet,
+                        size=theme["SEARCH_RESULTS_SNIPPET_SIZE"],
+                        color=theme["MAIN_CONTENT_COLOR"],
+                        max_lines=theme["SEARCH_RESULTS_SNIPPET_LINES"],
+                        overflow=ft.TextOverflow.ELLIPSIS,
+                    ),
+                ],
+                spacing=theme["ZERO_SPACING"],
+                tight=True,
+            ),
+            padding=theme["SEARCH_RESULTS_ROW_PADDING"],
+            border_radius=theme["SIDEBAR_FILE_ROW_RADIUS"],
+            ink=True,
+            on_click=lambda _, f=result.folder, fn=result.filename: self.on_open(
+                f, fn
+            ),
+        )
+
+    def show(self, results: List, query: str = ""):
+        """Display results, or an empty-state message when there are none.
+
+        Args:
+            results: List of SearchResult items, best first.
+            query: The query that produced the results.
+        """
+        generation = self.begin(query)
+        for result in results:
+            self.add(generation, result, update=False)
+        self.finish(generation)
+
+    def begin(self, query: str) -> int:
+        """Start showing the results of a new query.
+
+        Args:
+            query: The query whose results will be added.
+
+        Returns:
+            The generation number to pass to ``add`` and ``finish``.
+        """
+        with self._lock:
+            self.generation += 1
+            self.query = query
+            self.results_list.controls.clear()
+            return self.generation
+
+    def add(self, generation: int, result, update: bool = True) -> bool:
+        """Append a result of the query started as generation.
+
+        Returns:
+            False if a newer query has started; the result was dropped.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return False
+            with slow_ops.phase("build"):
+                self.results_list.controls.append(self.build_result_row(result))
+            self.container.visible = True
+            if update:
+                self.update()
+        return True
+
+    def finish(self, generation: int):
+        """Mark the query as complete, showing the empty state if needed."""
+        with self._lock:
+            if generation != self.generation:
+                return
+            if not self.results_list.controls:
+                self.results_list.controls.append(
+                    ft.Text(
+                        f"No notes match '{self.query}'",
+                        size=theme["SEARCH_RESULTS_META_SIZE"],
+                        color=theme["SEARCH_RESULTS_META_COLOR"],
+                    )
+                )
+            self.container.visible = True
+            self.update()
+
+    def clear(self):
+        """Hide the panel and drop its rows."""
+        with self._lock:
+            self.generation += 1
+            self.results_list.controls.clear()
+            self.container.visible = False
+            self.update()
+
+    def update(self):
+        """Update the panel if it is attached to a page."""
+        if getattr(self.container, "page", None) is not None:
+            with slow_ops.phase("update"):
+                self.container.update()
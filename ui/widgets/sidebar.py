@@ -1,719 +1,843 @@
+import bisect
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
 import flet as ft
 from ui.themes.theme import theme
-from backend.files_manager import list_folders
-
-
-def sidebar(
-    expanded_folders,
-    on_file_selected=None,
-    on_delete_file=None,
-    on_delete_folder=None,
-    on_create_folder=None,
-    on_create_subfolder=None,
-    on_create_file=None,
-    on_toggle_folder=None,
-    on_rename_file=None,
-    on_rename_folder=None,
-    current_file=None,
-    current_folder=None,
-    sidebar_column_ref=None,
-    on_sidebar_scroll=None,
-    reorder_mode=False,
-    on_toggle_reorder_mode=None,
-    on_reorder=None,
-    page=None,
-):
-    expanded_folders = expanded_folders or {}
-    folders = list_folders()
-    if not expanded_folders:
-        expanded_folders = {f: False for f in folders}
+from backend import slow_ops
+from backend.files_manager import list_folders, get_vault_index
+
+
+class SidebarRow(NamedTuple):
+    """One visible row of the flattened sidebar tree."""
+
+    kind: str  # "folder", "file" or "divider"
+    key: str  # folder path, "folder/file" or "divider:<folder>"
+    name: str
+    parent: str  # folder holding the entry ("" for top-level folders)
+    depth: int
+    is_last_childs: Tuple[bool, ...]
+    expanded: bool = False
+    has_children: Optional[bool] = None  # None: unknown until expanded
+
+
+def flatten_rows(
+    folders: List[str],
+    expanded_folders: dict,
+    children_of: Callable[[str], List[dict]],
+    has_children: Optional[Callable[[str], Optional[bool]]] = None,
+) -> List[SidebarRow]:
+    """Flatten the visible part of the folder tree into a list of rows.
+
+    Children are only requested for expanded folders, in the same order the
+    tree is drawn: each top-level folder, its expanded subtree, then a
+    divider. Collapsed folders are never listed; has_children supplies a
+    cached hint for their expander icon instead.
+
+    Args:
+        folders: Top-level folder names, in display order.
+        expanded_folders: Mapping of folder path to expanded state.
+        children_of: Returns the ordered children of a folder path.
+        has_children: Returns whether a collapsed folder has children
+            (True/False) or None when unknown.
+
+    Returns:
+        List of SidebarRow, top to bottom.
+    """
+    rows = []
+
+    def add_folder(name, parent, depth, is_last_childs):
+        folder_path = name if not parent else f"{parent}/{name}"
+        if not expanded_folders.get(folder_path, False):
+            hint = has_children(folder_path) if has_children else None
+            rows.append(
+                SidebarRow(
+                    "folder",
+                    folder_path,
+                    name,
+                    parent,
+                    depth,
+                    is_last_childs,
+                    False,
+                    hint,
+                )
+            )
+            return
+        try:
+            children = children_of(folder_path)
+        except Exception:
+            children = []
+        rows.append(
+            SidebarRow(
+                "folder",
+                folder_path,
+                name,
+                parent,
+                depth,
+                is_last_childs,
+                True,
+                bool(children),
+            )
+        )
+        for child_idx, child in enumerate(children):
+            child_last = is_last_childs + (child_idx == len(children) - 1,)
+            if child["type"] == "folder":
+                add_folder(child["name"], folder_path, depth + 1, child_last)
+            else:
+                rows.append(
+                    SidebarRow(
+                        "file",
+                        f"{folder_path}/{child['name']}",
+                        child["name"],
+                        folder_path,
+                        depth + 1,
+                        child_last,
+                    )
+                )
 
-    if on_delete_folder is None:
-        on_delete_folder = lambda *_: None
-    if on_file_selected is None:
-        on_file_selected = lambda *_: None
-    if on_delete_file is None:
-        on_delete_file = lambda *_: None
-    if on_create_folder is None:
-        on_create_folder = lambda *_: None
-    if on_create_subfolder is None:
-        on_create_subfolder = lambda *_: None
-    if on_create_file is None:
-        on_create_file = lambda *_: None
-    if on_rename_file is None:
-        on_rename_file = lambda *_: None
-    if on_rename_folder is None:
-        on_rename_folder = lambda *_: None
-    if on_toggle_reorder_mode is None:
-        on_toggle_reorder_mode = lambda *_: None
-    if on_reorder is None:
-        on_reorder = lambda *_: None
-
-    def build_items():
-        items = []
-
-        def parse_drag_data(data_str: str):
-            if data_str and "|" in data_str:
-                parts = data_str.split("|", 1)
-                return parts[0], parts[1]
-            return None, None
-
-        # Global folder creation button and reorder button
-        items.append(
-            ft.Row(
+    for idx, folder in enumerate(folders):
+        add_folder(folder, "", 0, (idx == len(folders) - 1,))
+        rows.append(SidebarRow("divider", f"divider:{folder}", "", "", 0, ()))
+    return rows
+
+
+def is_ancestor_folder(folder_path, current_folder):
+    if not current_folder:
+        return False
+    if folder_path == current_folder:
+        return True
+    return current_folder.startswith(folder_path + "/")
+
+
+def build_tree_prefix(is_last_childs, depth):
+    # Build tree prefix with growing dashes for depth
+    if not is_last_childs:
+        return ""
+    dash_base = theme.get("SIDEBAR_TREE_LINE_DASH_BASE", 2)
+    dash_step = theme.get("SIDEBAR_TREE_LINE_DASH_STEP", 2)
+    dash_count = dash_base + dash_step * depth
+    if is_last_childs[-1]:
+        return "└" + ("─" * dash_count) + " "
+    else:
+        return "├" + ("─" * dash_count) + " "
+
+
+def parse_drag_data(data_str: str):
+    if data_str and "|" in data_str:
+        parts = data_str.split("|", 1)
+        return parts[0], parts[1]
+    return None, None
+
+
+class SidebarTree:
+    """Persistent, virtualized sidebar tree.
+
+    The visible tree is flattened into rows whose heights are fixed per row
+    kind, so the offset of every row is known without building it. Only the
+    rows around the viewport are materialized inside a ListView, between two
+    spacers standing in for the rows above and below; scrolling pages rows in
+    and out.
+
+    The tree is built once and then patched: row controls are kept by key
+    (folder path or ``folder/file``) together with the state they were built
+    from, and ``refresh()`` only rebuilds rows whose state changed. Unchanged
+    rows keep their control, so an update only sends the difference and the
+    scroll position is never lost.
+
+    Attributes:
+        rows: Flattened visible rows.
+        list_view: The scrollable ListView holding the materialized window.
+        container: The Container holding the whole sidebar.
+    """
+
+    def __init__(
+        self,
+        callbacks: Dict[str, Callable],
+        page=None,
+        list_view_ref=None,
+        on_sidebar_scroll=None,
+        children_of: Optional[Callable[[str], List[dict]]] = None,
+        has_children: Optional[Callable[[str], Optional[bool]]] = None,
+    ):
+        """Initialize an empty sidebar; call ``refresh()`` to fill it.
+
+        Args:
+            callbacks: Handlers keyed by the ``sidebar()`` argument names.
+            page: The page, used to resolve dragged controls.
+            list_view_ref: Optional Ref bound to the ListView.
+            on_sidebar_scroll: Called with every scroll event.
+            children_of: Returns the ordered children of a folder path
+                (defaults to the vault index).
+            has_children: Has-children hint for collapsed folders (defaults
+                to the vault index).
+        """
+        self.callbacks = callbacks
+        self.page = page
+        self.on_sidebar_scroll = on_sidebar_scroll
+        self.children_of = children_of or get_vault_index().children
+        self.has_children = has_children or get_vault_index().has_children
+        self.rows: List[SidebarRow] = []
+        self.current_file = None
+        self.current_folder = None
+        self.reorder_mode = False
+        # key -> (state the row was built from, control)
+        self._controls: Dict[str, Tuple[tuple, ft.Control]] = {}
+        self._offsets = [0]
+        self._viewport = theme["SIDEBAR_VIRTUAL_VIEWPORT"]
+        self._pixels = 0.0
+        self._window = (0, 0)
+        self._top_spacer = ft.Container(height=0)
+        self._bottom_spacer = ft.Container(height=0)
+
+        self.list_view = ft.ListView(
+            controls=[],
+            spacing=theme["ZERO_SPACING"],
+            expand=True,
+            auto_scroll=False,
+            on_scroll_interval=theme["SIDEBAR_VIRTUAL_SCROLL_INTERVAL"],
+            on_scroll=self._on_scroll,
+            ref=list_view_ref,
+        )
+        self.toolbar = ft.Container(content=self.build_toolbar())
+        self.container = ft.Container(
+            content=ft.Column(
                 [
-                    ft.IconButton(
-                        icon=ft.Icons.FOLDER_SPECIAL,
-                        tooltip="Create top-level folder",
-                        icon_size=theme.get("ICON_SIZE_MD", 20),
-                        style=ft.ButtonStyle(
-                            padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"], shape=None
-                        ),
-                        on_click=lambda _: (
-                            on_create_folder() if on_create_folder else None
-                        ),
-                    ),
-                    ft.Container(expand=True),  # Spacer to push action button to right
-                    (
-                        ft.IconButton(
-                            icon=ft.Icons.CHECK_CIRCLE_OUTLINE,
-                            tooltip="Confirm reorder",
-                            icon_size=theme.get("ICON_SIZE_MD"),
-                            icon_color=theme.get("SIDEBAR_ITEM_COLOR"),
-                            style=ft.ButtonStyle(
-                                padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"], shape=None
-                            ),
-                            on_click=lambda _: on_toggle_reorder_mode(),
-                        )
-                        if reorder_mode
-                        else ft.IconButton(
-                            icon=ft.Icons.SWAP_VERT_OUTLINED,
-                            tooltip="Enable reorder mode",
-                            icon_size=theme.get("ICON_SIZE_MD"),
-                            style=ft.ButtonStyle(
-                                padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"], shape=None
+                    self.toolbar,
+                    self.build_divider(),
+                    ft.Stack(
+                        [
+                            self.list_view,
+                            ft.Container(
+                                width=theme[
+                                    "SIDEBAR_SCROLLBAR_SPACER_WIDTH"
+                                ],  # Reserve space for scrollbar
+                                expand=True,
+                                alignment=ft.alignment.center_right,
+                                bgcolor=theme["COLOR_TRANSPARENT"],
                             ),
-                            on_click=lambda _: on_toggle_reorder_mode(),
-                        )
+                        ],
+                        expand=True,
                     ),
                 ],
-                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                spacing=theme["SIDEBAR_ROW_SPACING"],
-                vertical_alignment=ft.CrossAxisAlignment.START,
-            )
+                spacing=theme["ZERO_SPACING"],
+                horizontal_alignment=ft.CrossAxisAlignment.START,
+                expand=True,
+            ),
+            width=theme.get("SIDEBAR_WIDTH"),
+            bgcolor=theme.get("SIDEBAR_BG"),
+            padding=theme.get("SIDEBAR_PADDING"),
+            border_radius=theme.get("BORDER_RADIUS"),
+            expand=True,  # Responsive: fill available space
         )
-        # Divider line above first folder
-        items.append(
-            ft.Container(
-                content=ft.Divider(
-                    height=theme["DIVIDER_HEIGHT"],
-                    color=theme.get("SIDEBAR_LINE_COLOR"),
-                ),
-                padding=ft.Padding(
-                    0,
-                    theme.get("SIDEBAR_DIVIDER_MARGIN", 8),
-                    0,
-                    theme.get("SIDEBAR_DIVIDER_MARGIN", 8),
-                ),
+
+    def refresh(
+        self,
+        expanded_folders: dict,
+        current_file=None,
+        current_folder=None,
+        reorder_mode=False,
+        folders: Optional[List[str]] = None,
+    ):
+        """Recompute the visible rows and patch the ones that changed.
+
+        Args:
+            expanded_folders: Mapping of folder path to expanded state.
+            current_file: Name of the open note, highlighted when visible.
+            current_folder: Folder of the open note.
+            reorder_mode: Render drag handles and drop bars.
+            folders: Top-level folders in display order (read from the vault
+                index when omitted).
+        """
+        if folders is None:
+            folders = list_folders()
+        if reorder_mode != self.reorder_mode:
+            # Every row changes shape; start from scratch
+            self.reorder_mode = reorder_mode
+            self._controls.clear()
+            self.toolbar.content = self.build_toolbar()
+            if getattr(self.toolbar, "page", None) is not None:
+                with slow_ops.phase("update"):
+                    self.toolbar.update()
+        self.current_file = current_file
+        self.current_folder = current_folder
+        with slow_ops.phase("build"):
+            self.rows = flatten_rows(
+                folders, expanded_folders, self.children_of, self.has_children
             )
+            self._offsets = self._compute_offsets(self.rows)
+            self._materialize(self._pixels)
+        self.update()
+
+    def update(self):
+        """Send pending changes if the sidebar is attached to a page."""
+        if getattr(self.list_view, "page", None) is not None:
+            with slow_ops.phase("update"):
+                self.list_view.update()
+
+    # Row geometry
+
+    def row_height(self, kind: str) -> int:
+        """Return the fixed height of a row kind in the current mode."""
+        if kind == "divider":
+            return theme["DIVIDER_HEIGHT"] + 2 * theme.get("SIDEBAR_DIVIDER_MARGIN", 8)
+        height = theme.get("SIDEBAR_FILE_ROW_HEIGHT")
+        if self.reorder_mode:
+            height += 2 * self._drop_bar_slot()
+        return height
+
+    def _drop_bar_slot(self) -> int:
+        # Drop bars grow on hover inside a slot of constant height
+        return (
+            theme["SIDEBAR_DROP_BAR_HOVER_HEIGHT"]
+            + 2 * theme["SIDEBAR_DROP_BAR_PADDING_Y"]
         )
 
-        def is_ancestor_folder(folder_path, current_folder):
-            if not current_folder:
-                return False
-            if folder_path == current_folder:
-                return True
-            return current_folder.startswith(folder_path + "/")
-
-        def build_tree_prefix(is_last_childs, depth):
-            # Build tree prefix with growing dashes for depth
-            if not is_last_childs:
-                return ""
-            dash_base = theme.get("SIDEBAR_TREE_LINE_DASH_BASE", 2)
-            dash_step = theme.get("SIDEBAR_TREE_LINE_DASH_STEP", 2)
-            dash_count = dash_base + dash_step * depth
-            if is_last_childs[-1]:
-                return "└" + ("─" * dash_count) + " "
-            else:
-                return "├" + ("─" * dash_count) + " "
-
-        def add_folder_items(folder, parent_path="", depth=0, is_last_childs=None):
-            if is_last_childs is None:
-                is_last_childs = []
-            folder_path = folder if not parent_path else f"{parent_path}/{folder}"
-            is_folder_ancestor = is_ancestor_folder(folder_path, current_folder)
-            is_expanded = expanded_folders.get(folder_path, False)
-            from backend.files_manager import BASE_DIR, _ensure_order_file
-            import os
-
-            abs_folder_path = os.path.join(BASE_DIR, folder_path)
-            # Children ordering comes from the folder's .order.json.
-            # This allows persisted reorders (including mixing files/folders) to render correctly.
-            try:
-                fs_entries = [
-                    e for e in os.listdir(abs_folder_path) if not e.startswith(".")
-                ]
-            except Exception:
-                fs_entries = []
-            fs_files = [
-                e
-                for e in fs_entries
-                if e.endswith(".md")
-                and os.path.isfile(os.path.join(abs_folder_path, e))
-            ]
-            fs_subfolders = [
-                e for e in fs_entries if os.path.isdir(os.path.join(abs_folder_path, e))
-            ]
-
-            try:
-                order = _ensure_order_file(abs_folder_path)
-            except Exception:
-                order = {"items": []}
-
-            children_in_order = []
-            names_in_order = set()
-            for item in order.get("items", []) or []:
-                name = item.get("name")
-                item_type = item.get("type")
-                if not name or item_type not in ("file", "folder"):
-                    continue
-                if item_type == "file":
-                    if name in fs_files:
-                        children_in_order.append({"name": name, "type": "file"})
-                        names_in_order.add(name)
-                else:
-                    if name in fs_subfolders:
-                        children_in_order.append({"name": name, "type": "folder"})
-                        names_in_order.add(name)
-
-            # Fallback: add any missing items at the start (keeps UI robust if order file is stale)
-            for name in fs_subfolders:
-                if name not in names_in_order:
-                    children_in_order.insert(0, {"name": name, "type": "folder"})
-                    names_in_order.add(name)
-            for name in fs_files:
-                if name not in names_in_order:
-                    children_in_order.insert(0, {"name": name, "type": "file"})
-                    names_in_order.add(name)
-
-            prefix = build_tree_prefix(is_last_childs, depth)
-
-            # Create folder row container
-            folder_container = ft.Container(
-                content=ft.Row(
-                    [
-                        (
-                            ft.Text(
-                                prefix,
-                                font_family=theme.get(
-                                    "SIDEBAR_TREE_LINE_FONT_FAMILY", "monospace"
-                                ),
-                                color=theme["SIDEBAR_TREE_LINE_DARK"],
-                                size=theme["SIDEBAR_TREE_LINE_SIZE"],
-                                selectable=False,
-                                width=(
-                                    len(prefix)
-                                    * theme.get("SIDEBAR_TREE_LINE_WIDTH_FACTOR", 8)
-                                    if prefix
-                                    else 0
-                                ),
-                            )
-                            if prefix
-                            else ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
-                        ),
-                        (
-                            ft.Icon(
-                                ft.Icons.DRAG_INDICATOR,
-                                size=theme["SIDEBAR_DRAG_ICON_SIZE"],
-                                color=theme.get("SIDEBAR_ITEM_COLOR"),
-                            )
-                            if reorder_mode
-                            else ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
-                        ),
-                        ft.Text(
-                            folder,
-                            color=(
-                                theme.get("SIDEBAR_HIGHLIGHT_COLOR")
-                                if is_folder_ancestor
-                                else theme.get("SIDEBAR_ITEM_COLOR")
-                            ),
-                            weight=theme.get("SIDEBAR_TITLE_FONT_WEIGHT"),
-                            size=theme.get("SIDEBAR_TITLE_FONT_SIZE"),
-                            expand=True,
-                            max_lines=theme["SIDEBAR_TEXT_MAX_LINES"],
-                            overflow=ft.TextOverflow.ELLIPSIS,
-                            tooltip=folder_path,
-                        ),
-                        (
-                            ft.PopupMenuButton(
-                                icon=ft.Icons.MORE_VERT,
-                                icon_size=theme.get("ICON_SIZE_SM", 16),
-                                style=ft.ButtonStyle(
-                                    padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"],
-                                    shape=None,
-                                ),
-                                items=[
-                                    ft.PopupMenuItem(
-                                        text="Create File",
-                                        icon=ft.Icons.NOTE_ADD,
-                                        on_click=lambda _, f=folder_path: (
-                                            on_create_file(f)
-                                            if on_create_file
-                                            else None
-                                        ),
-                                    ),
-                                    ft.PopupMenuItem(
-                                        text="Create Folder",
-                                        icon=ft.Icons.CREATE_NEW_FOLDER,
-                                        on_click=lambda _, f=folder_path: (
-                                            on_create_subfolder(f)
-                                            if on_create_subfolder
-                                            else None
-                                        ),
-                                    ),
-                                    ft.PopupMenuItem(
-                                        text="Rename",
-                                        icon=ft.Icons.EDIT,
-                                        on_click=lambda _, f=folder_path: (
-                                            on_rename_folder(f)
-                                            if on_rename_folder
-                                            else None
-                                        ),
-                                    ),
-                                    ft.PopupMenuItem(
-                                        text="Delete Folder",
-                                        icon=ft.Icons.DELETE,
-                                        on_click=lambda _, f=folder_path: on_delete_folder(
-                                            f
-                                        ),
-                                    ),
-                                ],
-                            )
-                            if not reorder_mode
-                            else ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
-                        ),
-                    ],
-                    alignment=theme.get(
-                        "PAGE_VERTICAL_ALIGNMENT", ft.MainAxisAlignment.START
-                    ),
-                    vertical_alignment=ft.CrossAxisAlignment.CENTER,
-                    spacing=theme["SIDEBAR_GROUP_SPACING"],
-                ),
-                bgcolor=(
-                    theme.get("SIDEBAR_HIGHLIGHT_BG") if is_folder_ancestor else None
-                ),
-                border_radius=(
-                    theme.get("SIDEBAR_FILE_ROW_RADIUS") if is_folder_ancestor else 0
-                ),
-                height=theme.get("SIDEBAR_FILE_ROW_HEIGHT"),
-                padding=theme.get("SIDEBAR_ROW_PADDING", ft.Padding(2, 2, 16, 2)),
-                on_click=lambda _, f=folder_path: (
-                    on_toggle_folder(f)
-                    if on_toggle_folder and not reorder_mode
-                    else None
-                ),
+    def _compute_offsets(self, rows: List[SidebarRow]) -> List[int]:
+        heights = {
+            kind: self.row_height(kind) for kind in ("folder", "file", "divider")
+        }
+        offsets = [0]
+        for row in rows:
+            offsets.append(offsets[-1] + heights[row.kind])
+        return offsets
+
+    # Windowing
+
+    def _visible_range(self, pixels: float) -> Tuple[int, int]:
+        first = max(0, bisect.bisect_right(self._offsets, pixels) - 1)
+        last = bisect.bisect_left(self._offsets, pixels + self._viewport)
+        return first, min(len(self.rows), last)
+
+    def _materialize(self, pixels: float):
+        first, last = self._visible_range(pixels)
+        overscan = theme["SIDEBAR_VIRTUAL_OVERSCAN"]
+        start = max(0, first - overscan)
+        end = min(len(self.rows), last + overscan)
+        self._window = (start, end)
+        self._top_spacer.height = self._offsets[start]
+        self._bottom_spacer.height = self._offsets[-1] - self._offsets[end]
+        self.list_view.controls = (
+            [self._top_spacer]
+            + [self.build_row(row) for row in self.rows[start:end]]
+            + [self._bottom_spacer]
+        )
+        # Forget cached rows far outside the window
+        if len(self._controls) > 4 * max(1, end - start):
+            keep = {row.key for row in self.rows[start:end]}
+            self._controls = {
+                key: entry for key, entry in self._controls.items() if key in keep
+            }
+
+    def _on_scroll(self, e):
+        if self.on_sidebar_scroll is not None:
+            self.on_sidebar_scroll(e)
+        pixels = getattr(e, "pixels", None)
+        if pixels is None:
+            return
+        self._pixels = pixels
+        viewport = getattr(e, "viewport_dimension", None)
+        if viewport:
+            self._viewport = viewport
+        first, last = self._visible_range(pixels)
+        start, end = self._window
+        margin = theme["SIDEBAR_VIRTUAL_OVERSCAN"] // 3
+        if (start > 0 and first < start + margin) or (
+            end < len(self.rows) and last > end - margin
+        ):
+            self._materialize(pixels)
+            self.update()
+
+    # Row builders
+
+    def _row_state(self, row: SidebarRow) -> tuple:
+        # Everything a row's rendering depends on besides the reorder mode
+        if row.kind == "folder":
+            highlighted = is_ancestor_folder(row.key, self.current_folder)
+        elif row.kind == "file":
+            highlighted = (
+                row.name == self.current_file and row.parent == self.current_folder
             )
-
-            # Wrap in Draggable; use dedicated drop bars for clarity
-            if reorder_mode:
-                parent_folder_for_reorder = parent_path if parent_path else ""
-
-                folder_draggable = ft.Draggable(
-                    group="reorder",
-                    content=folder_container,
-                    content_when_dragging=ft.Container(
-                        height=theme.get("SIDEBAR_FILE_ROW_HEIGHT"),
-                        bgcolor=theme["SIDEBAR_HIGHLIGHT_BG"],
-                        border=ft.border.all(1, theme.get("COLOR_PRIMARY")),
-                        border_radius=theme.get("SIDEBAR_FILE_ROW_RADIUS", 0),
+        else:
+            highlighted = False
+        return row, highlighted
+
+    def build_row(self, row: SidebarRow) -> ft.Control:
+        """Return the control for a row, rebuilding it only if its state changed."""
+        state = self._row_state(row)
+        cached = self._controls.get(row.key)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        if row.kind == "folder":
+            control = self.build_folder_row(row)
+        elif row.kind == "file":
+            control = self.build_file_row(row)
+        else:
+            control = self.build_divider()
+        self._controls[row.key] = (state, control)
+        return control
+
+    def build_toolbar(self) -> ft.Control:
+        """Global folder creation button and reorder button."""
+        on_create_folder = self.callbacks["on_create_folder"]
+        on_toggle_reorder_mode = self.callbacks["on_toggle_reorder_mode"]
+        return ft.Row(
+            [
+                ft.IconButton(
+                    icon=ft.Icons.FOLDER_SPECIAL,
+                    tooltip="Create top-level folder",
+                    icon_size=theme.get("ICON_SIZE_MD", 20),
+                    style=ft.ButtonStyle(
+                        padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"], shape=None
                     ),
-                    content_feedback=ft.Container(
-                        content=ft.Text(
-                            folder,
-                            size=theme["SIDEBAR_DRAG_FEEDBACK_TEXT_SIZE"],
-                            color=theme["SIDEBAR_DRAG_FEEDBACK_TEXT_COLOR"],
-                        ),
-                        bgcolor=theme.get("COLOR_PRIMARY"),
-                        padding=theme["SIDEBAR_DRAG_FEEDBACK_PADDING"],
-                        border_radius=theme["SIDEBAR_DRAG_FEEDBACK_RADIUS"],
-                        opacity=theme["SIDEBAR_DROP_BAR_HOVER_OPACITY"],
+                    on_click=lambda _: (
+                        on_create_folder() if on_create_folder else None
                     ),
-                    data=f"{parent_folder_for_reorder}|{folder}",
-                )
-
-                def drop_bar(insert_before: bool):
-                    def on_accept_bar(
-                        e,
-                        parent_folder=parent_folder_for_reorder,
-                        target_folder=folder,
-                        before=insert_before,
-                    ):
-                        dragged_parent, dragged_item = (None, None)
-                        if page and hasattr(e, "src_id"):
-                            try:
-                                src_control = page.get_control(f"{e.src_id}")
-                                if src_control and hasattr(src_control, "data"):
-                                    dragged_parent, dragged_item = parse_drag_data(
-                                        src_control.data
-                                    )
-                            except Exception:
-                                dragged_parent, dragged_item = (None, None)
-
-                        if (
-                            dragged_parent == parent_folder
-                            and dragged_item
-                            and dragged_item != target_folder
-                        ):
-                            on_reorder(
-                                parent_folder, dragged_item, target_folder, before
-                            )
-
-                    def on_will_accept_bar(
-                        e, parent_folder=parent_folder_for_reorder, target_folder=folder
-                    ):
-                        # Per Flet docs, e.data is "true"/"false" indicating group match.
-                        will_accept = getattr(e, "data", None) == "true"
-                        bar = e.control.content.content
-                        bar.bgcolor = (
-                            theme["SIDEBAR_DROP_BAR_HOVER_BG"]
-                            if will_accept
-                            else theme["SIDEBAR_DROP_BAR_BG"]
-                        )
-                        bar.height = (
-                            theme["SIDEBAR_DROP_BAR_HOVER_HEIGHT"]
-                            if will_accept
-                            else theme["SIDEBAR_DROP_BAR_HEIGHT"]
-                        )
-                        bar.opacity = (
-                            theme["SIDEBAR_DROP_BAR_HOVER_OPACITY"]
-                            if will_accept
-                            else theme["SIDEBAR_DROP_BAR_OPACITY"]
-                        )
-                        e.control.update()
-
-                    def on_leave_bar(e):
-                        bar = e.control.content.content
-                        bar.bgcolor = theme["SIDEBAR_DROP_BAR_BG"]
-                        bar.height = theme["SIDEBAR_DROP_BAR_HEIGHT"]
-                        bar.opacity = theme["SIDEBAR_DROP_BAR_OPACITY"]
-                        e.control.update()
-
-                    return ft.DragTarget(
-                        group="reorder",
-                        content=ft.Container(
-                            padding=ft.Padding(
-                                0,
-                                theme["SIDEBAR_DROP_BAR_PADDING_Y"],
-                                0,
-                                theme["SIDEBAR_DROP_BAR_PADDING_Y"],
-                            ),
-                            expand=True,
-                            content=ft.Container(
-                                height=theme["SIDEBAR_DROP_BAR_HEIGHT"],
-                                bgcolor=theme["SIDEBAR_DROP_BAR_BG"],
-                                opacity=theme["SIDEBAR_DROP_BAR_OPACITY"],
-                                expand=True,
-                            ),
+                ),
+                ft.Container(expand=True),  # Spacer to push action button to right
+                (
+                    ft.IconButton(
+                        icon=ft.Icons.CHECK_CIRCLE_OUTLINE,
+                        tooltip="Confirm reorder",
+                        icon_size=theme.get("ICON_SIZE_MD"),
+                        icon_color=theme.get("SIDEBAR_ITEM_COLOR"),
+                        style=ft.ButtonStyle(
+                            padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"], shape=None
+                        ),
+                        on_click=lambda _: on_toggle_reorder_mode(),
+                    )
+                    if self.reorder_mode
+                    else ft.IconButton(
+                        icon=ft.Icons.SWAP_VERT_OUTLINED,
+                        tooltip="Enable reorder mode",
+                        icon_size=theme.get("ICON_SIZE_MD"),
+                        style=ft.ButtonStyle(
+                            padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"], shape=None
                         ),
-                        on_accept=on_accept_bar,
-                        on_will_accept=on_will_accept_bar,
-                        on_leave=on_leave_bar,
+                        on_click=lambda _: on_toggle_reorder_mode(),
                     )
+                ),
+            ],
+            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            spacing=theme["SIDEBAR_ROW_SPACING"],
+            vertical_alignment=ft.CrossAxisAlignment.START,
+        )
 
-                folder_block = ft.Column(
-                    [
-                        drop_bar(True),
-                        folder_draggable,
-                        drop_bar(False),
-                    ],
-                    spacing=theme["ZERO_SPACING"],
-                )
-                items.append(folder_block)
-            else:
-                items.append(folder_container)
-            # Child rows (if expanded)
-            if is_expanded:
-                for child_idx, child in enumerate(children_in_order):
-                    is_last_child = child_idx == len(children_in_order) - 1
-
-                    if child["type"] == "folder":
-                        subfolder = child["name"]
-                        add_folder_items(
-                            subfolder,
-                            folder_path,
-                            depth + 1,
-                            is_last_childs + [is_last_child],
-                        )
-                        continue
+    def build_divider(self) -> ft.Control:
+        """Divider line between top-level folders."""
+        return ft.Container(
+            content=ft.Divider(
+                height=theme["DIVIDER_HEIGHT"],
+                color=theme.get("SIDEBAR_LINE_COLOR"),
+            ),
+            padding=ft.Padding(
+                0,
+                theme.get("SIDEBAR_DIVIDER_MARGIN", 8),
+                0,
+                theme.get("SIDEBAR_DIVIDER_MARGIN", 8),
+            ),
+            height=self.row_height("divider"),
+        )
 
-                    file = child["name"]
-                    is_selected = file == current_file and folder_path == current_folder
-                    file_prefix = build_tree_prefix(
-                        is_last_childs + [is_last_child], depth + 1
-                    )
+    def _tree_prefix_control(self, prefix: str) -> ft.Control:
+        if not prefix:
+            return ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
+        return ft.Text(
+            prefix,
+            font_family=theme.get("SIDEBAR_TREE_LINE_FONT_FAMILY", "monospace"),
+            color=theme["SIDEBAR_TREE_LINE_DARK"],
+            size=theme["SIDEBAR_TREE_LINE_SIZE"],
+            selectable=False,
+            width=len(prefix) * theme.get("SIDEBAR_TREE_LINE_WIDTH_FACTOR", 8),
+        )
+
+    def _expander(self, row: SidebarRow) -> ft.Control:
+        if row.has_children is False:
+            # Nothing to expand; keep names aligned with their siblings
+            return ft.Container(width=theme["SIDEBAR_EXPANDER_SIZE"])
+        return ft.Icon(
+            (
+                ft.Icons.KEYBOARD_ARROW_DOWN
+                if row.expanded
+                else ft.Icons.KEYBOARD_ARROW_RIGHT
+            ),
+            size=theme["SIDEBAR_EXPANDER_SIZE"],
+            color=theme.get("SIDEBAR_ITEM_COLOR"),
+        )
 
-                    # Create file row container
-                    file_container = ft.Container(
-                        content=ft.Row(
-                            [
-                                (
-                                    ft.Text(
-                                        file_prefix,
-                                        font_family=theme.get(
-                                            "SIDEBAR_TREE_LINE_FONT_FAMILY",
-                                            "monospace",
-                                        ),
-                                        color=theme["SIDEBAR_TREE_LINE_DARK"],
-                                        size=theme["SIDEBAR_TREE_LINE_SIZE"],
-                                        selectable=False,
-                                        width=(
-                                            len(file_prefix)
-                                            * theme.get(
-                                                "SIDEBAR_TREE_LINE_WIDTH_FACTOR", 8
-                                            )
-                                            if file_prefix
-                                            else 0
-                                        ),
-                                    )
-                                    if file_prefix
-                                    else ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
+    def _drag_handle(self) -> ft.Control:
+        if self.reorder_mode:
+            return ft.Icon(
+                ft.Icons.DRAG_INDICATOR,
+                size=theme["SIDEBAR_DRAG_ICON_SIZE"],
+                color=theme.get("SIDEBAR_ITEM_COLOR"),
+            )
+        return ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
+
+    def build_folder_row(self, row: SidebarRow) -> ft.Control:
+        """Build the row of a folder (with drop bars in reorder mode).
+
+        Args:
+            row: The folder's SidebarRow.
+
+        Returns:
+            The folder row control.
+        """
+        folder_path = row.key
+        on_create_file = self.callbacks["on_create_file"]
+        on_create_subfolder = self.callbacks["on_create_subfolder"]
+        on_rename_folder = self.callbacks["on_rename_folder"]
+        on_delete_folder = self.callbacks["on_delete_folder"]
+        on_toggle_folder = self.callbacks["on_toggle_folder"]
+        reorder_mode = self.reorder_mode
+        is_folder_ancestor = is_ancestor_folder(folder_path, self.current_folder)
+
+        folder_container = ft.Container(
+            content=ft.Row(
+                [
+                    self._tree_prefix_control(
+                        build_tree_prefix(row.is_last_childs, row.depth)
+                    ),
+                    self._drag_handle(),
+                    self._expander(row),
+                    ft.Text(
+                        row.name,
+                        color=(
+                            theme.get("SIDEBAR_HIGHLIGHT_COLOR")
+                            if is_folder_ancestor
+                            else theme.get("SIDEBAR_ITEM_COLOR")
+                        ),
+                        weight=theme.get("SIDEBAR_TITLE_FONT_WEIGHT"),
+                        size=theme.get("SIDEBAR_TITLE_FONT_SIZE"),
+                        expand=True,
+                        max_lines=theme["SIDEBAR_TEXT_MAX_LINES"],
+                        overflow=ft.TextOverflow.ELLIPSIS,
+                        tooltip=folder_path,
+                    ),
+                    (
+                        ft.PopupMenuButton(
+                            icon=ft.Icons.MORE_VERT,
+                            icon_size=theme.get("ICON_SIZE_SM", 16),
+                            style=ft.ButtonStyle(
+                                padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"],
+                                shape=None,
+                            ),
+                            items=[
+                                ft.PopupMenuItem(
+                                    text="Create File",
+                                    icon=ft.Icons.NOTE_ADD,
+                                    on_click=lambda _, f=folder_path: (
+                                        on_create_file(f) if on_create_file else None
+                                    ),
                                 ),
-                                (
-                                    ft.Icon(
-                                        ft.Icons.DRAG_INDICATOR,
-                                        size=theme["SIDEBAR_DRAG_ICON_SIZE"],
-                                        color=theme.get("SIDEBAR_ITEM_COLOR"),
-                                    )
-                                    if reorder_mode
-                                    else ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
+                                ft.PopupMenuItem(
+                                    text="Create Folder",
+                                    icon=ft.Icons.CREATE_NEW_FOLDER,
+                                    on_click=lambda _, f=folder_path: (
+                                        on_create_subfolder(f)
+                                        if on_create_subfolder
+                                        else None
+                                    ),
                                 ),
-                                ft.Text(
-                                    file,
-                                    color=(
-                                        theme["SIDEBAR_HIGHLIGHT_COLOR"]
-                                        if is_selected
-                                        else theme["SIDEBAR_ITEM_COLOR"]
+                                ft.PopupMenuItem(
+                                    text="Rename",
+                                    icon=ft.Icons.EDIT,
+                                    on_click=lambda _, f=folder_path: (
+                                        on_rename_folder(f)
+                                        if on_rename_folder
+                                        else None
                                     ),
-                                    max_lines=theme["SIDEBAR_TEXT_MAX_LINES"],
-                                    overflow=ft.TextOverflow.ELLIPSIS,
-                                    tooltip=file,
-                                    expand=True,
-                                    style=theme.get("SIDEBAR_FILE_TEXT_STYLE", None),
                                 ),
-                                (
-                                    ft.PopupMenuButton(
-                                        icon=ft.Icons.MORE_VERT,
-                                        icon_size=theme.get("ICON_SIZE_SM", 16),
-                                        style=ft.ButtonStyle(
-                                            padding=theme[
-                                                "SIDEBAR_BUTTON_PADDING_ZERO"
-                                            ],
-                                            shape=None,
-                                        ),
-                                        items=[
-                                            ft.PopupMenuItem(
-                                                text="Rename",
-                                                icon=ft.Icons.EDIT,
-                                                on_click=lambda _, f=folder_path, fi=file: (
-                                                    on_rename_file(f, fi)
-                                                    if on_rename_file
-                                                    else None
-                                                ),
-                                            ),
-                                            ft.PopupMenuItem(
-                                                text="Delete",
-                                                icon=ft.Icons.DELETE,
-                                                on_click=lambda _, f=folder_path, fi=file: on_delete_file(
-                                                    f, fi
-                                                ),
-                                            ),
-                                        ],
-                                    )
-                                    if not reorder_mode
-                                    else ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
+                                ft.PopupMenuItem(
+                                    text="Delete Folder",
+                                    icon=ft.Icons.DELETE,
+                                    on_click=lambda _, f=folder_path: on_delete_folder(
+                                        f
+                                    ),
                                 ),
                             ],
-                            alignment=theme.get(
-                                "PAGE_VERTICAL_ALIGNMENT",
-                                ft.MainAxisAlignment.START,
-                            ),
-                            vertical_alignment=ft.CrossAxisAlignment.CENTER,
-                            spacing=theme["SIDEBAR_GROUP_SPACING"],
-                        ),
-                        bgcolor=(
-                            theme.get("SIDEBAR_HIGHLIGHT_BG") if is_selected else None
-                        ),
-                        border_radius=(
-                            theme.get("SIDEBAR_FILE_ROW_RADIUS") if is_selected else 0
-                        ),
-                        height=theme.get("SIDEBAR_FILE_ROW_HEIGHT"),
-                        padding=theme.get(
-                            "SIDEBAR_ROW_PADDING", ft.Padding(2, 2, 16, 2)
-                        ),
-                        on_click=lambda _, f=folder_path, fi=file: (
-                            on_file_selected(f, fi) if not reorder_mode else None
+                        )
+                        if not reorder_mode
+                        else ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
+                    ),
+                ],
+                alignment=theme.get(
+                    "PAGE_VERTICAL_ALIGNMENT", ft.MainAxisAlignment.START
+                ),
+                vertical_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=theme["SIDEBAR_GROUP_SPACING"],
+            ),
+            bgcolor=(theme.get("SIDEBAR_HIGHLIGHT_BG") if is_folder_ancestor else None),
+            border_radius=(
+                theme.get("SIDEBAR_FILE_ROW_RADIUS") if is_folder_ancestor else 0
+            ),
+            height=theme.get("SIDEBAR_FILE_ROW_HEIGHT"),
+            padding=theme.get("SIDEBAR_ROW_PADDING", ft.Padding(2, 2, 16, 2)),
+            on_click=lambda _, f=folder_path: (
+                on_toggle_folder(f) if on_toggle_folder and not reorder_mode else None
+            ),
+        )
+        if not reorder_mode:
+            return folder_container
+        return self._reorder_block(folder_container, row.parent, row.name)
+
+    def build_file_row(self, row: SidebarRow) -> ft.Control:
+        """Build the row of a note (with drop bars in reorder mode).
+
+        Args:
+            row: The note's SidebarRow.
+
+        Returns:
+            The file row control.
+        """
+        folder_path = row.parent
+        file = row.name
+        on_rename_file = self.callbacks["on_rename_file"]
+        on_delete_file = self.callbacks["on_delete_file"]
+        on_file_selected = self.callbacks["on_file_selected"]
+        reorder_mode = self.reorder_mode
+        is_selected = file == self.current_file and folder_path == self.current_folder
+
+        file_container = ft.Container(
+            content=ft.Row(
+                [
+                    self._tree_prefix_control(
+                        build_tree_prefix(row.is_last_childs, row.depth)
+                    ),
+                    self._drag_handle(),
+                    ft.Text(
+                        file,
+                        color=(
+                            theme["SIDEBAR_HIGHLIGHT_COLOR"]
+                            if is_selected
+                            else theme["SIDEBAR_ITEM_COLOR"]
                         ),
-                    )
-
-                    if reorder_mode:
-                        file_draggable = ft.Draggable(
-                            group="reorder",
-                            content=file_container,
-                            content_when_dragging=ft.Container(
-                                height=theme.get("SIDEBAR_FILE_ROW_HEIGHT"),
-                                bgcolor=theme["SIDEBAR_HIGHLIGHT_BG"],
-                                border=ft.border.all(1, theme.get("COLOR_PRIMARY")),
-                                border_radius=theme.get("SIDEBAR_FILE_ROW_RADIUS", 0),
-                            ),
-                            content_feedback=ft.Container(
-                                content=ft.Text(
-                                    file,
-                                    size=theme["SIDEBAR_DRAG_FEEDBACK_TEXT_SIZE"],
-                                    color=theme["SIDEBAR_DRAG_FEEDBACK_TEXT_COLOR"],
-                                ),
-                                bgcolor=theme.get("COLOR_PRIMARY"),
-                                padding=theme["SIDEBAR_DRAG_FEEDBACK_PADDING"],
-                                border_radius=theme["SIDEBAR_DRAG_FEEDBACK_RADIUS"],
-                                opacity=theme["SIDEBAR_DROP_BAR_HOVER_OPACITY"],
+                        max_lines=theme["SIDEBAR_TEXT_MAX_LINES"],
+                        overflow=ft.TextOverflow.ELLIPSIS,
+                        tooltip=file,
+                        expand=True,
+                        style=theme.get("SIDEBAR_FILE_TEXT_STYLE", None),
+                    ),
+                    (
+                        ft.PopupMenuButton(
+                            icon=ft.Icons.MORE_VERT,
+                            icon_size=theme.get("ICON_SIZE_SM", 16),
+                            style=ft.ButtonStyle(
+                                padding=theme["SIDEBAR_BUTTON_PADDING_ZERO"],
+                                shape=None,
                             ),
-                            data=f"{folder_path}|{file}",
-                        )
-
-                        def drop_bar(insert_before: bool):
-                            def on_accept_bar(
-                                e,
-                                parent_folder=folder_path,
-                                target_file=file,
-                                before=insert_before,
-                            ):
-                                dragged_parent, dragged_item = (None, None)
-                                if page and hasattr(e, "src_id"):
-                                    try:
-                                        src_control = page.get_control(f"{e.src_id}")
-                                        if src_control and hasattr(src_control, "data"):
-                                            dragged_parent, dragged_item = (
-                                                parse_drag_data(src_control.data)
-                                            )
-                                    except Exception:
-                                        dragged_parent, dragged_item = (None, None)
-
-                                if (
-                                    dragged_parent == parent_folder
-                                    and dragged_item
-                                    and dragged_item != target_file
-                                ):
-                                    on_reorder(
-                                        parent_folder, dragged_item, target_file, before
-                                    )
-
-                            def on_will_accept_bar(e):
-                                will_accept = getattr(e, "data", None) == "true"
-                                bar = e.control.content.content
-                                bar.bgcolor = (
-                                    theme["SIDEBAR_DROP_BAR_HOVER_BG"]
-                                    if will_accept
-                                    else theme["SIDEBAR_DROP_BAR_BG"]
-                                )
-                                bar.height = (
-                                    theme["SIDEBAR_DROP_BAR_HOVER_HEIGHT"]
-                                    if will_accept
-                                    else theme["SIDEBAR_DROP_BAR_HEIGHT"]
-                                )
-                                bar.opacity = (
-                                    theme["SIDEBAR_DROP_BAR_HOVER_OPACITY"]
-                                    if will_accept
-                                    else theme["SIDEBAR_DROP_BAR_OPACITY"]
-                                )
-                                e.control.update()
-
-                            def on_leave_bar(e):
-                                bar = e.control.content.content
-                                bar.bgcolor = theme["SIDEBAR_DROP_BAR_BG"]
-                                bar.height = theme["SIDEBAR_DROP_BAR_HEIGHT"]
-                                bar.opacity = theme["SIDEBAR_DROP_BAR_OPACITY"]
-                                e.control.update()
-
-                            return ft.DragTarget(
-                                group="reorder",
-                                content=ft.Container(
-                                    padding=ft.Padding(
-                                        0,
-                                        theme["SIDEBAR_DROP_BAR_PADDING_Y"],
-                                        0,
-                                        theme["SIDEBAR_DROP_BAR_PADDING_Y"],
+                            items=[
+                                ft.PopupMenuItem(
+                                    text="Rename",
+                                    icon=ft.Icons.EDIT,
+                                    on_click=lambda _, f=folder_path, fi=file: (
+                                        on_rename_file(f, fi)
+                                        if on_rename_file
+                                        else None
                                     ),
-                                    expand=True,
-                                    content=ft.Container(
-                                        height=theme["SIDEBAR_DROP_BAR_HEIGHT"],
-                                        bgcolor=theme["SIDEBAR_DROP_BAR_BG"],
-                                        opacity=theme["SIDEBAR_DROP_BAR_OPACITY"],
-                                        expand=True,
+                                ),
+                                ft.PopupMenuItem(
+                                    text="Delete",
+                                    icon=ft.Icons.DELETE,
+                                    on_click=lambda _, f=folder_path, fi=file: on_delete_file(
+                                        f, fi
                                     ),
                                 ),
-                                on_accept=on_accept_bar,
-                                on_will_accept=on_will_accept_bar,
-                                on_leave=on_leave_bar,
-                            )
-
-                        file_block = ft.Column(
-                            [
-                                drop_bar(True),
-                                file_draggable,
-                                drop_bar(False),
                             ],
-                            spacing=theme["ZERO_SPACING"],
                         )
-                        items.append(file_block)
-                    else:
-                        items.append(file_container)
-
-        for idx, folder in enumerate(folders):
-            add_folder_items(folder, depth=0, is_last_childs=[idx == len(folders) - 1])
-            items.append(
-                ft.Container(
-                    content=ft.Divider(
-                        height=theme["DIVIDER_HEIGHT"],
-                        color=theme.get("SIDEBAR_LINE_COLOR"),
-                    ),
-                    padding=ft.Padding(
-                        0,
-                        theme.get("SIDEBAR_DIVIDER_MARGIN", 8),
-                        0,
-                        theme.get("SIDEBAR_DIVIDER_MARGIN", 8),
+                        if not reorder_mode
+                        else ft.Container(width=theme["SIDEBAR_ZERO_WIDTH"])
                     ),
-                )
-            )
-        return items
-
-    controls_list = build_items()
-    if not isinstance(controls_list, list):
-        controls_list = [controls_list] if controls_list is not None else []
-    sidebar_column = ft.Column(
-        controls=controls_list,
-        horizontal_alignment=ft.CrossAxisAlignment.START,
-        expand=True,  # Responsive: fill available space
-        scroll=ft.ScrollMode.AUTO,
-        auto_scroll=False,
-        ref=sidebar_column_ref if sidebar_column_ref is not None else None,
-        on_scroll=on_sidebar_scroll if on_sidebar_scroll is not None else None,
-    )
-    return ft.Container(
-        content=ft.Stack(
+                ],
+                alignment=theme.get(
+                    "PAGE_VERTICAL_ALIGNMENT",
+                    ft.MainAxisAlignment.START,
+                ),
+                vertical_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=theme["SIDEBAR_GROUP_SPACING"],
+            ),
+            bgcolor=(theme.get("SIDEBAR_HIGHLIGHT_BG") if is_selected else None),
+            border_radius=(theme.get("SIDEBAR_FILE_ROW_RADIUS") if is_selected else 0),
+            height=theme.get("SIDEBAR_FILE_ROW_HEIGHT"),
+            padding=theme.get("SIDEBAR_ROW_PADDING", ft.Padding(2, 2, 16, 2)),
+            on_click=lambda _, f=folder_path, fi=file: (
+                on_file_selected(f, fi) if not reorder_mode else None
+            ),
+        )
+        if not reorder_mode:
+            return file_container
+        return self._reorder_block(file_container, folder_path, file)
+
+    # Reorder mode
+
+    def _reorder_block(self, row_container, parent_folder: str, item: str):
+        # Wrap in Draggable; use dedicated drop bars for clarity
+        draggable = ft.Draggable(
+            group="reorder",
+            content=row_container,
+            content_when_dragging=ft.Container(
+                height=theme.get("SIDEBAR_FILE_ROW_HEIGHT"),
+                bgcolor=theme["SIDEBAR_HIGHLIGHT_BG"],
+                border=ft.border.all(1, theme.get("COLOR_PRIMARY")),
+                border_radius=theme.get("SIDEBAR_FILE_ROW_RADIUS", 0),
+            ),
+            content_feedback=ft.Container(
+                content=ft.Text(
+                    item,
+                    size=theme["SIDEBAR_DRAG_FEEDBACK_TEXT_SIZE"],
+                    color=theme["SIDEBAR_DRAG_FEEDBACK_TEXT_COLOR"],
+                ),
+                bgcolor=theme.get("COLOR_PRIMARY"),
+                padding=theme["SIDEBAR_DRAG_FEEDBACK_PADDING"],
+                border_radius=theme["SIDEBAR_DRAG_FEEDBACK_RADIUS"],
+                opacity=theme["SIDEBAR_DROP_BAR_HOVER_OPACITY"],
+            ),
+            data=f"{parent_folder}|{item}",
+        )
+        return ft.Column(
             [
-                sidebar_column,
-                ft.Container(
-                    width=theme[
-                        "SIDEBAR_SCROLLBAR_SPACER_WIDTH"
-                    ],  # Reserve space for scrollbar
+                self._drop_bar(parent_folder, item, True),
+                draggable,
+                self._drop_bar(parent_folder, item, False),
+            ],
+            spacing=theme["ZERO_SPACING"],
+        )
+
+    def _drop_bar(self, parent_folder: str, target_item: str, insert_before: bool):
+        on_reorder = self.callbacks["on_reorder"]
+        page = self.page
+
+        def on_accept_bar(e):
+            dragged_parent, dragged_item = (None, None)
+            if page and hasattr(e, "src_id"):
+                try:
+                    src_control = page.get_control(f"{e.src_id}")
+                    if src_control and hasattr(src_control, "data"):
+                        dragged_parent, dragged_item = parse_drag_data(
+                            src_control.data
+                        )
+                except Exception:
+                    dragged_parent, dragged_item = (None, None)
+
+            if (
+                dragged_parent == parent_folder
+                and dragged_item
+                and dragged_item != target_item
+            ):
+                on_reorder(parent_folder, dragged_item, target_item, insert_before)
+
+        def on_will_accept_bar(e):
+            # Per Flet docs, e.data is "true"/"false" indicating group match.
+            will_accept = getattr(e, "data", None) == "true"
+            bar = e.control.content.content
+            bar.bgcolor = (
+                theme["SIDEBAR_DROP_BAR_HOVER_BG"]
+                if will_accept
+                else theme["SIDEBAR_DROP_BAR_BG"]
+            )
+            bar.height = (
+                theme["SIDEBAR_DROP_BAR_HOVER_HEIGHT"]
+                if will_accept
+                else theme["SIDEBAR_DROP_BAR_HEIGHT"]
+            )
+            bar.opacity = (
+                theme["SIDEBAR_DROP_BAR_HOVER_OPACITY"]
+                if will_accept
+                else theme["SIDEBAR_DROP_BAR_OPACITY"]
+            )
+            e.control.update()
+
+        def on_leave_bar(e):
+            bar = e.control.content.content
+            bar.bgcolor = theme["SIDEBAR_DROP_BAR_BG"]
+            bar.height = theme["SIDEBAR_DROP_BAR_HEIGHT"]
+            bar.opacity = theme["SIDEBAR_DROP_BAR_OPACITY"]
+            e.control.update()
+
+        return ft.DragTarget(
+            group="reorder",
+            content=ft.Container(
+                padding=ft.Padding(
+                    0,
+                    theme["SIDEBAR_DROP_BAR_PADDING_Y"],
+                    0,
+                    theme["SIDEBAR_DROP_BAR_PADDING_Y"],
+                ),
+                # Constant slot height keeps the row extent fixed on hover
+                height=self._drop_bar_slot(),
+                alignment=ft.alignment.center,
+                content=ft.Container(
+                    height=theme["SIDEBAR_DROP_BAR_HEIGHT"],
+                    bgcolor=theme["SIDEBAR_DROP_BAR_BG"],
+                    opacity=theme["SIDEBAR_DROP_BAR_OPACITY"],
                     expand=True,
-                    alignment=ft.alignment.center_right,
-                    bgcolor=theme["COLOR_TRANSPARENT"],
                 ),
-            ]
-        ),
-        width=theme.get("SIDEBAR_WIDTH"),
-        bgcolor=theme.get("SIDEBAR_BG"),
-        padding=theme.get("SIDEBAR_PADDING"),
-        border_radius=theme.get("BORDER_RADIUS"),
-        expand=True,  # Responsive: fill available space
+            ),
+            on_accept=on_accept_bar,
+            on_will_accept=on_will_accept_bar,
+            on_leave=on_leave_bar,
+        )
+
+
+def sidebar(
+    expanded_folders,
+    on_file_selected=None,
+    on_delete_file=None,
+    on_delete_folder=None,
+    on_create_folder=None,
+    on_create_subfolder=None,
+    on_create_file=None,
+    on_toggle_folder=None,
+    on_rename_file=None,
+    on_rename_folder=None,
+    current_file=None,
+    current_folder=None,
+    sidebar_column_ref=None,
+    on_sidebar_scroll=None,
+    reorder_mode=False,
+    on_toggle_reorder_mode=None,
+    on_reorder=None,
+    page=None,
+    tree_ref=None,
+):
+    """Build a SidebarTree and return its container.
+
+    Pass an ``ft.Ref`` as tree_ref to keep the tree and patch it later with
+    ``SidebarTree.refresh()`` instead of building a new sidebar.
+    """
+    expanded_folders = expanded_folders or {}
+    folders = list_folders()
+    if not expanded_folders:
+        expanded_folders = {f: False for f in folders}
+
+    noop = lambda *_: None
+    callbacks = {
+        "on_file_selected": on_file_selected or noop,
+        "on_delete_file": on_delete_file or noop,
+        "on_delete_folder": on_delete_folder or noop,
+        "on_create_folder": on_create_folder or noop,
+        "on_create_subfolder": on_create_subfolder or noop,
+        "on_create_file": on_create_file or noop,
+        "on_toggle_folder": on_toggle_folder,
+        "on_rename_file": on_rename_file or noop,
+        "on_rename_folder": on_rename_folder or noop,
+        "on_toggle_reorder_mode": on_toggle_reorder_mode or noop,
+        "on_reorder": on_reorder or noop,
+    }
+
+    # Children ordering comes from each folder's .order.json, merged with the
+    # entries on disk; the vault index serves both from memory.
+    tree = SidebarTree(
+        callbacks,
+        page=page,
+        list_view_ref=sidebar_column_ref,
+        on_sidebar_scroll=on_sidebar_scroll,
+    )
+    tree.refresh(
+        expanded_folders,
+        current_file=current_file,
+        current_folder=current_folder,
+        reorder_mode=reorder_mode,
+        folders=folders,
     )
+    if tree_ref is not None:
+        tree_ref.current = tree
+    return tree.container
@@ -7,6 +7,8 @@ selection, and closure with theme-driven styling.
 from typing import Callable, List
 
 import flet as ft
+from backend import slow_ops
+from backend.instrumentation import instrumented
 from ui.themes.theme import theme
 
 
@@ -168,13 +170,16 @@ class TabsBar:
 
         return tab_controls
 
+    @instrumented("ui.TabsBar.update")
     def update(self):
         """Update the tab row with current tab state.
 
         This method rebuilds and displays all tabs based on open_tabs
         and selected_idx state.
         """
-        tab_controls = self.build_tab_controls()
-        # Use slice assignment to update Row controls
-        self.tab_row.controls[:] = tab_controls
-        self.tab_row.update()
+        with slow_ops.phase("build"):
+            tab_controls = self.build_tab_controls()
+            # Use slice assignment to update Row controls
+            self.tab_row.controls[:] = tab_controls
+        with slow_ops.phase("update"):
+            self.tab_row.update()